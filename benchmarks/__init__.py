@@ -0,0 +1 @@
+"""Benchmarks por etapas con fixtures locales (sin claves de API ni MySQL)."""
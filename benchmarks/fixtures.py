@@ -0,0 +1,134 @@
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# FIXTURES SINTÉTICAS CON EL VOLUMEN Y LA FORMA DEL FIDS DE FRÁNCFORT
+# ----------------------------------------------------------------------
+
+# Llegadas grabadas de FRA (08:00–20:00 de un día): 1769 entradas, ~47 % codeshares
+RECORDED_CSV = Path(__file__).resolve().parents[1] / "data/flights/frankfurt_arrivals_tomorrow_divided.csv"
+FRA_ITEMS_PER_DAY = 1769
+WINDOWS_PER_DAY = 2  # 08:00–14:00 y 14:00–20:00, como el script original
+VARIANTS = 4         # Payloads distintos por ventana que se reparten entre aeropuertos
+
+FALLBACK_VOCABULARY = {
+    "from_airport_name": ["Madrid", "London", "Paris", "Vienna", "New York", "Singapore", "Goteborg"],
+    "airline": ["Lufthansa", "United", "Air Canada", "ANA", "Singapore", "Condor"],
+    "aircraft_model": ["Airbus A320", "Airbus A321", "Boeing 787-9", "Airbus A350-900", "Embraer 190"],
+}
+
+
+def recorded_vocabulary() -> dict:
+    """Orígenes, aerolíneas y aviones reales del CSV grabado (o una lista fija si no está)."""
+    if not RECORDED_CSV.exists():
+        return FALLBACK_VOCABULARY
+    df = pd.read_csv(RECORDED_CSV, encoding="utf-8-sig").dropna(how="all")
+    return {col: df[col].dropna().tolist() for col in FALLBACK_VOCABULARY}
+
+
+def arrival_items(n: int, start_utc: datetime, hours: int, seed: int, vocabulary: dict = None) -> list:
+    """`n` entradas con la estructura del JSON de AeroDataBox (`withLeg=true`), con codeshares."""
+    rng = random.Random(seed)
+    vocabulary = vocabulary or recorded_vocabulary()
+    items = []
+    while len(items) < n:
+        minute = rng.randrange(hours * 60) // 5 * 5
+        utc = start_utc + timedelta(minutes=minute)
+        local = utc + timedelta(hours=2)
+        origin = rng.choice(vocabulary["from_airport_name"])
+        model = rng.choice(vocabulary["aircraft_model"])
+        leg = {
+            "departure": {"airport": {"icao": "XXXX", "iata": "XXX", "name": origin, "timeZone": "Europe/Berlin"},
+                          "scheduledTime": {"utc": (utc - timedelta(hours=2)).strftime("%Y-%m-%d %H:%MZ"),
+                                            "local": (local - timedelta(hours=2)).strftime("%Y-%m-%d %H:%M+02:00")},
+                          "terminal": "1", "quality": ["Basic"]},
+            "arrival": {"scheduledTime": {"utc": utc.strftime("%Y-%m-%d %H:%MZ"),
+                                          "local": local.strftime("%Y-%m-%d %H:%M+02:00")},
+                        "revisedTime": {"utc": (utc + timedelta(minutes=rng.randrange(-5, 30))).strftime("%Y-%m-%d %H:%MZ"),
+                                        "local": (local + timedelta(minutes=rng.randrange(-5, 30))).strftime("%Y-%m-%d %H:%M+02:00")},
+                        "terminal": rng.choice(["1", "2"]), "gate": f"A{rng.randrange(1, 60)}",
+                        "baggageBelt": str(rng.randrange(1, 20)), "quality": ["Basic", "Live"]},
+            "status": "Expected", "isCargo": False,
+            "aircraft": {"reg": f"D-A{rng.randrange(100, 999)}", "modeS": f"3C{rng.randrange(16**4):04X}", "model": model},
+        }
+        # Vuelo operador + 0–3 números comerciales del mismo vuelo físico
+        codeshares = rng.choices([0, 1, 2, 3], weights=[45, 25, 20, 10])[0]
+        for i in range(codeshares + 1):
+            airline = rng.choice(vocabulary["airline"])
+            code = airline[:2].upper()
+            items.append({
+                **leg,
+                "number": f"{code} {rng.randrange(10, 9999)}",
+                "callSign": f"{code}{rng.randrange(10, 9999)}" if i == 0 else None,
+                "codeshareStatus": "IsOperator" if i == 0 else "IsCodeshared",
+                "airline": {"name": airline, "iata": code, "icao": code + "X"},
+            })
+    return items[:n]
+
+
+def forecast_payload(city: str, start_utc: datetime, seed: int = 0) -> dict:
+    """Respuesta de /data/2.5/forecast: 40 franjas de 3 h."""
+    rng = random.Random(seed)
+    start = int(start_utc.replace(tzinfo=timezone.utc).timestamp()) // 10800 * 10800
+    entries = [{
+        "dt": start + 3 * 3600 * i,
+        "main": {"temp": round(rng.uniform(-5, 30), 2), "feels_like": 0, "pressure": 1013,
+                 "humidity": rng.randrange(30, 100)},
+        "weather": [{"id": 500, "main": rng.choice(["Rain", "Clouds", "Clear"]), "description": "", "icon": "10d"}],
+        "clouds": {"all": rng.randrange(100)},
+        "wind": {"speed": round(rng.uniform(0, 15), 2), "deg": rng.randrange(360)},
+        **({"rain": {"3h": round(rng.uniform(0, 5), 2)}} if rng.random() < 0.3 else {}),
+        "dt_txt": datetime.fromtimestamp(start + 3 * 3600 * i, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+    } for i in range(40)]
+    return {"cod": "200", "message": 0, "cnt": 40, "list": entries, "city": {"name": city}}
+
+
+class FixtureSet:
+    """Payloads de una escala: `scale`× el volumen diario de FRA.
+
+    La escala se reparte en aeropuertos (un día de FRA cada uno), igual que
+    crecería el recolector real, así que el tamaño de cada respuesta es el
+    de producción y lo que crece es el número de ventanas. Cada ventana usa
+    una de `VARIANTS` respuestas pregeneradas para no multiplicar la memoria.
+    """
+
+    def __init__(self, scale: int, day: datetime = datetime(2025, 10, 6), seed: int = 7):
+        self.scale = scale
+        self.day = day
+        self.airports = ["FRA"] + [f"X{i:02d}" for i in range(1, scale)]
+        per_window = FRA_ITEMS_PER_DAY // WINDOWS_PER_DAY
+        hours = 12 // WINDOWS_PER_DAY
+        vocabulary = recorded_vocabulary()
+        self.payloads = {}
+        for w in range(WINDOWS_PER_DAY):
+            start = day.replace(hour=6) + timedelta(hours=hours * w)  # 08:00 local = 06:00 UTC
+            for v in range(VARIANTS):
+                items = arrival_items(per_window, start, hours, seed * 100 + w * 10 + v, vocabulary)
+                self.payloads[(w, v)] = json.dumps({"arrivals": items}).encode("utf-8")
+        self.forecast = json.dumps(forecast_payload("Berlin", day)).encode("utf-8")
+        self._window_of = {start: w for w, (_, start, _) in enumerate(self.windows()[:WINDOWS_PER_DAY])}
+        self._variant_of = {a: i % VARIANTS for i, a in enumerate(self.airports)}
+
+    def windows(self) -> list:
+        """`(airport, inicio_local, fin_local)` de todas las ventanas de la escala."""
+        hours = 12 // WINDOWS_PER_DAY
+        local = self.day.replace(hour=8)
+        spans = [((local + timedelta(hours=hours * w)).strftime("%Y-%m-%dT%H:%M"),
+                  (local + timedelta(hours=hours * (w + 1))).strftime("%Y-%m-%dT%H:%M"))
+                 for w in range(WINDOWS_PER_DAY)]
+        return [(a, s, e) for a in self.airports for s, e in spans]
+
+    def arrivals_body(self, airport: str, start_local: str) -> bytes:
+        return self.payloads[(self._window_of[start_local], self._variant_of[airport])]
+
+    def save(self, directory) -> None:
+        """Graba las respuestas en disco (para inspeccionarlas o reutilizarlas)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for (w, v), body in self.payloads.items():
+            (directory / f"arrivals_w{w}_v{v}.json").write_bytes(body)
+        (directory / "forecast.json").write_bytes(self.forecast)
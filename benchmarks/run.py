@@ -0,0 +1,178 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Permite importar el paquete compartido `gans` desde la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from benchmarks.fixtures import FixtureSet
+from benchmarks.server import FixtureServer
+from gans.client import HttpClient
+from gans.codeshares import collapse_codeshares
+from gans.config import Settings
+from gans.db import dispose_engines, get_engine
+from gans.flights import DEDUP_SUBSET, PARAMS, airport_url, extract_arrivals, fetch_windows, to_flight_arrival
+from gans.loader import upsert
+from gans.weather import fetch_forecast, to_weather_data
+
+# ----------------------------------------------------------------------
+# BENCHMARK POR ETAPAS: extracción, normalización, dedup, ficheros y carga
+# ----------------------------------------------------------------------
+# Uso: python benchmarks/run.py --scales 1,10,100 --repeat 3 --output bench.json
+# Sin claves ni MySQL: las APIs las sirve un servidor local con fixtures y
+# la carga va a un SQLite temporal.
+
+API_KEY = "benchmark"
+
+
+def measure(fn, repeat: int, memory: bool) -> dict:
+    """Tiempo (mínimo y mediana de `repeat` ejecuciones) y pico de memoria de `fn()`."""
+    times, result = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - started)
+    stats = {"seconds_min": min(times), "seconds_median": statistics.median(times)}
+    if memory:
+        # Ejecución aparte: tracemalloc ralentiza y no debe contaminar los tiempos
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        stats["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return stats, result
+
+
+def _sqlite_engine(directory: Path):
+    path = Path(tempfile.mkdtemp(dir=directory)) / "gans.sqlite"
+    return get_engine(Settings(db_backend="sqlite", sqlite_path=str(path)))
+
+
+def run_scale(scale: int, repeat: int, memory: bool, workers: int, workdir: Path) -> list:
+    fixtures = FixtureSet(scale)
+    jobs = fixtures.windows()
+    results = []
+
+    def record(stage: str, fn, rows=None, **extra):
+        stats, out = measure(fn, repeat, memory)
+        n = rows(out) if callable(rows) else rows
+        results.append({"scale": scale, "stage": stage, "rows": n, **extra, **stats,
+                        "rows_per_second": n / stats["seconds_min"] if n and stats["seconds_min"] else None})
+        print(f"  {scale:>4}× {stage:<30} {stats['seconds_min'] * 1000:9.1f} ms"
+              + (f" {stats['peak_mib']:8.1f} MiB" if memory else "") + (f"  {n} filas" if n else ""),
+              file=sys.stderr)
+        return out
+
+    with FixtureServer(fixtures) as server:
+        client = HttpClient(cache=None)
+        host = server.base_url
+
+        # 1) Extracción: solo descarga (bytes) de todas las ventanas en paralelo
+        def extract():
+            def get(job):
+                airport, start, end = job
+                url = f"{airport_url(host, airport)}/{start}/{end}"
+                return airport, client.get(url, headers={"x-rapidapi-key": API_KEY}, params=PARAMS).content
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(get, jobs))
+        bodies = record("extract", extract, requests=len(jobs),
+                        bytes=sum(len(fixtures.arrivals_body(a, s)) for a, s, _ in jobs))
+
+        # 2) Normalización: JSON → DataFrame (extract_arrivals)
+        def normalize():
+            frames = [extract_arrivals(json.loads(body).get("arrivals", []), airport) for airport, body in bodies]
+            return pd.concat(frames, ignore_index=True)
+        df = record("normalize", normalize, rows=len)
+
+        # 2b) call_and_process_range de punta a punta (descarga + parseo), normal y en streaming
+        for stream in (False, True):
+            record("call_and_process_range" + ("_stream" if stream else ""),
+                   lambda: fetch_windows(jobs, host, API_KEY, max_workers=workers, client=client, stream=stream),
+                   rows=lambda res: sum(len(r.df) for r in res if r.ok and r.df is not None))
+
+        # 3) Deduplicación y agrupación de codeshares
+        deduped = record("dedup", lambda: df.drop_duplicates(subset=DEDUP_SUBSET, keep="last"), rows=len)
+        record("collapse_codeshares", lambda: collapse_codeshares(deduped)[0], rows=len)
+
+        # 4) Escritura de ficheros: almacén Parquet particionado y CSV para Excel
+        def write_store():
+            from gans.flights import arrivals_store
+            return arrivals_store(tempfile.mkdtemp(dir=workdir)).write(deduped)
+        record("file_write_parquet", write_store, rows=len(deduped))
+        record("file_write_csv", lambda: deduped.to_csv(Path(tempfile.mkdtemp(dir=workdir)) / "arrivals.csv",
+                                                        index=False, encoding="utf-8-sig"), rows=len(deduped))
+
+        # 5) Carga en base de datos (SQLite temporal, esquema creado por get_engine)
+        table = to_flight_arrival(deduped)
+        for method in ("insert", "executemany"):
+            record(f"db_load_{method}",
+                   lambda: upsert(_sqlite_engine(workdir), "flight_arrival", table, method=method),
+                   rows=len(table))
+
+        # 6) Clima: una petición por ciudad (tantas ciudades como la escala) y carga
+        cities = [(f"City{i:03d}", "DE") for i in range(scale)]
+        def weather_extract():
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                frames = pool.map(lambda c: fetch_forecast(c[0], c[1], API_KEY, client, url=server.forecast_url),
+                                  cities)
+                return pd.concat(list(frames), ignore_index=True)
+        weather = record("weather_extract_normalize", weather_extract, rows=len, requests=len(cities))
+        record("weather_db_load",
+               lambda: upsert(_sqlite_engine(workdir), "weather_data", to_weather_data(weather)),
+               rows=len(weather))
+
+        client.close()
+    dispose_engines()
+    return results
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline de gans.")
+    parser.add_argument("--scales", default="1,10,100", help="Múltiplos del volumen diario de FRA")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--no-memory", action="store_true", help="Omite la pasada con tracemalloc")
+    parser.add_argument("--output", help="Fichero JSON de resultados (por defecto, salida estándar)")
+    parser.add_argument("--save-fixtures", help="Graba las respuestas de la escala 1 en este directorio")
+    args = parser.parse_args(argv)
+
+    if args.save_fixtures:
+        FixtureSet(1).save(args.save_fixtures)
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "workers": args.workers,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="gans-bench-") as workdir:
+        for scale in (int(s) for s in args.scales.split(",") if s.strip()):
+            report["results"] += run_scale(scale, args.repeat, not args.no_memory, args.workers, Path(workdir))
+
+    text = json.dumps(report, indent=1)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
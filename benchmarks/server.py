@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# ----------------------------------------------------------------------
+# SERVIDOR HTTP LOCAL QUE SUSTITUYE A AERODATABOX Y OPENWEATHER
+# ----------------------------------------------------------------------
+
+
+class FixtureServer:
+    """Sirve un `FixtureSet` en 127.0.0.1 con las mismas rutas que las APIs reales.
+
+    - `/flights/airports/iata/<AEROPUERTO>/<inicio>/<fin>` → llegadas
+    - `/data/2.5/forecast` → pronóstico
+
+    Se usa como context manager; `base_url` se pasa como `host` de
+    AeroDataBox y `forecast_url` como URL del pronóstico.
+    """
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        fixtures_ref = fixtures
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como las APIs reales
+
+            def do_GET(self):
+                parts = urlsplit(self.path).path.strip("/").split("/")
+                try:
+                    if parts[:3] == ["flights", "airports", "iata"]:
+                        body = fixtures_ref.arrivals_body(parts[3], parts[4])
+                    elif parts == ["data", "2.5", "forecast"]:
+                        body = fixtures_ref.forecast
+                    else:
+                        raise KeyError(self.path)
+                except (KeyError, IndexError, ValueError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def forecast_url(self) -> str:
+        return f"{self.base_url}/data/2.5/forecast"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
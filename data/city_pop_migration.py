@@ -1,50 +1,40 @@
-import pandas as pd
-from sqlalchemy import create_engine
-import mysql.connector
+import sys
+from pathlib import Path
 
-# --- CONFIGURACIÓN DE ACCESO A MYSQL ---
-USER = 'root'
-PASSWORD = 'Federico01'  # Tu contraseña de root
-HOST = 'localhost'
-DATABASE = 'gans'
-# ----------------------------------------
+# Permite importar el paquete compartido `gans` desde la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from gans.cities import CityIndex
+from gans.db import get_engine
+from gans.loader import ensure_unique_key, upsert
+from gans.validation import validate
+
+# --- ACCESO A MYSQL: gans.ini o variables GANS_DB_* (ver gans.ini.example) ---
+# La ruta de worldcities.csv es `worldcities_path` en [paths] (o GANS_WORLDCITIES_PATH)
 
 # Define la ciudad de tu caso de estudio
 CITY_NAME = "Berlin" 
 COUNTRY_CODE = "DE" 
 
-try:
-    # 1. Cargar datos usando la RUTA COMPLETA (¡CORREGIDO!)
-    CSV_PATH = 'C:/Users/feder/Dropbox/PC/Downloads/worldcities.csv'
-    df_cities = pd.read_csv(CSV_PATH)
-
-    # 2. Filtrar y preparar la columna
-    df_filtered = df_cities[
-        (df_cities['city_ascii'] == CITY_NAME) & 
-        (df_cities['iso2'] == COUNTRY_CODE)
-    ].copy()
-
-    # Crea la columna municipality_iso_country: "Berlin,DE"
-    df_filtered['municipality_iso_country'] = df_filtered.apply(
-        lambda row: f"{row['city_ascii']},{row['iso2']}", axis=1
-    )
-
-    # Seleccionar columnas finales
-    df_final = df_filtered[[
-        'city_ascii', 'lat', 'lng', 'population', 'municipality_iso_country'
-    ]].rename(columns={'city_ascii': 'city'})
-
-
-    # 3. Conexión e Inserción a MySQL
-    engine = create_engine(f"mysql+mysqlconnector://{USER}:{PASSWORD}@{HOST}/{DATABASE}")
-    
-    df_final.to_sql(
-        name='city_pop',
-        con=engine,
-        if_exists='append',
-        index=False
-    )
-    print(f"✅ Datos de {CITY_NAME} insertados correctamente en la tabla city_pop.")
-
-except Exception as e:
-    print(f"❌ ERROR: Fallo al leer el archivo o conectar a MySQL: {e}")
\ No newline at end of file
+
+def main():
+    try:
+        # 1. y 2. Buscar la ciudad en el índice precalculado de worldcities.csv
+        #    (se construye la primera vez en data/.index/ y luego solo se mapea en memoria)
+        df_final = CityIndex.open().lookup([(CITY_NAME, COUNTRY_CODE)])
+        df_final = validate(df_final, 'city_pop')  # Coordenadas y clave "Ciudad,PAÍS" válidas
+
+        # 3. Conexión e Inserción a MySQL
+        engine = get_engine()
+
+        # Upsert sobre municipality_iso_country: repetir la carga no duplica la ciudad
+        ensure_unique_key(engine, 'city_pop')
+        upsert(engine, 'city_pop', df_final)
+        print(f"✅ Datos de {CITY_NAME} insertados o actualizados en la tabla city_pop.")
+
+    except Exception as e:
+        print(f"❌ ERROR: Fallo al leer el archivo o conectar a MySQL: {e}")
+
+
+if __name__ == "__main__":
+    main()
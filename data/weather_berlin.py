@@ -1,109 +1,80 @@
 import os
-import requests
-import pandas as pd
+import sys
 from pathlib import Path
 
-# === BIBLIOTECAS AÑADIDAS PARA LA MIGRACIÓN A MySQL ===
-from sqlalchemy import create_engine
-import mysql.connector 
-# ======================================================
-
-# --- CONFIGURACIÓN DE ACCESO A MYSQL (¡ADAPTAR!) ---
-MYSQL_USER = 'root'
-MYSQL_PASSWORD = 'Federico01'  # <<< ¡REEMPLAZAR CON TU NUEVA CONTRASEÑA!
-MYSQL_HOST = 'localhost'
-MYSQL_DATABASE = 'gans'
+# Permite importar el paquete compartido `gans` desde la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from gans.cities import tracked_cities
+from gans.ratelimit import TokenBucket
+from gans.weather import fetch_forecasts, to_weather_data
+from gans.db import get_engine
+from gans.loader import ensure_unique_key, upsert
+from gans.rollups import refresh
+from gans.validation import validate
+
+# --- ACCESO A MYSQL ---
+# Credenciales en gans.ini o variables GANS_DB_* (ver gans.ini.example);
+# con GANS_DB_BACKEND=sqlite se carga en una base local sin servidor.
+BATCH_SIZE = 1000  # Filas por INSERT multi-fila (una transacción por lote)
 # ----------------------------------------------------
 
-# 1) API key desde variable de entorno (limpia espacios/nuevas líneas)
-API_KEY = (os.getenv("OPENWEATHER_API_KEY") or "").strip()
-if not API_KEY:
-    raise RuntimeError("No se encontró la API key. Define OPENWEATHER_API_KEY en tu shell.")
-
-# 2) Ciudad y parámetros
-CITY = "Berlin"
-COUNTRY = "DE"
-URL = "https://api.openweathermap.org/data/2.5/forecast"
-params = {
-    "q": f"{CITY},{COUNTRY}",
-    "appid": API_KEY,
-    "units": "metric",
-    "lang": "es"
-}
-
-# 3) Petición
-resp = requests.get(URL, params=params, timeout=20)
-try:
-    data = resp.json()
-except Exception:
-    raise RuntimeError(f"No se pudo decodificar JSON. HTTP {resp.status_code}: {resp.text[:200]}")
-
-if resp.status_code != 200:
-    raise RuntimeError(f"Error {resp.status_code}: {data}")
-
-# 4) Parseo de datos → DataFrame (df_weather)
-rows = []
-for entry in data.get("list", []):
-    rows.append({
-        "time_utc": entry.get("dt_txt"),
-        "temperature": (entry.get("main") or {}).get("temp"),
-        "humidity": (entry.get("main") or {}).get("humidity"),
-        "weather_status": (entry.get("weather") or [{}])[0].get("main"),
-        "wind_speed": (entry.get("wind") or {}).get("speed"),
-        "rain_3h": (entry.get("rain") or {}).get("3h"),
-        "snow_3h": (entry.get("snow") or {}).get("3h")
-    })
-
-df_weather = pd.DataFrame(rows)
-
-# 4.1) Limpieza de tipos y conversión a UTC
-df_weather["time_utc"] = pd.to_datetime(df_weather["time_utc"], errors="coerce", utc=True)
-for c in ["temperature", "humidity", "wind_speed", "rain_3h", "snow_3h"]:
-    if c in df_weather.columns:
-        df_weather[c] = pd.to_numeric(df_weather[c], errors="coerce")
-
-# Limpieza adicional (ya no es clave para la deduplicación en CSV, pero es buena práctica)
-df_weather = df_weather.sort_values("time_utc").drop_duplicates(subset=["time_utc"], keep="last")
-
-# ----------------------------------------------------------------------
-# 5) MIGRACIÓN DIRECTA A MYSQL (REEMPLAZANDO LA LÓGICA DE GUARDADO EN CSV)
-# ----------------------------------------------------------------------
-
-# 1. Adaptar el DataFrame (df_weather) al esquema de la tabla weather_data
-df_weather['timestamp'] = df_weather['time_utc']
-df_weather['weather_description'] = df_weather['weather_status'] # Mapeo de status a description
-df_weather['city'] = CITY # Añadir el nombre de la ciudad
-
-# 2. Definir las columnas finales para insertar en la tabla weather_data
-COLUMNAS_MYSQL = [
-    'timestamp', 'temperature', 'humidity', 'wind_speed', 
-    'weather_description', 'city'
-]
-
-df_migracion = df_weather[[c for c in COLUMNAS_MYSQL if c in df_weather.columns]]
-
-# 3. Conexión e Inserción a MySQL
-try:
-    print(f"\n→ Conectando a MySQL para migrar a {MYSQL_DATABASE}.weather_data...")
-    # Usamos el usuario, contraseña y base de datos definidos al inicio
-    engine = create_engine(
-        f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}"
-    )
-    
-    df_migracion.to_sql(
-        name='weather_data',
-        con=engine,
-        if_exists='append', # Añade los nuevos registros a la tabla existente
-        index=False
-    )
-    print(f" Migración exitosa. {len(df_migracion)} registros insertados en weather_data.")
-
-except Exception as e:
-    print(f" Error al conectar o insertar en MySQL: {e}")
-    # En caso de error de conexión, el script no debe detenerse si estás en un Jupyter Notebook.
-
-# ----------------------------------------------------------------------
-# MOSTRAR LAS PRIMERAS FILAS EN LA CONSOLA (Para verificación)
-# ----------------------------------------------------------------------
-print("\n--- Vista Previa de los Datos Migrados ---\n")
-print(df_migracion.head(5).to_string(index=False))
\ No newline at end of file
+# Ciudades del pronóstico: todas las de la tabla city_pop (ver data/city_pop_migration.py);
+# si aún está vacía, solo Berlín
+DEFAULT_CITIES = [("Berlin", "DE")]
+MAX_WORKERS = 8           # Peticiones simultáneas a OpenWeather
+REQUESTS_PER_SECOND = 1   # Plan gratuito: 60 llamadas/minuto
+
+
+def main():
+    # 1) API key desde variable de entorno (limpia espacios/nuevas líneas)
+    api_key = (os.getenv("OPENWEATHER_API_KEY") or "").strip()
+    if not api_key:
+        raise RuntimeError("No se encontró la API key. Define OPENWEATHER_API_KEY en tu shell.")
+
+    # 2) a 4) Una petición por ciudad (por coordenadas, en paralelo) y un único DataFrame para todas
+    try:
+        cities = tracked_cities(get_engine())
+    except Exception as e:  # Sin base de datos se descarga igualmente el pronóstico por defecto
+        print(f" No se pudo leer city_pop ({e}); se usa {DEFAULT_CITIES}.")
+        cities = DEFAULT_CITIES
+    if len(cities) == 0:
+        cities = DEFAULT_CITIES
+    print(f"→ Pronóstico de {len(cities)} ciudades...")
+    df_weather = fetch_forecasts(cities, api_key, max_workers=MAX_WORKERS,
+                                 rate_limit=TokenBucket(REQUESTS_PER_SECOND))
+
+    # ----------------------------------------------------------------------
+    # 5) MIGRACIÓN DIRECTA A MYSQL
+    # ----------------------------------------------------------------------
+
+    # Esquema de weather_data (time_utc → timestamp, weather_status → weather_description)
+    df_migracion = to_weather_data(df_weather)
+
+    # Validación vectorizada: las filas inválidas van a data/quarantine/ y un lote
+    # con demasiadas se rechaza aquí, antes de conectar con MySQL (ValidationError)
+    df_migracion = validate(df_migracion, 'weather_data')
+
+    try:
+        engine = get_engine()  # Pool compartido (ver gans/db.py)
+        print(f"\n→ Conectando a {engine.url.database} para migrar a weather_data...")
+
+        # Upsert por lotes sobre la clave natural: un rerun actualiza en lugar de duplicar
+        ensure_unique_key(engine, 'weather_data')
+        n = upsert(engine, 'weather_data', df_migracion, batch_size=BATCH_SIZE)
+        # Agregados horarios/diarios: solo se recalculan las horas de este lote
+        refresh(engine, 'weather_data', df_migracion)
+        print(f" Migración exitosa. {n} registros cargados (insertados o actualizados) en weather_data.")
+
+    except Exception as e:
+        print(f" Error al conectar o insertar en MySQL: {e}")
+
+    # ----------------------------------------------------------------------
+    # MOSTRAR LAS PRIMERAS FILAS EN LA CONSOLA (Para verificación)
+    # ----------------------------------------------------------------------
+    print("\n--- Vista Previa de los Datos Migrados ---\n")
+    print(df_migracion.head(5).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,166 +1,125 @@
-import requests
-import json
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 from keys import flights_key, AERODATABOX_HOST # Clave y Host
+from gans.client import default_client
+from gans.codeshares import codeshares_store, collapse_codeshares
+from gans.flights import arrivals_store, fetch_arrivals, read_arrivals
 
 # ----------------------------------------------------------------------
 # 1) CONFIGURACIÓN Y RANGOS DE TIEMPO (FRANKFURT)
 # ----------------------------------------------------------------------
 
-AIRPORT_CODE = "FRA" # Código IATA de Fráncfort
-CODE_TYPE = "iata"
-AERODATABOX_URL = f"https://{AERODATABOX_HOST}/flights/airports/{CODE_TYPE}/{AIRPORT_CODE}"
+AIRPORTS = ["FRA"] # Códigos IATA a recopilar (Fráncfort); se pueden añadir más
 TIMEZONE = "Europe/Berlin"
 
-# Calcula la fecha de mañana para la consulta
-tomorrow = datetime.now() + timedelta(days=1)
-day_str = tomorrow.strftime("%Y-%m-%d")
+DAYS = 1 # Días a consultar a partir de mañana
 
-# Dividimos el rango total (08:00 a 20:00) en dos rangos de 6 horas
-TIME_RANGES = [
-    (f"{day_str}T08:00", f"{day_str}T14:00"), # Primer rango de 6 horas
-    (f"{day_str}T14:00", f"{day_str}T20:00"), # Segundo rango de 6 horas
-]
+# Rango horario local (08:00 a 20:00); el recolector lo parte en ventanas de ≤12 h
+START_HOUR, END_HOUR = 8, 20
 
-headers = {"x-rapidapi-host": AERODATABOX_HOST, "x-rapidapi-key": flights_key}
-params = {
-    "withLeg":"true", "direction":"Arrival", "withCancelled":"true",
-    "withCodeshared":"true", "withCargo":"false", "withPrivate":"false", "withLocation":"false"
-}
+# Concurrencia y cuota de RapidAPI (peticiones por segundo)
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 5
 
-# ----------------------------------------------------------------------
-# 2) FUNCIÓN DE EXTRACCIÓN Y LLAMADA A LA API
-# ----------------------------------------------------------------------
-
-def call_and_process_range(start_local: str, end_local: str) -> pd.DataFrame:
-    """Realiza una llamada a la API para un rango y devuelve un DataFrame limpio."""
-    url = f"{AERODATABOX_URL}/{start_local}/{end_local}"
-    print(f"→ Obteniendo datos de {AIRPORT_CODE}: {start_local} a {end_local}...")
-
-    # Petición a la API
-    resp = requests.get(url, headers=headers, params=params, timeout=25)
-    
-    try:
-        data = resp.json()
-    except Exception:
-        print(f"!! ERROR JSON. HTTP {resp.status_code}. Saltando este rango.")
-        return pd.DataFrame()
-
-    if resp.status_code != 200:
-        print(f"!! ERROR HTTP {resp.status_code}: {data.get('message', 'Error API desconocido')}. Saltando este rango.")
-        return pd.DataFrame()
-    
-    flights_data = data.get('arrivals', [])
-    if not flights_data:
-        print("-> No se encontraron vuelos en este rango.")
-        return pd.DataFrame()
-
-    #  Pedimos explícitamente 'utc' y 'local' 
-    df = pd.json_normalize(
-        flights_data,
-        sep='.',
-        meta=['number', ['airline', 'name'], ['aircraft', 'model'], 
-              ['departure', 'airport', 'name'], 
-              ['arrival', 'scheduledTime', 'utc'],   # <-- Pedido de la clave 'utc'
-              ['arrival', 'scheduledTime', 'local'] # <-- Pedido de la clave 'local'
-              ],
-        errors='ignore' 
-    )
-
-    # Renombrar columnas clave usando las rutas completas
-    df = df.rename(columns={
-        'arrival.scheduledTime.utc': 'scheduled_arrival_utc',       # <-- Columna final UTC
-        'arrival.scheduledTime.local': 'scheduled_arrival_frankfurt', # <-- Columna final local
-        'number': 'flight_number',
-        'departure.airport.name': 'from_airport_name',
-        'airline.name': 'airline',
-        'aircraft.model': 'aircraft_model'
-    })
-
-    # Seleccionamos solo las columnas relevantes
-    COLUMNS_TO_CHECK = ['scheduled_arrival_utc', 'scheduled_arrival_frankfurt', 'flight_number', 'from_airport_name', 'airline', 'aircraft_model']
-    df = df[[c for c in COLUMNS_TO_CHECK if c in df.columns]]
-    
-    # --------------------------------------------------------------------
-    # LIMPIEZA DE TIEMPO (USANDO LOS DATOS OBTENIDOS DIRECTAMENTE)
-    # --------------------------------------------------------------------
-    
-    # Intentamos convertir las columnas. Si no existen, Pandas simplemente les da NaT.
-    df["scheduled_arrival_utc"] = pd.to_datetime(df["scheduled_arrival_utc"], errors="coerce", utc=True)
-    
-    # La columna local ya viene con la zona horaria en el string de la API, solo la convertimos
-    df["scheduled_arrival_frankfurt"] = pd.to_datetime(df["scheduled_arrival_frankfurt"], errors="coerce")
-
-    # Eliminamos filas donde no hay tiempo UTC (vuelos incompletos)
-    df = df.dropna(subset=["scheduled_arrival_utc"])
-    
-    if df.empty:
-        print("-> No se encontraron datos de tiempo válidos después de la limpieza.")
-
-    return df
-
-# ----------------------------------------------------------------------
-# 3) EJECUCIÓN PRINCIPAL, COMBINACIÓN Y GUARDADO
-# ----------------------------------------------------------------------
-
-all_dfs = []
-for start, end in TIME_RANGES:
-    df_range = call_and_process_range(start, end)
-    if not df_range.empty:
-        all_dfs.append(df_range)
-
-if not all_dfs:
-    print("\nNo se pudieron obtener datos de vuelos. Terminando.")
-    exit()
+# Parseo incremental del JSON (memoria plana con miles de codeshares; sin caché HTTP)
+STREAM_JSON = False
 
-df = pd.concat(all_dfs, ignore_index=True)
+# Un registro por vuelo físico; los números comerciales van a data/flights/codeshares
+COLLAPSE_CODESHARES = False
 
-# ----------------------------------------------------------------------
-# 4) DEDUPLICACIÓN Y GUARDADO FINAL
-# ----------------------------------------------------------------------
-
-DEDUP_SUBSET = ["scheduled_arrival_utc", "flight_number"]
-final_cols = [
-    "scheduled_arrival_utc", "scheduled_arrival_frankfurt", "flight_number",
-    "from_airport_name", "airline", "aircraft_model"
-]
-
-out_dir = Path("data/flights")
-out_dir.mkdir(parents=True, exist_ok=True)
-out_csv = out_dir / "frankfurt_arrivals_tomorrow_divided.csv" 
-
-# Lógica de deduplicación con archivos antiguos
-if out_csv.exists():
-    old = pd.read_csv(out_csv, parse_dates=["scheduled_arrival_utc", "scheduled_arrival_frankfurt"])
-    df = pd.concat([old, df], ignore_index=True)
-
-df = df.sort_values("scheduled_arrival_utc").drop_duplicates(
-    subset=DEDUP_SUBSET, keep="last"
-)
+# Copia CSV para Excel: cada ejecución añade solo sus filas al final (coste de la ejecución,
+# no del histórico). Con True se reescribe entera desde el almacén, deduplicada (lee todo el histórico)
+EXCEL_FULL_EXPORT = False
+EXCEL_COLUMNS = ["scheduled_arrival_utc", "scheduled_arrival_frankfurt", "flight_number",
+                 "from_airport_name", "airline", "aircraft_model"]
 
-df = df[[c for c in final_cols if c in df.columns]]
-df.to_csv(out_csv, index=False, encoding="utf-8-sig") # Guardado robusto
 
+def main():
+    # ----------------------------------------------------------------------
+    # 2) Y 3) EXTRACCIÓN CONCURRENTE DE TODAS LAS VENTANAS
+    # ----------------------------------------------------------------------
 
-print(f"\nDatos guardados y deduplicados en: {out_csv.resolve()}")
-print(f"Total de registros finales: {len(df)}")
+    # Calcula la fecha de mañana para la consulta
+    tomorrow = datetime.now() + timedelta(days=1)
 
-# ----------------------------------------------------------------------
-# MOSTRAR LAS PRIMERAS FILAS EN LA CONSOLA
-# ----------------------------------------------------------------------
-
-display_cols = [
-    "flight_number", 
-    "from_airport_name", 
-    "airline", 
-    "aircraft_model",
-    "scheduled_arrival_utc", 
-    "scheduled_arrival_frankfurt" 
-]
-
-df_display = df[[c for c in display_cols if c in df.columns]]
+    df = fetch_arrivals(
+        AIRPORTS, tomorrow.date(), DAYS, AERODATABOX_HOST, flights_key,
+        start_hour=START_HOUR, end_hour=END_HOUR,
+        max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+        stream=STREAM_JSON
+    )
 
-print("\n--- Vista Previa de los Vuelos Recopilados ---\n")
-print(df_display.head(10).to_string(index=False))
\ No newline at end of file
+    if df.empty:
+        print("\nNo se pudieron obtener datos de vuelos. Terminando.")
+        return
+
+    # ----------------------------------------------------------------------
+    # 4) DEDUPLICACIÓN Y GUARDADO FINAL
+    # ----------------------------------------------------------------------
+
+    store = arrivals_store() # Parquet en data/flights/arrivals/date=AAAA-MM-DD/airport_iata=FRA/
+    legacy_csv = Path("data/flights") / "frankfurt_arrivals_tomorrow_divided.csv"
+
+    # La primera vez se importa el CSV histórico al almacén particionado
+    if not store.partitions() and legacy_csv.exists():
+        old = pd.read_csv(legacy_csv, encoding="utf-8-sig").dropna(how="all")
+        old = old.rename(columns={"scheduled_arrival_frankfurt": "scheduled_arrival_local"})
+        old["scheduled_arrival_utc"] = pd.to_datetime(old["scheduled_arrival_utc"], errors="coerce", utc=True)
+        if "airport_iata" not in old.columns:
+            old["airport_iata"] = "FRA"
+        store.write(old)
+
+    if COLLAPSE_CODESHARES:
+        rows_before = len(df)
+        df, codeshares = collapse_codeshares(df)
+        codeshares_store().write(codeshares)
+        print(f"Codeshares agrupados: {rows_before} filas → {len(df)} vuelos operadores")
+
+    # Solo se leen/escriben las particiones (día UTC, aeropuerto) de este lote;
+    # si una clave (scheduled_arrival_utc, flight_number) ya existía, gana la nueva
+    summary = store.write(df)
+
+    # Copia CSV (UTF-8 con BOM) para abrirla en Excel; se sigue actualizando el CSV de siempre
+    excel_csv = legacy_csv
+    excel = read_arrivals(airports=AIRPORTS) if EXCEL_FULL_EXPORT else df
+    excel = excel.sort_values("scheduled_arrival_utc", kind="stable")
+    excel = excel.rename(columns={"scheduled_arrival_local": "scheduled_arrival_frankfurt"})  # Cabecera de siempre
+    excel = excel.reindex(columns=EXCEL_COLUMNS)
+    if EXCEL_FULL_EXPORT or not excel_csv.exists():
+        excel.to_csv(excel_csv, index=False, encoding="utf-8-sig")
+    else:
+        # El BOM solo va al principio del fichero
+        excel.to_csv(excel_csv, mode="a", header=False, index=False, encoding="utf-8")
+
+    print(f"\nDatos guardados y deduplicados en: {store.root.resolve()}")
+    print(f"Copia para Excel: {excel_csv.resolve()} "
+          f"({len(excel)} filas {'exportadas' if EXCEL_FULL_EXPORT else 'añadidas'})")
+    print(f"Registros de esta ejecución: {len(df)} "
+          f"(particiones anexadas: {summary['appended']}, reescritas: {summary['rewritten']})")
+
+    # Resumen de red por host (peticiones, reintentos, bytes y latencia)
+    for host, stats in default_client().stats().items():
+        print(f"HTTP {host}: {stats}")
+
+    # ----------------------------------------------------------------------
+    # MOSTRAR LAS PRIMERAS FILAS EN LA CONSOLA
+    # ----------------------------------------------------------------------
+
+    display_cols = [
+        "flight_number", 
+        "from_airport_name", 
+        "airline", 
+        "aircraft_model",
+        "scheduled_arrival_utc", 
+        "scheduled_arrival_local" 
+    ]
+
+    df_display = df[[c for c in display_cols if c in df.columns]]
+
+    print("\n--- Vista Previa de los Vuelos Recopilados ---\n")
+    print(df_display.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
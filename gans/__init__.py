@@ -0,0 +1 @@
+"""Utilidades compartidas para los recolectores de vuelos y clima (esquema gans)."""
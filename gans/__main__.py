@@ -0,0 +1,6 @@
+import sys
+
+from gans.cli import main
+
+# python -m gans {fetch-flights,fetch-weather,load-cities,...}
+sys.exit(main())
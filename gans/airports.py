@@ -0,0 +1,186 @@
+import re
+import zoneinfo
+from importlib import resources
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from gans.config import load_settings
+from gans.geo import SphereIndex, haversine_km
+
+# ----------------------------------------------------------------------
+# AEROPUERTOS CERCANOS A CADA CIUDAD (OurAirports → tabla airport)
+# ----------------------------------------------------------------------
+
+# Columnas de https://ourairports.com/data/airports.csv que se usan
+OURAIRPORTS_COLUMNS = ["type", "name", "latitude_deg", "longitude_deg", "scheduled_service",
+                       "iata_code", "icao_code", "gps_code"]
+AIRPORT_TYPES = ("large_airport", "medium_airport")
+AIRPORT_COLUMNS = ["airport_iata", "airport_icao", "airport_name", "municipality_iso_country", "lat", "lng"]
+DEFAULT_RADIUS_KM = 75
+
+
+def load_airports(path=None, types: tuple = AIRPORT_TYPES, scheduled_only: bool = True) -> pd.DataFrame:
+    """Aeropuertos con código IATA del fichero de referencia (`airports_path` de la configuración)."""
+    path = path or load_settings().airports_path
+    header = pd.read_csv(path, nrows=0).columns
+    df = pd.read_csv(path, usecols=[c for c in OURAIRPORTS_COLUMNS if c in header],
+                     keep_default_na=False, na_values=[""])
+    mask = df["type"].isin(types) & df["iata_code"].notna()
+    if scheduled_only:
+        mask &= df["scheduled_service"].eq("yes")
+    df = df[mask]
+    # Las versiones antiguas del fichero solo traen gps_code
+    icao = df["icao_code"] if "icao_code" in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+    if "gps_code" in df.columns:
+        icao = icao.fillna(df["gps_code"])
+    return pd.DataFrame({
+        "airport_iata": df["iata_code"].str.upper(),
+        "airport_icao": icao,
+        "airport_name": df["name"],
+        "lat": df["latitude_deg"].astype(float),
+        "lng": df["longitude_deg"].astype(float),
+    }).drop_duplicates("airport_iata").reset_index(drop=True)
+
+
+def nearest_airports(cities: pd.DataFrame, airports: pd.DataFrame,
+                     radius_km: float = DEFAULT_RADIUS_KM) -> pd.DataFrame:
+    """Pares (ciudad, aeropuerto) a menos de `radius_km`, con `distance_km`.
+
+    `cities` necesita `municipality_iso_country`, `lat` y `lng` (filas de
+    city_pop). Todas las ciudades se consultan de una vez contra un único
+    índice espacial de los aeropuertos.
+    """
+    if cities.empty or airports.empty:
+        return pd.DataFrame(columns=["municipality_iso_country", *airports.columns, "distance_km"])
+    index = SphereIndex(airports["lat"].to_numpy(), airports["lng"].to_numpy())
+    found = index.within(cities["lat"].to_numpy(), cities["lng"].to_numpy(), radius_km)
+
+    city_pos = np.repeat(np.arange(len(cities)), [len(f) for f in found])
+    airport_pos = np.concatenate(found).astype(np.intp) if found else np.empty(0, dtype=np.intp)
+    pairs = airports.iloc[airport_pos].reset_index(drop=True)
+    pairs.insert(0, "municipality_iso_country", cities["municipality_iso_country"].to_numpy()[city_pos])
+    pairs["distance_km"] = haversine_km(cities["lat"].to_numpy()[city_pos], cities["lng"].to_numpy()[city_pos],
+                                        pairs["lat"], pairs["lng"])
+    return pairs.sort_values(["municipality_iso_country", "distance_km"], kind="stable").reset_index(drop=True)
+
+
+def to_airport_rows(pairs: pd.DataFrame) -> pd.DataFrame:
+    """Filas de la tabla airport: cada aeropuerto queda asignado a su ciudad más cercana."""
+    rows = pairs.sort_values("distance_km", kind="stable").drop_duplicates("airport_iata")
+    return rows[AIRPORT_COLUMNS].sort_values("airport_iata").reset_index(drop=True)
+
+
+def resolve_airports(engine, radius_km: float = DEFAULT_RADIUS_KM, path=None) -> pd.DataFrame:
+    """Resuelve los aeropuertos de todas las ciudades de city_pop y los carga en airport."""
+    from gans.loader import upsert
+
+    cities = pd.read_sql(text("SELECT municipality_iso_country, lat, lng FROM city_pop"), engine)
+    cities = cities.dropna(subset=["lat", "lng"])
+    pairs = nearest_airports(cities, load_airports(path), radius_km)
+    rows = to_airport_rows(pairs)
+    # airport_iata es la clave primaria de airport: no hace falta índice UNIQUE adicional
+    upsert(engine, "airport", rows)
+    return pairs
+
+
+def tracked_airports(engine) -> list:
+    """Códigos IATA de la tabla airport (los que el recolector de vuelos debe consultar)."""
+    with engine.connect() as conn:
+        return [r[0] for r in conn.execute(text("SELECT airport_iata FROM airport ORDER BY airport_iata"))]
+
+
+# ----------------------------------------------------------------------
+# ZONA HORARIA DE CADA AEROPUERTO (OurAirports + zone.tab de la tz database)
+# ----------------------------------------------------------------------
+# AeroDataBox interpreta las ventanas en hora local del aeropuerto. OurAirports
+# no trae la zona, así que se toma la zona de zone1970.tab del mismo país cuya
+# ciudad de referencia está más cerca (exacto en países de una sola zona).
+
+ZONE_TABLES = ("zone1970.tab", "zone.tab")
+
+# Aeropuertos por defecto y hubs habituales: no necesitan airports.csv
+KNOWN_TIMEZONES = {
+    "FRA": "Europe/Berlin", "BER": "Europe/Berlin", "MUC": "Europe/Berlin", "HAM": "Europe/Berlin",
+    "DUS": "Europe/Berlin", "CGN": "Europe/Berlin", "STR": "Europe/Berlin",
+}
+_COORD = re.compile(r"([+-])(\d{2})(\d{2})(\d{2})?([+-])(\d{3})(\d{2})(\d{2})?")
+
+
+def _zone_table_text() -> str:
+    for name in ZONE_TABLES:
+        for directory in zoneinfo.TZPATH:
+            path = Path(directory) / name
+            if path.exists():
+                return path.read_text(encoding="utf-8")
+        try:  # En Windows las zonas vienen del paquete tzdata
+            return resources.files("tzdata.zoneinfo").joinpath(name).read_text(encoding="utf-8")
+        except (ModuleNotFoundError, FileNotFoundError):
+            continue
+    raise FileNotFoundError("No se encontró zone.tab de la tz database (instala el paquete tzdata).")
+
+
+def _degrees(sign: str, deg: str, minutes: str, seconds: str) -> float:
+    value = int(deg) + int(minutes) / 60 + int(seconds or 0) / 3600
+    return -value if sign == "-" else value
+
+
+def zone_table() -> pd.DataFrame:
+    """Zonas de la tz database con su país y la posición de su ciudad de referencia.
+
+    En zone1970.tab una zona puede listar varios países; `primary` marca el
+    primero (Europe/Zurich es la zona de CH, aunque Büsingen, en DE, la use).
+    """
+    rows = []
+    for line in _zone_table_text().splitlines():
+        if not line or line.startswith("#"):
+            continue
+        countries, coords, zone = line.split("\t")[:3]
+        m = _COORD.fullmatch(coords)
+        lat, lng = _degrees(*m.group(1, 2, 3, 4)), _degrees(*m.group(5, 6, 7, 8))
+        rows.extend((country, zone, lat, lng, i == 0) for i, country in enumerate(countries.split(",")))
+    return pd.DataFrame(rows, columns=["iso_country", "timezone", "lat", "lng", "primary"])
+
+
+def airport_timezones(codes: list, path=None) -> dict:
+    """`{IATA: zona IANA}` de `codes`: `KNOWN_TIMEZONES` y, para el resto, el fichero de OurAirports.
+
+    Lanza `ValueError` con los códigos que no están en el fichero: mejor no
+    arrancar que pedir ventanas desplazadas por el huso horario. En países
+    con varias zonas (US, BR, AU, ...) la más cercana es solo una estimación
+    y se avisa para que se compruebe.
+    """
+    codes = [c.upper() for c in codes]
+    known = {c: KNOWN_TIMEZONES[c] for c in codes if c in KNOWN_TIMEZONES}
+    codes = [c for c in codes if c not in known]
+    if not codes:
+        return known
+    path = path or load_settings().airports_path
+    header = pd.read_csv(path, nrows=0).columns
+    df = pd.read_csv(path, usecols=[c for c in ("iata_code", "iso_country", "latitude_deg", "longitude_deg")
+                                    if c in header],
+                     keep_default_na=False, na_values=[""])
+    df = df[df["iata_code"].str.upper().isin(codes)].drop_duplicates("iata_code")
+    zones = zone_table()
+
+    found = {}
+    for row in df.itertuples(index=False):
+        candidates = zones[zones["iso_country"] == row.iso_country]
+        if candidates["primary"].any():
+            candidates = candidates[candidates["primary"]]
+        if candidates.empty:
+            continue
+        distance = haversine_km(row.latitude_deg, row.longitude_deg, candidates["lat"], candidates["lng"])
+        code, zone = row.iata_code.upper(), candidates["timezone"].iloc[int(np.argmin(distance))]
+        if candidates["timezone"].nunique() > 1:
+            print(f"!! {code}: {row.iso_country} tiene {candidates['timezone'].nunique()} zonas horarias; "
+                  f"se usa {zone}, la de la ciudad de referencia más cercana. "
+                  f"Compruébala o fíjala con --timezones {code}=Zona/IANA")
+        found[code] = zone
+    missing = [c for c in codes if c not in found]
+    if missing:
+        raise ValueError(f"Zona horaria desconocida para {', '.join(missing)} (no están en {path}); "
+                         "indícala con --timezones IATA=Zona/IANA")
+    return {**known, **found}
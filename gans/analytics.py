@@ -0,0 +1,99 @@
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# JOIN "AS-OF": CADA LLEGADA CON SU FRANJA DE PRONÓSTICO
+# ----------------------------------------------------------------------
+
+DEFAULT_TOLERANCE = "3h"  # El pronóstico de OpenWeather va en franjas de 3 h
+
+
+def _utc(values: pd.Series) -> pd.Series:
+    # merge_asof exige la misma resolución en ambas claves (Parquet trae µs, el CSV ns)
+    return pd.to_datetime(values, utc=True).astype("datetime64[ns, UTC]")
+
+
+def asof_join(arrivals: pd.DataFrame, forecast: pd.DataFrame, by: str = None,
+              airport_city: dict = None, left_on: str = "scheduled_arrival_utc",
+              right_on: str = "time_utc", tolerance=DEFAULT_TOLERANCE,
+              direction: str = "backward", suffix: str = "_forecast") -> pd.DataFrame:
+    """Une cada llegada con la franja del pronóstico más cercana en el tiempo.
+
+    - `direction="backward"` toma la última franja que empieza antes (o en) la
+      llegada; `"forward"` la siguiente y `"nearest"` la más próxima.
+    - `tolerance` descarta emparejamientos más lejanos (la llegada queda con NaN).
+    - `by` empareja solo dentro del mismo grupo (p. ej. `"city"`). Con
+      `airport_city={"FRA": "Frankfurt", ...}` se deriva `city` a partir de
+      `airport_iata` y se usa como `by`.
+
+    Ambos lados se ordenan una vez y el emparejamiento es el de
+    `pd.merge_asof` (búsqueda binaria sobre arrays ordenados), sin producto
+    cruzado. El orden de salida es el de `left_on`.
+    """
+    left = arrivals.copy()
+    right = forecast.copy()
+    if airport_city is not None:
+        left["city"] = left["airport_iata"].astype(str).map(airport_city)
+        by = by or "city"
+    if right.empty:
+        # Un pronóstico vacío puede llegar sin columnas: se añaden las claves y se conservan las demás
+        right = right.reindex(columns=list(dict.fromkeys([right_on, *([by] if by else []), *right.columns])))
+    left[left_on] = _utc(left[left_on])
+    right[right_on] = _utc(right[right_on])
+    if by is not None:
+        # Las columnas de partición llegan como category: se comparan como texto
+        left[by] = left[by].astype(object)
+        right[by] = right[by].astype(object)
+
+    left = left.dropna(subset=[left_on]).sort_values(left_on, kind="stable")
+    right = right.dropna(subset=[right_on]).sort_values(right_on, kind="stable")
+    return pd.merge_asof(
+        left, right, left_on=left_on, right_on=right_on, by=by,
+        tolerance=pd.Timedelta(tolerance) if tolerance is not None else None,
+        direction=direction, suffixes=("", suffix),
+    ).reset_index(drop=True)
+
+
+def asof_join_chunked(arrival_chunks, load_forecast, tolerance=DEFAULT_TOLERANCE, **kwargs):
+    """Versión por trozos de `asof_join` para históricos que no caben en memoria.
+
+    `arrival_chunks` es un iterable de DataFrames de llegadas (p. ej. un día
+    cada uno) y `load_forecast(start, end)` devuelve el pronóstico de ese
+    intervalo UTC. Para cada trozo solo se carga el pronóstico que puede
+    emparejar: [mín − tolerancia, máx + tolerancia]. Genera un DataFrame unido
+    por trozo.
+    """
+    left_on = kwargs.get("left_on", "scheduled_arrival_utc")
+    margin = pd.Timedelta(tolerance) if tolerance is not None else pd.Timedelta(days=1)
+    for chunk in arrival_chunks:
+        if chunk.empty:
+            continue
+        times = _utc(chunk[left_on])
+        forecast = load_forecast(times.min() - margin, times.max() + margin)
+        yield asof_join(chunk, forecast, tolerance=tolerance, **kwargs)
+
+
+def join_arrivals_weather(start, end, airport_city: dict, tolerance=DEFAULT_TOLERANCE,
+                          direction: str = "backward", chunk_days: int = 1):
+    """Llegadas del almacén Parquet unidas a su pronóstico, `chunk_days` días UTC por vez.
+
+    Ejemplo: `pd.concat(join_arrivals_weather("2025-10-01", "2025-12-31", {"FRA": "Frankfurt"}))`.
+    """
+    from gans.flights import read_arrivals
+    from gans.weather import read_forecast
+
+    airports = sorted(airport_city)
+    cities = sorted(set(airport_city.values()))
+    last = pd.Timestamp(end).normalize()
+    days = pd.date_range(pd.Timestamp(start).normalize(), last, freq=f"{chunk_days}D")
+    # El último trozo se recorta a `end` aunque no complete sus `chunk_days` días
+    chunks = (read_arrivals(day, min(day + pd.Timedelta(days=chunk_days - 1), last), airports) for day in days)
+
+    def load_forecast(lo, hi):
+        df = read_forecast(lo.date(), hi.date(), cities)
+        if df.empty:
+            return df
+        times = _utc(df["time_utc"])
+        return df[(times >= lo) & (times <= hi)]
+
+    return asof_join_chunked(chunks, load_forecast, tolerance=tolerance, airport_city=airport_city,
+                             direction=direction)
@@ -0,0 +1,190 @@
+import json
+import multiprocessing
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from gans.codeshares import codeshares_store, collapse_codeshares
+from gans.flights import STORE_ROOT, arrivals_store, call_and_process_range, day_windows
+from gans.metrics import metrics
+from gans.ratelimit import SharedTokenBucket
+
+# ----------------------------------------------------------------------
+# BACKFILL HISTÓRICO CON UN POOL DE PROCESOS Y MANIFIESTO REANUDABLE
+# ----------------------------------------------------------------------
+# Unidad de trabajo: (aeropuerto, día local) → sus ventanas de ≤ 12 h. Cada
+# proceso descarga, parsea y escribe sus particiones; la cuota de la API se
+# comparte entre todos con un `SharedTokenBucket`.
+
+MANIFEST_PATH = "data/.state/backfill_manifest.jsonl"
+PARTITION_LOCKS = 32  # Locks repartidos por hash de la ruta de la partición
+
+
+class Manifest:
+    """Registro JSONL de ventanas terminadas: `{"airport", "start", "end", "rows", "at"}` por línea.
+
+    Solo escribe el proceso padre. Una ventana que está en el manifiesto ya
+    está en el almacén, así que al relanzar el mismo backfill se salta.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+
+    def done(self) -> set:
+        """`(airport, start, end)` de todas las ventanas completadas."""
+        if not self.path.exists():
+            return set()
+        done = set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:  # Última línea a medias tras una caída
+                    continue
+                done.add((entry["airport"], entry["start"], entry["end"]))
+        return done
+
+    def record(self, windows: list) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps({**w, "at": at}) + "\n" for w in windows)
+
+
+# --- lado del worker (estado por proceso, fijado por el initializer) ---
+
+_worker = {}
+
+
+def _init_worker(host: str, key: str, store_root: str, fmt: str, rate_limit, locks: list, stream: bool,
+                 collapse: bool) -> None:
+    from gans.cache import ResponseCache
+    from gans.client import HttpClient
+    metrics.reset()  # Con fork el worker hereda lo que ya hubiera acumulado el padre
+    _worker.update(host=host, key=key, rate_limit=rate_limit, locks=locks, stream=stream,
+                   store=arrivals_store(store_root, fmt), client=HttpClient(cache=ResponseCache.from_env()),
+                   codeshares=codeshares_store(Path(store_root).parent / "codeshares", fmt) if collapse else None)
+
+
+def _partition_lock(rel: str):
+    locks = _worker["locks"]
+    return locks[zlib.crc32(rel.encode("utf-8")) % len(locks)]
+
+
+def _run_unit(airport: str, windows: list) -> tuple:
+    """Descarga las ventanas de un (aeropuerto, día) y escribe sus particiones.
+
+    Devuelve `(resultados por ventana, métricas del worker desde la unidad anterior)`.
+    """
+    results, frames = [], []
+    for start, end in windows:
+        _worker["rate_limit"].acquire()
+        try:
+            df = call_and_process_range(airport, start, end, _worker["host"], _worker["key"],
+                                        _worker["client"], stream=_worker["stream"])
+        except Exception as e:
+            results.append({"airport": airport, "start": start, "end": end, "error": str(e)})
+            continue
+        results.append({"airport": airport, "start": start, "end": end, "rows": len(df)})
+        if not df.empty:
+            frames.append(df)
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+        if _worker["codeshares"] is not None:
+            # La unidad trae ventanas completas: cada vuelo físico llega con todos sus números
+            df, codeshares = collapse_codeshares(df)
+            _worker["codeshares"].write(codeshares, partition_lock=_partition_lock)
+        # Un día local cae en dos días UTC: la partición vecina puede estar escribiéndola otro proceso
+        _worker["store"].write(df, partition_lock=_partition_lock)
+    return results, metrics.drain()
+
+
+# --- lado del padre ---
+
+def plan(airports: list, first_day: date, last_day: date, start_hour: int = 0, end_hour: int = 24,
+         done: set = frozenset()) -> list:
+    """`(airport, [(start, end), ...])` por aeropuerto y día, sin las ventanas ya hechas."""
+    days = (last_day - first_day).days + 1
+    units = []
+    for offset in range(days):
+        windows = day_windows(first_day + timedelta(days=offset), 1, start_hour, end_hour)
+        for airport in airports:
+            pending = [w for w in windows if (airport, *w) not in done]
+            if pending:
+                units.append((airport, pending))
+    return units
+
+
+def _quota_exhausted(result: dict) -> bool:
+    return "HTTP 429" in (result.get("error") or "")
+
+
+def backfill(airports: list, first_day: date, last_day: date, host: str, key: str,
+             processes: int = 4, requests_per_second: float = 5, start_hour: int = 0, end_hour: int = 24,
+             store_root=STORE_ROOT, fmt: str = "parquet", manifest=MANIFEST_PATH, stream: bool = False,
+             collapse_codeshares: bool = False) -> dict:
+    """Descarga las llegadas de `airports` entre los días locales `first_day` y `last_day` (incluidos).
+
+    Las ventanas completadas se anotan en `manifest` a medida que terminan,
+    así que tras una caída o un corte de cuota basta con relanzar la misma
+    llamada. Si una ventana agota la cuota (429 tras los reintentos) no se
+    envían más unidades y las ya enviadas terminan.
+
+    Con `collapse_codeshares=True` el almacén guarda un registro por vuelo
+    operador y los números comerciales van a `<store_root>/../codeshares`.
+    """
+    manifest = Manifest(manifest)
+    units = plan(airports, first_day, last_day, start_hour, end_hour, manifest.done())
+    summary = {"units": len(units), "windows": sum(len(w) for _, w in units), "done": 0, "failed": 0,
+               "rows": 0, "quota_exhausted": False}
+    if not units:
+        return summary
+
+    context = multiprocessing.get_context()
+    rate_limit = SharedTokenBucket(requests_per_second, context=context)
+    locks = [context.Lock() for _ in range(PARTITION_LOCKS)]
+    initargs = (host, key, str(store_root), fmt, rate_limit, locks, stream, collapse_codeshares)
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                             initializer=_init_worker, initargs=initargs) as pool:
+        queued = iter(units)
+        running = {}
+
+        def submit_more():
+            # Solo unas pocas unidades por proceso en cola, para poder parar a tiempo
+            for unit in queued:
+                running[pool.submit(_run_unit, *unit)] = unit
+                if len(running) >= 2 * processes:
+                    break
+
+        submit_more()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                airport, windows = running.pop(future)
+                try:
+                    results, worker_metrics = future.result()
+                    metrics.merge(worker_metrics)  # Los tramos http/parse/store_write de los workers
+                except Exception as e:  # Fallo al escribir o worker caído: la unidad se repetirá
+                    error = f"{type(e).__name__}: {e}"
+                    results = [{"airport": airport, "start": start, "end": end, "error": error}
+                               for start, end in windows]
+                ok = [r for r in results if "error" not in r]
+                manifest.record(ok)
+                summary["done"] += len(ok)
+                summary["rows"] += sum(r["rows"] for r in ok)
+                for r in results:
+                    if "error" in r:
+                        summary["failed"] += 1
+                        summary["quota_exhausted"] |= _quota_exhausted(r)
+                        print(f"!! Ventana perdida {r['airport']} {r['start']} a {r['end']}: {r['error']}")
+            if not summary["quota_exhausted"]:
+                submit_more()
+            print(f"backfill: {summary['done']}/{summary['windows']} ventanas, {summary['rows']} filas")
+
+    if summary["quota_exhausted"]:
+        print("!! Cuota de la API agotada: relanza el mismo comando para continuar desde el manifiesto.")
+    return summary
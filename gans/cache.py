@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# ----------------------------------------------------------------------
+# CACHÉ DE RESPUESTAS HTTP EN DISCO
+# ----------------------------------------------------------------------
+
+# TTL en segundos por host (el pronóstico cambia cada 3 h, el FIDS cada pocos minutos)
+DEFAULT_TTLS = {
+    "api.openweathermap.org": 600,
+    "aerodatabox.p.rapidapi.com": 900,
+}
+DEFAULT_TTL = 300
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Parámetros que no forman parte de la clave ni se guardan (credenciales)
+SECRET_PARAMS = {"appid", "apikey", "api_key", "key"}
+
+# Cabeceras que se guardan junto al cuerpo
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CacheMiss(LookupError):
+    """En modo offline (solo replay) no hay respuesta grabada para la petición."""
+
+
+class ResponseCache:
+    """Caché direccionada por contenido: clave = sha256(URL + parámetros).
+
+    Cada entrada son dos ficheros: el cuerpo comprimido (`.body.gz`) y sus
+    metadatos (`.json`). Las entradas vencidas se revalidan con
+    `If-None-Match`/`If-Modified-Since` si la API envió `ETag`/`Last-Modified`.
+    El tamaño total se limita a `max_bytes` expulsando las entradas usadas
+    hace más tiempo (LRU por fecha de acceso). Con `offline=True` nunca se sale
+    a la red: se devuelve lo grabado aunque esté vencido, o `CacheMiss`.
+    """
+
+    def __init__(self, directory, ttls: dict = None, default_ttl: int = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._total_bytes = sum(p.stat().st_size for p in self.directory.glob("*/*.body.gz"))
+
+    @classmethod
+    def from_env(cls):
+        """Caché según `GANS_HTTP_CACHE` (directorio u `off`) y `GANS_HTTP_OFFLINE=1`."""
+        directory = os.getenv("GANS_HTTP_CACHE", ".cache/http")
+        if directory.lower() in ("", "0", "off", "false"):
+            return None
+        offline = os.getenv("GANS_HTTP_OFFLINE", "").lower() in ("1", "true", "yes")
+        return cls(directory, offline=offline)
+
+    # --- claves y rutas ---
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        public = sorted((k, str(v)) for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS)
+        return hashlib.sha256(f"{url}?{urlencode(public)}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        folder = self.directory / key[:2]
+        return folder / f"{key}.body.gz", folder / f"{key}.json"
+
+    def ttl_for(self, url: str) -> int:
+        return self.ttls.get(urlsplit(url).hostname or "", self.default_ttl)
+
+    # --- lectura ---
+
+    def lookup(self, url: str, params: dict = None):
+        """Metadatos de la entrada (con su clave) o None si no existe."""
+        key = self.key(url, params)
+        body_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not body_path.exists():
+            return None
+        meta["key"] = key
+        return meta
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["stored_at"] < self.ttl_for(entry["url"])
+
+    @staticmethod
+    def validators(entry: dict) -> dict:
+        """Cabeceras condicionales para revalidar una entrada vencida."""
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def response(self, entry: dict) -> requests.Response:
+        """Reconstruye un `requests.Response` a partir de la entrada guardada."""
+        body_path, _ = self._paths(entry["key"])
+        with gzip.open(body_path, "rb") as f:
+            body = f.read()
+        os.utime(body_path)  # Marca de uso para el LRU
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.url = entry["url"]
+        resp.encoding = entry.get("encoding")
+        resp._content = body
+        resp.from_cache = True
+        return resp
+
+    # --- escritura ---
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def store(self, url: str, params: dict, resp: requests.Response) -> None:
+        key = self.key(url, params)
+        body_path, meta_path = self._paths(key)
+        body = gzip.compress(resp.content)
+        meta = {
+            "url": url,
+            "status": resp.status_code,
+            "encoding": resp.encoding,
+            "headers": {h: resp.headers[h] for h in KEPT_HEADERS if h in resp.headers},
+            "stored_at": time.time(),
+        }
+        with self._lock:
+            old_size = body_path.stat().st_size if body_path.exists() else 0
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            self._total_bytes += len(body) - old_size
+            self._evict()
+
+    def mark_revalidated(self, entry: dict) -> None:
+        """La API respondió 304: la entrada vuelve a estar fresca."""
+        _, meta_path = self._paths(entry["key"])
+        entry["stored_at"] = time.time()
+        meta = {k: v for k, v in entry.items() if k != "key"}
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _evict(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        bodies = sorted(self.directory.glob("*/*.body.gz"), key=lambda p: p.stat().st_mtime)
+        for body_path in bodies:
+            if self._total_bytes <= self.max_bytes:
+                break
+            size = body_path.stat().st_size
+            meta_path = body_path.with_name(body_path.name.replace(".body.gz", ".json"))
+            body_path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            self._total_bytes -= size
@@ -0,0 +1,169 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from gans.config import load_settings
+
+# ----------------------------------------------------------------------
+# CIUDADES (worldcities.csv → tabla city_pop)
+# ----------------------------------------------------------------------
+
+WORLDCITIES_COLUMNS = ["city_ascii", "iso2", "lat", "lng", "population"]
+CITY_POP_COLUMNS = ["city", "lat", "lng", "population", "municipality_iso_country"]
+INDEX_DIR = "data/.index/worldcities"
+KEY_SEP = ","
+
+
+def load_worldcities(path=None) -> pd.DataFrame:
+    """Lee solo las columnas necesarias del CSV (ruta por defecto: `worldcities_path` de la configuración)."""
+    path = path or load_settings().worldcities_path
+    return pd.read_csv(path, usecols=WORLDCITIES_COLUMNS)
+
+
+def city_keys(cities, countries) -> np.ndarray:
+    """Claves "ciudad,ISO2" (p. ej. "Berlin,DE") construidas de una vez para todo el lote."""
+    return (pd.Series(cities, dtype=str).str.cat(pd.Series(countries, dtype=str).values, sep=KEY_SEP)
+            .to_numpy(dtype=str))
+
+
+def filter_cities(df_cities: pd.DataFrame, cities: list) -> pd.DataFrame:
+    """Filas de `cities` = [(city_ascii, iso2), ...] listas para la tabla city_pop."""
+    wanted = pd.MultiIndex.from_tuples(cities, names=["city_ascii", "iso2"])
+    mask = pd.MultiIndex.from_frame(df_cities[["city_ascii", "iso2"]]).isin(wanted)
+    df = df_cities[mask].copy()
+
+    # municipality_iso_country: "Berlin,DE"
+    df["municipality_iso_country"] = df["city_ascii"].str.cat(df["iso2"], sep=KEY_SEP)
+    return df.rename(columns={"city_ascii": "city"})[CITY_POP_COLUMNS].reset_index(drop=True)
+
+
+def tracked_cities(engine) -> pd.DataFrame:
+    """Ciudades de la tabla city_pop (las que siguen el clima y los aeropuertos)."""
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT {', '.join(CITY_POP_COLUMNS)} FROM city_pop ORDER BY city_id")).all()
+    return pd.DataFrame(rows, columns=CITY_POP_COLUMNS)
+
+
+# ----------------------------------------------------------------------
+# ÍNDICE PRECALCULADO (arrays .npy mapeados en memoria)
+# ----------------------------------------------------------------------
+
+class CityIndex:
+    """Índice de worldcities.csv por (city_ascii, iso2) con búsqueda espacial por lat/lng.
+
+    `build()` parsea el CSV una sola vez y guarda en `directory` arrays numpy
+    ordenados por clave (`keys.npy`, `city.npy`, `iso2.npy`, `lat.npy`,
+    `lng.npy`, `population.npy`). Al abrirlo se mapean con `mmap_mode="r"`:
+    no se relee el CSV y solo se cargan las páginas que se consultan. Las
+    búsquedas por lote son un `searchsorted` sobre las claves.
+
+    Si una clave se repite (p. ej. varias "Springfield,US") gana la ciudad
+    más poblada.
+    """
+
+    FILES = ("keys", "city", "iso2", "lat", "lng", "population")
+
+    def __init__(self, directory=INDEX_DIR):
+        self.directory = Path(directory)
+        for name in self.FILES:
+            setattr(self, name, np.load(self.directory / f"{name}.npy", mmap_mode="r"))
+        self._spatial = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def _source_meta(csv_path) -> dict:
+        stat = os.stat(csv_path)
+        return {"source": str(Path(csv_path).resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    @classmethod
+    def build(cls, csv_path=None, directory=INDEX_DIR) -> "CityIndex":
+        csv_path = csv_path or load_settings().worldcities_path
+        df = load_worldcities(csv_path).dropna(subset=["city_ascii", "iso2"])
+        df["key"] = city_keys(df["city_ascii"], df["iso2"])
+        df = df.sort_values(["key", "population"], ascending=[True, False], kind="stable")
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "keys": df["key"].to_numpy(dtype=str),
+            "city": df["city_ascii"].to_numpy(dtype=str),
+            "iso2": df["iso2"].to_numpy(dtype=str),
+            "lat": df["lat"].to_numpy(dtype=float),
+            "lng": df["lng"].to_numpy(dtype=float),
+            "population": df["population"].to_numpy(dtype=float),
+        }
+        for name, values in arrays.items():
+            np.save(directory / f"{name}.npy", values)
+        (directory / "meta.json").write_text(json.dumps(cls._source_meta(csv_path)), encoding="utf-8")
+        return cls(directory)
+
+    @classmethod
+    def open(cls, csv_path=None, directory=INDEX_DIR, build: bool = True) -> "CityIndex":
+        """Abre el índice; lo (re)construye si falta o si el CSV cambió desde la última vez.
+
+        Con `build=False` no escribe nada: si el índice falta o está
+        desactualizado lanza `FileNotFoundError`.
+        """
+        csv_path = csv_path or load_settings().worldcities_path
+        meta_path = Path(directory) / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        if meta != cls._source_meta(csv_path):
+            if not build:
+                raise FileNotFoundError(f"El índice de {csv_path} en {directory} falta o está desactualizado")
+            return cls.build(csv_path, directory)
+        return cls(directory)
+
+    # --- búsqueda por nombre ---
+
+    def positions(self, cities: list) -> np.ndarray:
+        """Posición en el índice de cada (city_ascii, iso2); -1 si no existe."""
+        if not cities:
+            return np.empty(0, dtype=np.intp)
+        names, countries = zip(*cities)
+        wanted = city_keys(names, countries)
+        pos = np.searchsorted(self.keys, wanted)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == wanted[found]
+        return np.where(found, pos, -1)
+
+    def rows(self, positions) -> pd.DataFrame:
+        """Filas del índice (columnas de city_pop) en las posiciones dadas."""
+        positions = np.asarray(positions, dtype=np.intp)
+        return pd.DataFrame({
+            "city": self.city[positions],
+            "lat": self.lat[positions],
+            "lng": self.lng[positions],
+            "population": self.population[positions],
+            "municipality_iso_country": self.keys[positions],
+        }, columns=CITY_POP_COLUMNS)
+
+    def lookup(self, cities: list) -> pd.DataFrame:
+        """Filas de city_pop para todas las ciudades encontradas de `cities` = [(city_ascii, iso2), ...]."""
+        pos = self.positions(cities)
+        return self.rows(pos[pos >= 0])
+
+    # --- búsqueda espacial ---
+
+    @property
+    def spatial(self):
+        if self._spatial is None:
+            from gans.geo import SphereIndex
+            self._spatial = SphereIndex(self.lat, self.lng)
+        return self._spatial
+
+    def nearest(self, lat, lng, k: int = 1) -> pd.DataFrame:
+        """Las `k` ciudades más cercanas a cada punto, con `query` (nº de consulta) y `distance_km`."""
+        dist, idx = self.spatial.nearest(lat, lng, k)
+        df = self.rows(idx.ravel())
+        df.insert(0, "query", np.repeat(np.arange(idx.shape[0]), idx.shape[1]))
+        df["distance_km"] = dist.ravel()
+        return df
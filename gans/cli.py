@@ -0,0 +1,285 @@
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from gans.config import MissingCredentials, flights_credentials, openweather_key
+
+# ----------------------------------------------------------------------
+# LÍNEA DE COMANDOS: gans {fetch-flights,fetch-weather,load-cities,...}
+# ----------------------------------------------------------------------
+# Este módulo solo importa la biblioteca estándar y gans.config: pandas,
+# requests, SQLAlchemy y el conector de MySQL se importan dentro de cada
+# subcomando, y las claves se leen solo en los que llaman a una API. Así
+# `gans --help` arranca en milisegundos y `--dry-run` funciona sin keys.py.
+
+_STARTED = time.perf_counter()
+
+COLLAPSE_HELP = ("Un registro por vuelo operador (flight_arrival solo guarda operadores); "
+                 "los números comerciales van a data/flights/codeshares")
+
+
+class Timings:
+    """Fases cronometradas de una invocación (se imprimen con `--timings` o `GANS_TIMINGS=1`)."""
+
+    def __init__(self):
+        self.phases = {"startup": time.perf_counter() - _STARTED}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def report(self) -> str:
+        total = time.perf_counter() - _STARTED
+        parts = [f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items()]
+        return f"tiempos: {', '.join(parts)}, total {total * 1000:.0f} ms"
+
+
+def city_pairs(value: str) -> list:
+    """Tipo de argparse: `Berlin:DE,Paris:FR` → `[("Berlin", "DE"), ("Paris", "FR")]`."""
+    pairs = []
+    for item in (c.strip() for c in value.split(",")):
+        if not item:
+            continue
+        city, sep, country = (part.strip() for part in item.partition(":"))
+        if not sep or not city or not country:
+            raise argparse.ArgumentTypeError(f"{item!r} no tiene el formato Ciudad:PAÍS")
+        pairs.append((city, country.upper()))
+    if not pairs:
+        raise argparse.ArgumentTypeError("no se indicó ninguna ciudad")
+    return pairs
+
+
+def cities_or_tracked(value: str):
+    """Como `city_pairs`, pero admite también `tracked` (las ciudades de city_pop)."""
+    return "tracked" if value.strip().lower() == "tracked" else city_pairs(value)
+
+
+def airport_codes(value: str) -> list:
+    """Lista IATA de `--airports`; `tracked` = todos los de la tabla airport (ver `gans.airports`)."""
+    if value.strip().lower() == "tracked":
+        from gans.airports import tracked_airports
+        from gans.db import get_engine
+        return tracked_airports(get_engine())
+    return [a.strip().upper() for a in value.split(",") if a.strip()]
+
+
+def _engine():
+    from gans.db import get_engine
+    return get_engine()
+
+
+def _finish(args, pipeline, timings: Timings) -> None:
+    """Ejecuta el pipeline de un fetch-* e imprime estadísticas HTTP y métricas."""
+    from gans.client import default_client
+    from gans.jobs import run
+    from gans.metrics import metrics
+    with timings.phase("run"):
+        run(pipeline)
+    for host, stats in default_client().stats().items():
+        print(f"HTTP {host}: {stats}")
+    metrics.flush()
+    if args.metrics:
+        print(metrics.report())
+
+
+# --- subcomandos ---
+
+def fetch_flights(args, timings: Timings) -> None:
+    from datetime import date, datetime, timedelta
+
+    from gans.windows import day_windows
+    first_day = (datetime.strptime(args.date, "%Y-%m-%d").date() if args.date
+                 else date.today() + timedelta(days=1))
+    airports = airport_codes(args.airports)
+    if args.dry_run:
+        windows = day_windows(first_day, args.days, args.start_hour, args.end_hour)
+        print(f"{len(airports) * len(windows)} ventanas: {', '.join(airports)} × {windows}")
+        return
+
+    with timings.phase("imports"):
+        from gans.codeshares import codeshares_store
+        from gans.flights import arrivals_store
+        from gans.jobs import flights_pipeline
+
+    host, key = flights_credentials()
+    pipeline = flights_pipeline(
+        airports, first_day, args.days, host, key,
+        start_hour=args.start_hour, end_hour=args.end_hour, max_workers=args.workers,
+        requests_per_second=args.rps, store=None if args.no_store else arrivals_store(),
+        engine=_engine() if args.db else None, stream=args.stream, drop_codeshared=args.drop_codeshared,
+        collapse_codeshares=args.collapse_codeshares,
+        codeshare_store=None if args.no_store or not args.collapse_codeshares else codeshares_store(),
+    )
+    _finish(args, pipeline, timings)
+
+
+def fetch_weather(args, timings: Timings) -> None:
+    with timings.phase("imports"):
+        from gans.forecasts import ForecastArchive
+        from gans.jobs import weather_pipeline
+        from gans.weather import forecast_store
+
+    if args.cities == "tracked":
+        from gans.cities import tracked_cities
+        cities = tracked_cities(_engine())
+    else:
+        cities = args.cities
+    if args.dry_run:
+        print(f"{len(cities)} ciudades")
+        return
+
+    pipeline = weather_pipeline(cities, openweather_key(), max_workers=args.workers,
+                                requests_per_second=args.rps,
+                                store=None if args.no_store else forecast_store(),
+                                engine=_engine() if args.db else None,
+                                archive=ForecastArchive() if args.archive else None)
+    _finish(args, pipeline, timings)
+
+
+def load_cities(args, timings: Timings) -> None:
+    if args.dry_run:
+        from gans.cities import CityIndex, filter_cities, load_worldcities
+        try:
+            found = CityIndex.open(args.csv, build=False).lookup(args.cities)
+        except FileNotFoundError as e:
+            # Sin escribir el índice: se busca directamente en el CSV
+            print(f"{e}; se construirá en la carga real.")
+            found = filter_cities(load_worldcities(args.csv), args.cities)
+        print(found.to_string(index=False))
+        return
+
+    with timings.phase("imports"):
+        from gans.jobs import load_cities as load
+    n = load(args.cities, _engine(), args.csv)
+    print(f"{n} ciudades insertadas o actualizadas en city_pop.")
+
+
+def resolve_airports(args, timings: Timings) -> None:
+    with timings.phase("imports"):
+        from gans.airports import resolve_airports as resolve
+
+    pairs = resolve(_engine(), args.radius_km, args.csv)
+    for city, group in pairs.groupby("municipality_iso_country"):
+        found = ", ".join(f"{a} ({d:.0f} km)" for a, d in zip(group["airport_iata"], group["distance_km"]))
+        print(f"{city}: {found}")
+
+
+def backfill(args, timings: Timings) -> None:
+    from datetime import datetime
+    with timings.phase("imports"):
+        from gans.backfill import MANIFEST_PATH, backfill as run_backfill, plan
+
+    first_day = datetime.strptime(args.first_day, "%Y-%m-%d").date()
+    last_day = datetime.strptime(args.last_day, "%Y-%m-%d").date()
+    airports = airport_codes(args.airports)
+    manifest = args.manifest or MANIFEST_PATH
+    if args.dry_run:
+        from gans.backfill import Manifest
+        units = plan(airports, first_day, last_day, args.start_hour, args.end_hour, Manifest(manifest).done())
+        print(f"{len(units)} unidades, {sum(len(w) for _, w in units)} ventanas pendientes")
+        return
+
+    host, key = flights_credentials()
+    with timings.phase("run"):
+        summary = run_backfill(airports, first_day, last_day, host, key, processes=args.processes,
+                               requests_per_second=args.rps, start_hour=args.start_hour,
+                               end_hour=args.end_hour, manifest=manifest,
+                               collapse_codeshares=args.collapse_codeshares)
+    print(summary)
+    from gans.metrics import metrics
+    metrics.flush()
+    if args.metrics:
+        print(metrics.report())
+
+
+# --- argumentos ---
+
+def build_parser(prog: str = "gans") -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description="Recolectores y cargas ETL de gans.")
+    parser.add_argument("--db", action="store_true", help="Carga en la base de datos (gans.ini / GANS_DB_*)")
+    parser.add_argument("--no-store", action="store_true", help="No escribe el almacén Parquet local")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Imprime los tramos y contadores de gans.metrics al terminar")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Muestra qué se haría sin claves, sin llamar a las APIs y sin escribir nada "
+                             "(con `tracked` sí lee la base de datos)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Imprime en stderr el tiempo de arranque, imports y ejecución")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="COMANDO")
+
+    airports_help = "Códigos IATA separados por comas, o `tracked` para los de la tabla airport"
+    cities_help = "Ciudad:PAÍS separados por comas"
+
+    fl = sub.add_parser("fetch-flights", aliases=["flights"], help="Llegadas de AeroDataBox")
+    fl.add_argument("--airports", default="FRA", help=airports_help)
+    fl.add_argument("--date", help="Primer día local (AAAA-MM-DD); por defecto mañana")
+    fl.add_argument("--days", type=int, default=1)
+    fl.add_argument("--start-hour", type=int, default=8)
+    fl.add_argument("--end-hour", type=int, default=20)
+    fl.add_argument("--workers", type=int, default=8)
+    fl.add_argument("--rps", type=float, default=5, help="Peticiones por segundo (cuota de RapidAPI)")
+    fl.add_argument("--drop-codeshared", action="store_true",
+                    help="Descarta los números comerciales (IsCodeshared) al extraer")
+    fl.add_argument("--stream", action="store_true",
+                    help="Parsea cada respuesta en lotes según llega y los pasa ya a las etapas siguientes")
+    fl.add_argument("--collapse-codeshares", action="store_true",
+                    help=COLLAPSE_HELP + " (con --stream, lote a lote)")
+    fl.set_defaults(handler=fetch_flights)
+
+    we = sub.add_parser("fetch-weather", aliases=["weather"], help="Pronóstico de OpenWeather")
+    we.add_argument("--cities", type=cities_or_tracked, default="Berlin:DE",
+                    help=cities_help + ", o `tracked` para las de la tabla city_pop")
+    we.add_argument("--workers", type=int, default=8, help="Peticiones simultáneas")
+    we.add_argument("--rps", type=float, default=1, help="Peticiones por segundo (60/min en el plan gratuito)")
+    we.add_argument("--archive", action="store_true",
+                    help="Guarda además cada emisión en el histórico versionado (gans/forecasts.py)")
+    we.set_defaults(handler=fetch_weather)
+
+    ci = sub.add_parser("load-cities", aliases=["cities"], help="Ciudades de worldcities.csv → city_pop")
+    ci.add_argument("--cities", type=city_pairs, default="Berlin:DE", help=cities_help)
+    ci.add_argument("--csv", help="Ruta de worldcities.csv (por defecto, la de la configuración)")
+    ci.set_defaults(handler=load_cities)
+
+    ap = sub.add_parser("resolve-airports", aliases=["airports"],
+                        help="Aeropuertos cercanos a las ciudades de city_pop → airport")
+    ap.add_argument("--radius-km", type=float, default=75)
+    ap.add_argument("--csv", help="Ruta de airports.csv de OurAirports (por defecto, la de la configuración)")
+    ap.set_defaults(handler=resolve_airports)
+
+    bf = sub.add_parser("backfill", help="Llegadas históricas de un rango de días con un pool de procesos")
+    bf.add_argument("--from", dest="first_day", required=True, help="Primer día local (AAAA-MM-DD)")
+    bf.add_argument("--to", dest="last_day", required=True, help="Último día local, incluido (AAAA-MM-DD)")
+    bf.add_argument("--airports", default="FRA", help=airports_help)
+    bf.add_argument("--start-hour", type=int, default=0)
+    bf.add_argument("--end-hour", type=int, default=24)
+    bf.add_argument("--processes", type=int, default=4)
+    bf.add_argument("--rps", type=float, default=5, help="Peticiones por segundo entre todos los procesos")
+    bf.add_argument("--collapse-codeshares", action="store_true", help=COLLAPSE_HELP)
+    bf.add_argument("--manifest", help="Manifiesto de ventanas terminadas (por defecto data/.state/)")
+    bf.set_defaults(handler=backfill)
+    return parser
+
+
+def main(argv: list = None, prog: str = "gans") -> int:
+    args = build_parser(prog).parse_args(argv)
+    timings = Timings()
+    show = args.timings or os.getenv("GANS_TIMINGS", "").lower() in ("1", "true", "yes")
+    try:
+        args.handler(args, timings)
+    except MissingCredentials as e:
+        print(f"!! {e}", file=sys.stderr)
+        return 2
+    finally:
+        if show:
+            print(timings.report(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gans.cache import CacheMiss, ResponseCache
+from gans.metrics import count, span
+
+# ----------------------------------------------------------------------
+# CLIENTE HTTP COMPARTIDO (OpenWeather y AeroDataBox)
+# ----------------------------------------------------------------------
+
+# Timeouts por host en segundos (conexión, lectura)
+DEFAULT_TIMEOUTS = {
+    "api.openweathermap.org": (5, 20),
+    "aerodatabox.p.rapidapi.com": (5, 25),
+}
+DEFAULT_TIMEOUT = (5, 30)
+
+# Códigos que vale la pena reintentar: cuota (429) y errores del servidor
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class HostStats:
+    """Contadores acumulados por host."""
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    revalidated: int = 0
+    bytes: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def as_dict(self) -> dict:
+        avg = self.latency_total / self.requests if self.requests else 0.0
+        return {
+            "requests": self.requests, "retries": self.retries, "errors": self.errors,
+            "cache_hits": self.cache_hits, "revalidated": self.revalidated, "bytes": self.bytes, "latency_total_s": round(self.latency_total, 4),
+            "latency_avg_s": round(avg, 4), "latency_max_s": round(self.latency_max, 4),
+        }
+
+
+def parse_retry_after(value: str):
+    """Segundos indicados por `Retry-After` (entero o fecha HTTP), o None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class HttpClient:
+    """Sesión con pool keep-alive, reintentos con backoff y métricas por host.
+
+    Se reintentan los errores de conexión, los timeouts y las respuestas
+    429/5xx con backoff exponencial con jitter. Si el servidor envía
+    `Retry-After` se respeta ese tiempo. Cuando se agotan los intentos se
+    devuelve la última respuesta (o se relanza la última excepción de red).
+
+    Con `cache` (ver `gans.cache.ResponseCache`) las respuestas 200 se guardan
+    en disco y se reutilizan mientras estén frescas; las peticiones con
+    `stream=True` no pasan por la caché.
+    """
+
+    def __init__(self, timeouts: dict = None, max_retries: int = 4, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, pool_size: int = 16, cache: ResponseCache = None):
+        self.cache = cache
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, host: str):
+        return self.timeouts.get(host, DEFAULT_TIMEOUT)
+
+    def _record(self, host: str, **deltas) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(host, HostStats())
+            for name, value in deltas.items():
+                if name == "latency":
+                    stats.latency_total += value
+                    stats.latency_max = max(stats.latency_max, value)
+                else:
+                    setattr(stats, name, getattr(stats, name) + value)
+        # Los mismos contadores (salvo la latencia, que va en el tramo http_request) en gans.metrics
+        for name, value in deltas.items():
+            if name not in ("latency", "requests"):
+                count(f"http_{name}", value, host=host)
+
+    def _backoff(self, attempt: int, resp: requests.Response = None) -> float:
+        if resp is not None:
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        # "Full jitter": espera aleatoria entre 0 y el tope exponencial
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, params: dict = None, headers: dict = None, **kwargs) -> requests.Response:
+        host = urlsplit(url).hostname or ""
+        if self.cache is None or kwargs.get("stream"):
+            return self._send(host, url, params, headers, **kwargs)
+
+        entry = self.cache.lookup(url, params)
+        if entry is not None and (self.cache.offline or self.cache.is_fresh(entry)):
+            self._record(host, cache_hits=1)
+            return self.cache.response(entry)
+        if self.cache.offline:
+            raise CacheMiss(f"Sin respuesta grabada para {url}")
+
+        if entry is not None:
+            headers = {**(headers or {}), **self.cache.validators(entry)}
+        resp = self._send(host, url, params, headers, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            self.cache.mark_revalidated(entry)
+            self._record(host, revalidated=1)
+            return self.cache.response(entry)
+        if resp.status_code == 200:
+            self.cache.store(url, params, resp)
+        return resp
+
+    def _send(self, host: str, url: str, params: dict, headers: dict, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout_for(host))
+
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                with span("http_request", host=host) as s:
+                    s.set(url=url, attempt=attempt)
+                    resp = self.session.get(url, params=params, headers=headers, **kwargs)
+                    s.set(status=resp.status_code)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(host, requests=1, errors=1, latency=time.perf_counter() - started)
+                if attempt == self.max_retries:
+                    raise
+                self._record(host, retries=1)
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if kwargs.get("stream"):
+                self._count_streamed(host, resp)
+                size = 0
+            else:
+                size = len(resp.content)
+            self._record(host, requests=1, bytes=size, latency=time.perf_counter() - started)
+            if resp.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                if resp.status_code >= 400:
+                    self._record(host, errors=1)
+                return resp
+
+            self._record(host, retries=1)
+            resp.close()  # Devuelve la conexión al pool antes de reintentar
+            time.sleep(self._backoff(attempt, resp))
+
+    def _count_streamed(self, host: str, resp: requests.Response) -> None:
+        """Con `stream=True` el cuerpo aún no se ha leído: los bytes se cuentan al consumirlo.
+
+        `iter_lines` y `content` también pasan por `iter_content`.
+        """
+        iter_content = resp.iter_content
+
+        def counted(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                self._record(host, bytes=len(chunk))
+                yield chunk
+        resp.iter_content = counted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {host: s.as_dict() for host, s in self._stats.items()}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Cliente compartido por todo el proceso (se crea la primera vez que se pide).
+
+    La caché en disco se configura con `GANS_HTTP_CACHE` y `GANS_HTTP_OFFLINE`.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient(cache=ResponseCache.from_env())
+        return _default_client
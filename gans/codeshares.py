@@ -0,0 +1,155 @@
+import pandas as pd
+
+from gans.store import PartitionedStore
+
+# ----------------------------------------------------------------------
+# CODESHARES: UN REGISTRO POR VUELO FÍSICO
+# ----------------------------------------------------------------------
+# AeroDataBox repite la misma llegada con cada número comercial (UA 9044,
+# SN 7066, NH 5407, ...). Un vuelo físico se identifica por aeropuerto, hora
+# programada, origen y avión.
+
+FLIGHT_KEY = ["airport_iata", "scheduled_arrival_utc", "from_airport_name", "aircraft_model"]
+
+# Cadenas muy repetidas que se guardan internadas (dtype category)
+INTERNED_COLUMNS = ["airport_iata", "from_airport_name", "airline", "aircraft_model", "codeshare_status"]
+
+CODESHARE_COLUMNS = ["airport_iata", "scheduled_arrival_utc", "operating_flight_number",
+                     "marketing_flight_number", "marketing_airline"]
+STORE_ROOT = "data/flights/codeshares"
+
+
+def compact_arrivals(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte aerolínea, aeropuertos, avión y estado a `category`.
+
+    Cada cadena distinta se guarda una sola vez y las filas solo llevan un
+    código entero, lo que reduce mucho la memoria en hubs como FRA.
+    """
+    df = df.copy()
+    for col in INTERNED_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def collapse_codeshares(df: pd.DataFrame) -> tuple:
+    """Agrupa los codeshares en un único registro por vuelo operador.
+
+    Devuelve `(operating, codeshares)`:
+
+    - `operating`: una fila por vuelo físico (la marcada como `IsOperator` si
+      existe, si no la primera) con `codeshare_count` = números comerciales
+      que comparten el vuelo (incluido el propio);
+    - `codeshares`: tabla lateral con cada número comercial y el número
+      operador al que pertenece.
+    """
+    if df.empty:
+        return df.assign(codeshare_count=pd.Series(dtype="int32")), pd.DataFrame(columns=CODESHARE_COLUMNS)
+
+    df = compact_arrivals(df)
+    if "codeshare_status" in df.columns:
+        rank = (df["codeshare_status"].astype(object) != "IsOperator").astype("int8")
+    else:
+        rank = pd.Series(0, index=df.index, dtype="int8")
+    ordered = df.assign(_rank=rank).sort_values(FLIGHT_KEY + ["_rank"], kind="stable")
+
+    group_id = ordered.groupby(FLIGHT_KEY, dropna=False, sort=False, observed=True).ngroup()
+    is_operating = ~group_id.duplicated()
+    sizes = group_id.map(group_id.value_counts())
+
+    operating = ordered[is_operating].drop(columns="_rank")
+    operating["codeshare_count"] = sizes[is_operating].astype("int32")
+
+    operating_number = group_id.map(
+        pd.Series(ordered.loc[is_operating, "flight_number"].to_numpy(), index=group_id[is_operating].to_numpy())
+    )
+    marketing = ordered[~is_operating]
+    codeshares = pd.DataFrame({
+        "airport_iata": marketing["airport_iata"],
+        "scheduled_arrival_utc": marketing["scheduled_arrival_utc"],
+        "operating_flight_number": operating_number[~is_operating],
+        "marketing_flight_number": marketing["flight_number"],
+        "marketing_airline": marketing["airline"],
+    }, columns=CODESHARE_COLUMNS)
+
+    return operating.reset_index(drop=True), codeshares.reset_index(drop=True)
+
+
+def _flight_keys(df: pd.DataFrame) -> pd.Series:
+    keys = df[FLIGHT_KEY[0]].astype(str)
+    for col in FLIGHT_KEY[1:]:
+        keys = keys.str.cat(df[col].astype(str), sep="\x1f")
+    return keys
+
+
+def collapse_batches(batches):
+    """`collapse_codeshares` lote a lote sobre una ventana leída en streaming.
+
+    `batches` son los DataFrames de `gans.flights.iter_arrival_batches`; se
+    devuelve `(operating, codeshares)` por lote. AeroDataBox lista seguidos
+    los números de un mismo vuelo físico, que comparten hora programada, así
+    que solo el final de un lote puede continuar en el siguiente: las filas
+    con la última hora del lote se retienen y se agrupan con el lote
+    siguiente. Si aun así un vuelo ya emitido reaparece, sus filas van a la
+    tabla lateral con el número operador ya emitido (su `codeshare_count` no
+    se corrige).
+    """
+    emitted = {}  # clave del vuelo físico → número operador ya emitido
+    carry = None
+    for batch in batches:
+        if carry is not None and not carry.empty:
+            batch = pd.concat([carry, batch], ignore_index=True)
+        if batch.empty:
+            continue
+        tail = batch["scheduled_arrival_utc"] == batch["scheduled_arrival_utc"].iloc[-1]
+        carry, ready = batch[tail], batch[~tail]
+        if not ready.empty:
+            yield _collapse_new(ready, emitted)
+    if carry is not None and not carry.empty:
+        yield _collapse_new(carry, emitted)
+
+
+def _collapse_new(df: pd.DataFrame, emitted: dict) -> tuple:
+    operating, codeshares = collapse_codeshares(df)
+    keys = _flight_keys(operating)
+    previous = keys.map(emitted)
+    repeated = previous.notna().to_numpy()
+    emitted.update(zip(keys[~repeated], operating.loc[~repeated, "flight_number"]))
+    if not repeated.any():
+        return operating, codeshares
+
+    # Vuelos ya emitidos en un lote anterior: todas sus filas pasan a ser números comerciales
+    late = operating[repeated]
+    renumber = dict(zip(zip(late["scheduled_arrival_utc"], late["flight_number"]), previous[repeated]))
+    pairs = zip(codeshares["scheduled_arrival_utc"], codeshares["operating_flight_number"])
+    codeshares = codeshares.assign(operating_flight_number=[renumber.get(p, p[1]) for p in pairs])
+    late_rows = pd.DataFrame({
+        "airport_iata": late["airport_iata"],
+        "scheduled_arrival_utc": late["scheduled_arrival_utc"],
+        "operating_flight_number": previous[repeated],
+        "marketing_flight_number": late["flight_number"],
+        "marketing_airline": late["airline"],
+    }, columns=CODESHARE_COLUMNS)
+    codeshares = pd.concat([codeshares, late_rows], ignore_index=True)
+    return operating[~repeated].reset_index(drop=True), codeshares
+
+
+def arrow_schema():
+    """Esquema Parquet de la tabla lateral (airport_iata va en la ruta de la partición).
+
+    Fijo para que un lote sin aerolíneas (columna toda nula) no se escriba como double.
+    """
+    import pyarrow as pa
+    return pa.schema([
+        ("scheduled_arrival_utc", pa.timestamp("us", tz="UTC")),
+        ("operating_flight_number", pa.string()),
+        ("marketing_flight_number", pa.string()),
+        ("marketing_airline", pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+
+def codeshares_store(root=STORE_ROOT, fmt: str = "parquet") -> PartitionedStore:
+    """Tabla lateral de números comerciales, particionada por día UTC y aeropuerto."""
+    return PartitionedStore(root, key_cols=["airport_iata", "scheduled_arrival_utc", "marketing_flight_number"],
+                            time_col="scheduled_arrival_utc", partition_cols=["airport_iata"], fmt=fmt,
+                            schema=arrow_schema() if fmt == "parquet" else None)
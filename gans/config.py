@@ -0,0 +1,100 @@
+import configparser
+import os
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+
+# ----------------------------------------------------------------------
+# CONFIGURACIÓN (fichero gans.ini + variables de entorno GANS_*)
+# ----------------------------------------------------------------------
+
+DEFAULT_CONFIG_FILE = "gans.ini"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Parámetros de acceso a la base de datos y rutas de datos de entrada.
+
+    Se leen, por orden de prioridad: variables de entorno `GANS_<CAMPO>`
+    (p. ej. `GANS_DB_PASSWORD`), las secciones `[database]` y `[paths]` del
+    fichero indicado en `GANS_CONFIG` (por defecto `gans.ini`) y los valores
+    por defecto.
+    """
+    db_backend: str = "mysql"  # "mysql" o "sqlite" (sustituto local sin servidor)
+    db_user: str = "root"
+    db_password: str = ""
+    db_host: str = "localhost"
+    db_port: int = 3306
+    db_name: str = "gans"
+    sqlite_path: str = "data/gans.sqlite"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_recycle: int = 1800  # MySQL cierra conexiones inactivas (wait_timeout)
+    pool_pre_ping: bool = True
+    worldcities_path: str = "data/worldcities.csv"  # simplemaps.com/data/world-cities
+    airports_path: str = "data/airports.csv"  # ourairports.com/data/airports.csv
+
+    @property
+    def db_url(self) -> str:
+        if self.db_backend == "sqlite":
+            return f"sqlite:///{self.sqlite_path}"
+        return (f"mysql+mysqlconnector://{self.db_user}:{self.db_password}"
+                f"@{self.db_host}:{self.db_port}/{self.db_name}")
+
+
+def _convert(value: str, current):
+    if isinstance(current, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(current, int):
+        return int(value)
+    return value
+
+
+def load_settings(path=None) -> Settings:
+    settings = Settings()
+    path = Path(path or os.getenv("GANS_CONFIG", DEFAULT_CONFIG_FILE))
+
+    values = {}
+    if path.exists():
+        parser = configparser.ConfigParser()
+        parser.read(path, encoding="utf-8")
+        for section in ("database", "paths"):
+            if parser.has_section(section):
+                values.update(parser[section])
+    for f in fields(Settings):
+        env = os.getenv(f"GANS_{f.name.upper()}")
+        if env is not None:
+            values[f.name] = env
+
+    known = {f.name for f in fields(Settings)}
+    return replace(settings, **{k: _convert(v, getattr(settings, k)) for k, v in values.items() if k in known})
+
+
+# ----------------------------------------------------------------------
+# CREDENCIALES DE LAS APIS (se leen solo cuando un comando las necesita)
+# ----------------------------------------------------------------------
+
+AERODATABOX_HOST = "aerodatabox.p.rapidapi.com"
+
+
+class MissingCredentials(RuntimeError):
+    """No hay clave para la API que necesita el comando."""
+
+
+def flights_credentials() -> tuple:
+    """`(host, key)` de AeroDataBox: `RAPIDAPI_KEY` (y opcionalmente `AERODATABOX_HOST`)
+    o, si no están definidas, `flights_key`/`AERODATABOX_HOST` de keys.py."""
+    key = (os.getenv("RAPIDAPI_KEY") or "").strip()
+    if key:
+        return (os.getenv("AERODATABOX_HOST") or AERODATABOX_HOST).strip(), key
+    try:
+        import keys
+    except ImportError:
+        raise MissingCredentials("No se encontró la clave de RapidAPI. Define RAPIDAPI_KEY o crea keys.py.")
+    return getattr(keys, "AERODATABOX_HOST", AERODATABOX_HOST), keys.flights_key
+
+
+def openweather_key() -> str:
+    key = (os.getenv("OPENWEATHER_API_KEY") or "").strip()
+    if not key:
+        raise MissingCredentials("No se encontró la API key. Define OPENWEATHER_API_KEY en tu shell.")
+    return key
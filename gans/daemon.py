@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import signal
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import pandas as pd
+
+from gans.airports import KNOWN_TIMEZONES
+from gans.cli import airport_codes, cities_or_tracked
+from gans.client import HttpClient, default_client
+from gans.codeshares import codeshares_store, collapse_codeshares
+from gans.config import flights_credentials, openweather_key
+from gans.flights import arrivals_store, fetch_windows
+from gans.metrics import metrics, span
+from gans.ratelimit import TokenBucket
+from gans.weather import fetch_forecasts, forecast_store, unique_city_names
+from gans.windows import TIME_FORMAT, split_windows
+
+# ----------------------------------------------------------------------
+# RECOLECTOR RESIDENTE (vuelos + clima) CON CHECKPOINTS
+# ----------------------------------------------------------------------
+
+STATE_PATH = "data/.state/checkpoints.json"
+FORECAST_SLOT_HOURS = 3  # OpenWeather publica el pronóstico en franjas de 3 h
+
+
+def floor_time(dt: datetime, hours: int) -> datetime:
+    """Redondea hacia abajo a un múltiplo de `hours` horas dentro del día."""
+    return dt.replace(minute=0, second=0, microsecond=0) - timedelta(hours=dt.hour % hours)
+
+
+class Checkpoints:
+    """Última ventana descargada por fuente, persistida en JSON.
+
+    Estructura: `{"flights": {"FRA": {"<inicio ventana>": "<descargada en>"}},
+    "weather": {"Berlin,DE": "<franja de 3 h>"}}`.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = Path(path)
+        try:
+            self.data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.data = {}
+
+    def section(self, source: str) -> dict:
+        return self.data.setdefault(source, {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+class Collector:
+    """Proceso residente que descarga solo las ventanas nuevas o vencidas en cada tick.
+
+    - Vuelos: cobertura móvil de `horizon_hours` desde ahora, en ventanas
+      alineadas de `window_hours` (hora local del aeropuerto, según
+      `timezones` = `{IATA: zona IANA}`, que completa `KNOWN_TIMEZONES`). Una ventana se vuelve a pedir
+      cuando su descarga tiene más de `refresh_after`.
+    - Clima: el pronóstico de cada ciudad solo se refresca cuando cambia la
+      franja de 3 h de OpenWeather.
+
+    Con `collapse_codeshares=True` se guarda un registro por vuelo operador y
+    los números comerciales van al almacén de `gans.codeshares`.
+
+    El cliente HTTP (pool keep-alive y caché), los almacenes y los imports se
+    reutilizan entre ticks.
+    """
+
+    def __init__(self, airports: list = (), cities: list = (), host: str = None, key: str = None,
+                 weather_key: str = None, window_hours: int = 6, horizon_hours: int = 24,
+                 refresh_after: timedelta = timedelta(hours=3), interval: int = 300,
+                 max_workers: int = 8, requests_per_second: float = 5, timezones: dict = None,
+                 client: HttpClient = None, state_path=STATE_PATH, collapse_codeshares: bool = False):
+        self.airports = list(airports)
+        self.cities = unique_city_names(list(cities))  # [(city, country), ...], sin nombres repetidos
+        self.host, self.key, self.weather_key = host, key, weather_key
+        self.window_hours = window_hours
+        self.horizon_hours = horizon_hours
+        self.refresh_after = refresh_after
+        self.interval = interval
+        self.max_workers = max_workers
+        self.rate_limit = TokenBucket(requests_per_second) if requests_per_second else None
+        known = {a: KNOWN_TIMEZONES[a] for a in self.airports if a in KNOWN_TIMEZONES}
+        self.timezones = {**known, **(timezones or {})}
+        missing = [a for a in self.airports if a not in self.timezones]
+        if missing:
+            raise ValueError(f"Falta la zona horaria de {', '.join(missing)}")
+        self.client = client or default_client()
+        self.checkpoints = Checkpoints(state_path)
+        self.flight_store = arrivals_store()
+        self.collapse_codeshares = collapse_codeshares
+        self.codeshare_store = codeshares_store() if collapse_codeshares else None
+        self.weather_store = forecast_store()
+        self._stop = threading.Event()
+
+    # --- vuelos ---
+
+    def due_flight_windows(self, now: datetime) -> list:
+        jobs = []
+        for airport in self.airports:
+            tz = ZoneInfo(self.timezones[airport])
+            local_now = now.astimezone(tz).replace(tzinfo=None)
+            start = floor_time(local_now, self.window_hours)
+            end = floor_time(local_now + timedelta(hours=self.horizon_hours), self.window_hours)
+            end += timedelta(hours=self.window_hours)
+
+            done = self.checkpoints.section("flights").setdefault(airport, {})
+            # Se olvidan las ventanas que ya quedaron atrás
+            for window_start in [w for w in done if w < start.strftime(TIME_FORMAT)]:
+                del done[window_start]
+
+            for window_start, window_end in split_windows(start, end, self.window_hours):
+                fetched = done.get(window_start)
+                if fetched is None or now - datetime.fromisoformat(fetched) >= self.refresh_after:
+                    jobs.append((airport, window_start, window_end))
+        return jobs
+
+    def collect_flights(self, now: datetime) -> int:
+        jobs = self.due_flight_windows(now)
+        if not jobs:
+            return 0
+        results = fetch_windows(jobs, self.host, self.key, max_workers=self.max_workers,
+                                rate_limit=self.rate_limit, client=self.client)
+        frames = [r.df for r in results if r.ok and r.df is not None and not r.df.empty]
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+            if self.collapse_codeshares:
+                df, codeshares = collapse_codeshares(df)
+                self.codeshare_store.write(codeshares)
+            self.flight_store.write(df)
+        for r in results:
+            if r.ok:
+                self.checkpoints.section("flights")[r.airport][r.start_local] = now.isoformat()
+            else:
+                print(f"!! Ventana perdida {r.airport} {r.start_local} a {r.end_local}: {r.error}")
+        return sum(r.ok for r in results)
+
+    # --- clima ---
+
+    def collect_weather(self, now: datetime) -> int:
+        slot = floor_time(now.astimezone(timezone.utc), FORECAST_SLOT_HOURS).isoformat()
+        done = self.checkpoints.section("weather")
+        due = [(city, country) for city, country in self.cities if done.get(f"{city},{country}") != slot]
+        if not due:
+            return 0
+        # Todas las ciudades pendientes a la vez; las que fallan se reintentan en el siguiente tick
+        df = fetch_forecasts(due, self.weather_key, max_workers=self.max_workers, client=self.client)
+        if not df.empty:
+            self.weather_store.write(df)
+        fetched = set(df["city"])
+        for city, country in due:
+            if city in fetched:
+                done[f"{city},{country}"] = slot
+        return len(fetched)
+
+    # --- bucle ---
+
+    def tick(self, now: datetime = None) -> dict:
+        now = now or datetime.now(timezone.utc)
+        with span("tick", source="daemon"):
+            summary = {
+                "at": now.isoformat(),
+                "flight_windows": self.collect_flights(now) if self.airports else 0,
+                "forecasts": self.collect_weather(now) if self.cities else 0,
+            }
+            self.checkpoints.save()
+        metrics.flush()  # El textfile de Prometheus se actualiza en cada tick
+        return summary
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while not self._stop.is_set():
+            try:
+                print(f"tick: {self.tick()}")
+            except Exception as e:  # Un tick fallido no detiene el proceso
+                print(f"!! Error en el tick: {e}")
+            self._stop.wait(self.interval)
+        self.client.close()
+
+
+def timezone_pairs(value: str) -> dict:
+    """`--timezones FRA=Europe/Berlin,JFK=America/New_York` → `{IATA: zona}`."""
+    zones = {}
+    for item in (v.strip() for v in value.split(",")):
+        if not item:
+            continue
+        code, _, zone = item.partition("=")
+        try:
+            ZoneInfo(zone.strip())
+        except (ValueError, ZoneInfoNotFoundError):
+            raise argparse.ArgumentTypeError(f"zona no válida en {item!r} (formato IATA=Zona/IANA)")
+        zones[code.strip().upper()] = zone.strip()
+    return zones
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Recolector residente de vuelos y clima.")
+    parser.add_argument("--airports", default="FRA",
+                        help="Códigos IATA separados por comas, o `tracked` para los de la tabla airport")
+    parser.add_argument("--cities", type=cities_or_tracked, default="Berlin:DE",
+                        help="Ciudad:PAÍS separados por comas, o `tracked` para las de la tabla city_pop")
+    parser.add_argument("--timezones", type=timezone_pairs, default={},
+                        help="IATA=Zona/IANA separados por comas; por defecto, la zona de FRA, BER y "
+                             "otros hubs alemanes ya se conoce y la del resto se deduce de airports.csv "
+                             "de OurAirports (ver gans.airports.airport_timezones)")
+    parser.add_argument("--interval", type=int, default=300, help="Segundos entre ticks")
+    parser.add_argument("--window-hours", type=int, default=6)
+    parser.add_argument("--horizon-hours", type=int, default=24)
+    parser.add_argument("--collapse-codeshares", action="store_true",
+                        help="Un registro por vuelo operador; los números comerciales van a data/flights/codeshares")
+    parser.add_argument("--once", action="store_true", help="Ejecuta un solo tick y termina")
+    args = parser.parse_args(argv)
+
+    airports = airport_codes(args.airports)
+    timezones = dict(args.timezones)
+    pending = [a for a in airports if a not in timezones]
+    if pending:
+        from gans.airports import airport_timezones
+        try:
+            timezones.update(airport_timezones(pending))
+        except FileNotFoundError as e:
+            parser.error(f"{e}; descarga airports.csv de OurAirports o usa --timezones")
+        except ValueError as e:
+            parser.error(str(e))
+    if args.cities == "tracked":
+        from gans.cities import tracked_cities
+        from gans.db import get_engine
+        cities = [tuple(k.split(",", 1)) for k in tracked_cities(get_engine())["municipality_iso_country"]]
+    else:
+        cities = args.cities
+
+    host, key = flights_credentials() if airports else (None, None)
+    weather_key = openweather_key() if cities else None
+
+    collector = Collector(airports, cities, host, key, weather_key, window_hours=args.window_hours,
+                          horizon_hours=args.horizon_hours, interval=args.interval, timezones=timezones,
+                          collapse_codeshares=args.collapse_codeshares)
+    if args.once:
+        print(collector.tick())
+    else:
+        collector.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import threading
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+
+from gans.config import Settings, load_settings
+from gans.schema import create_schema
+
+# ----------------------------------------------------------------------
+# ENGINE COMPARTIDO (un pool por URL y por proceso)
+# ----------------------------------------------------------------------
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def _build_engine(settings: Settings):
+    if settings.db_backend == "sqlite":
+        Path(settings.sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+        engine = create_engine(settings.db_url)
+
+        @event.listens_for(engine, "connect")
+        def _pragmas(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        create_schema(engine)
+        return engine
+
+    return create_engine(
+        settings.db_url,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        connect_args={"allow_local_infile": True},
+    )
+
+
+def get_engine(settings: Settings = None):
+    """Engine de SQLAlchemy para `settings` (por defecto `load_settings()`).
+
+    Se crea una sola vez por URL y se reutiliza en todo el proceso, así que
+    los loaders de clima, vuelos y ciudades comparten el mismo pool.
+    """
+    settings = settings or load_settings()
+    with _lock:
+        engine = _engines.get(settings.db_url)
+        if engine is None:
+            engine = _engines[settings.db_url] = _build_engine(settings)
+        return engine
+
+
+def dispose_engines() -> None:
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def executemany(engine, sql: str, rows: list, prepared: bool = False) -> int:
+    """Ejecuta `sql` (marcadores `%s`) para todas las `rows` en una transacción.
+
+    Vía rápida sobre la conexión DBAPI: mysql-connector reescribe los INSERT
+    de `executemany` como un solo INSERT multi-fila; con `prepared=True` usa
+    en su lugar una sentencia preparada en el servidor. En SQLite los
+    marcadores se traducen a `?`.
+    """
+    if not rows:
+        return 0
+    conn = engine.raw_connection()
+    try:
+        if engine.dialect.name == "sqlite":
+            cursor = conn.cursor()
+            sql = sql.replace("%s", "?")
+        else:
+            cursor = conn.cursor(prepared=True) if prepared else conn.cursor()
+        cursor.executemany(sql, rows)
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return len(rows)
@@ -0,0 +1,347 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+import pandas as pd
+
+from gans.client import HttpClient, default_client
+from gans.jsonstream import iter_array_items
+from gans.metrics import count, span
+from gans.ratelimit import TokenBucket
+from gans.store import PartitionedStore
+from gans.windows import day_windows
+
+# ----------------------------------------------------------------------
+# 1) CONFIGURACIÓN DE AERODATABOX
+# ----------------------------------------------------------------------
+
+CODE_TYPE = "iata"
+
+PARAMS = {
+    "withLeg": "true", "direction": "Arrival", "withCancelled": "true",
+    "withCodeshared": "true", "withCargo": "false", "withPrivate": "false", "withLocation": "false"
+}
+
+COLUMNS = [
+    "airport_iata", "scheduled_arrival_utc", "scheduled_arrival_local", "flight_number",
+    "from_airport_name", "airline", "aircraft_model", "codeshare_status", "revised_arrival_utc"
+]
+
+# Rutas del JSON de AeroDataBox que se conservan → columna de salida
+ARRIVAL_FIELDS = {
+    "flight_number": ("number",),
+    "from_airport_name": ("departure", "airport", "name"),
+    "airline": ("airline", "name"),
+    "aircraft_model": ("aircraft", "model"),
+    "scheduled_arrival_utc": ("arrival", "scheduledTime", "utc"),
+    "scheduled_arrival_local": ("arrival", "scheduledTime", "local"),
+    "codeshare_status": ("codeshareStatus",),
+    "revised_arrival_utc": ("arrival", "revisedTime", "utc"),  # Hora estimada/real; falta si no hay datos en vivo
+}
+
+DEDUP_SUBSET = ["airport_iata", "scheduled_arrival_utc", "flight_number"]
+STORE_ROOT = "data/flights/arrivals"
+
+
+def airport_url(host: str, airport: str) -> str:
+    """URL del FIDS; `host` también admite una URL base completa (p. ej. un servidor local de pruebas)."""
+    base = host.rstrip("/") if "://" in host else f"https://{host}"
+    return f"{base}/flights/airports/{CODE_TYPE}/{airport}"
+
+
+def api_headers(host: str, key: str) -> dict:
+    return {"x-rapidapi-host": host, "x-rapidapi-key": key}
+
+
+class FetchError(RuntimeError):
+    """La API no devolvió datos válidos para una ventana (tras los reintentos)."""
+
+
+# ----------------------------------------------------------------------
+# 2) VENTANAS DE TIEMPO
+# ----------------------------------------------------------------------
+
+# En gans/windows.py: solo biblioteca estándar, para que `--dry-run` no cargue pandas.
+
+
+# ----------------------------------------------------------------------
+# 3) TRANSFORMACIÓN DEL JSON (solo las rutas necesarias)
+# ----------------------------------------------------------------------
+
+def _pluck(item: dict, path: tuple):
+    for key in path:
+        if not isinstance(item, dict):
+            return None
+        item = item.get(key)
+    return item
+
+
+def _arrivals_frame(columns: dict, airport: str) -> pd.DataFrame:
+    columns = dict(columns)
+    for col in ("scheduled_arrival_utc", "revised_arrival_utc"):
+        columns[col] = pd.to_datetime(columns[col], errors="coerce", utc=True, format="ISO8601")
+    df = pd.DataFrame(columns)
+    df.insert(0, "airport_iata", airport)
+    df = df[COLUMNS]
+    valid = df["scheduled_arrival_utc"].notna()
+    if not valid.all():
+        count("rows_unparsed", int((~valid).sum()), source="flights")
+    return df[valid].reset_index(drop=True)
+
+
+def extract_arrivals(items: list, airport: str) -> pd.DataFrame:
+    """Convierte la lista `arrivals` de la API en un DataFrame con solo las columnas útiles.
+
+    Solo se recorren las rutas de `ARRIVAL_FIELDS` (nada de aplanar todo el
+    JSON) y cada columna se construye directamente como un array. La hora UTC
+    se parsea en una sola pasada vectorizada; la hora local se conserva tal
+    cual la envía la API (texto ISO con el desfase del aeropuerto). Las filas
+    sin hora UTC se descartan.
+    """
+    columns = {name: [_pluck(item, path) for item in items] for name, path in ARRIVAL_FIELDS.items()}
+    return _arrivals_frame(columns, airport)
+
+
+# ----------------------------------------------------------------------
+# 3.1) LLAMADA A LA API POR VENTANA
+# ----------------------------------------------------------------------
+
+def _raise_for_api_error(resp) -> None:
+    try:
+        data = resp.json()
+    except Exception:
+        raise FetchError(f"ERROR JSON. HTTP {resp.status_code}")
+    message = data.get('message', 'Error API desconocido') if isinstance(data, dict) else data
+    raise FetchError(f"ERROR HTTP {resp.status_code}: {message}")
+
+
+def _is_codeshared(item) -> bool:
+    return isinstance(item, dict) and item.get("codeshareStatus") == "IsCodeshared"
+
+
+def iter_arrival_batches(airport: str, start_local: str, end_local: str, host: str, key: str,
+                         client: HttpClient = None, batch_size: int = 500,
+                         drop_codeshared: bool = False):
+    """Lee el array `arrivals` directamente del socket y devuelve DataFrames de `batch_size` filas.
+
+    De cada vuelo solo se guardan los campos de `ARRIVAL_FIELDS`, así que el
+    pico de memoria no depende del tamaño de la ventana y cada lote se puede
+    transformar mientras sigue llegando el resto (ver `flights_pipeline` con
+    `stream=True`). Con `drop_codeshared=True` se descartan al vuelo las
+    entradas marcadas como `IsCodeshared` (queda el vuelo operador). Las
+    respuestas en streaming no pasan por la caché.
+    """
+    client = client or default_client()
+    url = f"{airport_url(host, airport)}/{start_local}/{end_local}"
+    # Descarga y parseo van solapados: el tramo mide los dos
+    with span("fetch_parse_stream", source="flights") as s:
+        s.set(airport=airport, start=start_local)
+        s.rows_in = s.rows_out = 0
+        resp = client.get(url, headers=api_headers(host, key), params=PARAMS, stream=True)
+        with resp:
+            if resp.status_code != 200:
+                _raise_for_api_error(resp)
+
+            columns = {name: [] for name in ARRIVAL_FIELDS}
+            pending = 0
+            for item in iter_array_items(resp.iter_content(chunk_size=64 * 1024), "arrivals"):
+                s.rows_in += 1
+                if drop_codeshared and _is_codeshared(item):
+                    continue
+                for name, path in ARRIVAL_FIELDS.items():
+                    columns[name].append(_pluck(item, path))
+                pending += 1
+                if pending >= batch_size:
+                    batch = _arrivals_frame(columns, airport)
+                    s.rows_out += len(batch)
+                    yield batch
+                    columns = {name: [] for name in ARRIVAL_FIELDS}
+                    pending = 0
+            if pending:
+                batch = _arrivals_frame(columns, airport)
+                s.rows_out += len(batch)
+                yield batch
+
+
+def call_and_process_range(airport: str, start_local: str, end_local: str,
+                           host: str, key: str, client: HttpClient = None,
+                           stream: bool = False, drop_codeshared: bool = False) -> pd.DataFrame:
+    """Realiza una llamada a la API para un rango y devuelve un DataFrame limpio.
+
+    Con `stream=True` la respuesta se parsea de forma incremental (ver
+    `iter_arrival_batches`) en lugar de cargar todo el JSON con `resp.json()`.
+    Con `drop_codeshared=True` se descartan los números comerciales
+    (`IsCodeshared`) antes de construir el DataFrame.
+    """
+    client = client or default_client()
+    print(f"→ Obteniendo datos de {airport}: {start_local} a {end_local}...")
+
+    if stream:
+        batches = list(iter_arrival_batches(airport, start_local, end_local, host, key, client,
+                                            drop_codeshared=drop_codeshared))
+        df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
+        if df.empty:
+            print("-> No se encontraron vuelos en este rango.")
+        return df
+
+    # Petición a la API (el cliente ya reintenta 429/5xx con backoff)
+    url = f"{airport_url(host, airport)}/{start_local}/{end_local}"
+    resp = client.get(url, headers=api_headers(host, key), params=PARAMS)
+    if resp.status_code != 200:
+        _raise_for_api_error(resp)
+
+    with span("parse", source="flights") as s:
+        s.set(airport=airport, start=start_local)
+        try:
+            data = resp.json()
+        except Exception:
+            raise FetchError(f"ERROR JSON. HTTP {resp.status_code}")
+
+        flights_data = data.get('arrivals', [])
+        s.rows_in = len(flights_data)
+        if drop_codeshared:
+            flights_data = [item for item in flights_data if not _is_codeshared(item)]
+        if not flights_data:
+            print("-> No se encontraron vuelos en este rango.")
+            return pd.DataFrame()
+
+        df = extract_arrivals(flights_data, airport)
+        s.rows_out = len(df)
+
+    if df.empty:
+        print("-> No se encontraron datos de tiempo válidos después de la limpieza.")
+
+    return df
+
+
+# ----------------------------------------------------------------------
+# 4) RECOLECCIÓN CONCURRENTE (AEROPUERTOS × VENTANAS)
+# ----------------------------------------------------------------------
+
+@dataclass
+class WindowResult:
+    """Resultado de una ventana (aeropuerto, inicio, fin)."""
+    airport: str
+    start_local: str
+    end_local: str
+    df: pd.DataFrame = None
+    error: str = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def fetch_windows(jobs: list, host: str, key: str, max_workers: int = 8,
+                  rate_limit: TokenBucket = None, client: HttpClient = None,
+                  stream: bool = False, drop_codeshared: bool = False) -> list:
+    """Descarga todas las ventanas `(airport, start, end)` en paralelo.
+
+    `max_workers` limita las peticiones simultáneas y `rate_limit` (opcional)
+    reparte las llamadas según la cuota de RapidAPI.
+    """
+    client = client or default_client()
+
+    def run(job):
+        airport, start, end = job
+        if rate_limit is not None:
+            rate_limit.acquire()
+        try:
+            df = call_and_process_range(airport, start, end, host, key, client, stream=stream,
+                                        drop_codeshared=drop_codeshared)
+        except Exception as e:  # Un fallo de red no debe tumbar el resto de ventanas
+            count("windows_failed", source="flights")
+            return WindowResult(airport, start, end, error=str(e))
+        return WindowResult(airport, start, end, df=df)
+
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        return list(pool.map(run, jobs))
+
+
+def fetch_arrivals(airports: list, first_day: date, days: int, host: str, key: str,
+                   start_hour: int = 0, end_hour: int = 24, max_workers: int = 8,
+                   requests_per_second: float = None, client: HttpClient = None,
+                   stream: bool = False, drop_codeshared: bool = False) -> pd.DataFrame:
+    """Llegadas de varios aeropuertos durante `days` días, todas las ventanas a la vez."""
+    windows = day_windows(first_day, days, start_hour, end_hour)
+    jobs = [(airport, start, end) for airport in airports for start, end in windows]
+    rate_limit = TokenBucket(requests_per_second) if requests_per_second else None
+
+    results = fetch_windows(jobs, host, key, max_workers=max_workers, rate_limit=rate_limit,
+                            client=client, stream=stream, drop_codeshared=drop_codeshared)
+
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"!! Ventana perdida {r.airport} {r.start_local} a {r.end_local}: {r.error}")
+    if failed:
+        print(f"!! {len(failed)} de {len(results)} ventanas no se pudieron descargar.")
+
+    frames = [r.df for r in results if r.ok and r.df is not None and not r.df.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+FLIGHT_ARRIVAL_COLUMNS = ["flight_icao", "arrival_time", "airport_iata", "airline_iata", "delay_minutes"]
+
+# Designador IATA de la aerolínea al principio del número de vuelo ("LH 400", "U2 1234")
+AIRLINE_DESIGNATOR = r"^([A-Z0-9]{2})\s?\d"
+
+
+def to_flight_arrival(df: pd.DataFrame) -> pd.DataFrame:
+    """Adapta las llegadas al esquema de la tabla flight_arrival (flight_number → flight_icao).
+
+    `airline_iata` sale del prefijo del número de vuelo (no del nombre de la
+    aerolínea) y `delay_minutes` de `revised_arrival_utc` − hora programada;
+    ambos quedan nulos si no se pueden obtener.
+    """
+    scheduled = pd.to_datetime(df["scheduled_arrival_utc"], utc=True)
+    if "revised_arrival_utc" in df.columns:
+        revised = pd.to_datetime(df["revised_arrival_utc"], utc=True)
+        delay = ((revised - scheduled).dt.total_seconds() / 60).round().astype("Int64")
+    else:
+        delay = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    out = pd.DataFrame({
+        "flight_icao": df["flight_number"],
+        "arrival_time": df["scheduled_arrival_utc"],
+        "airport_iata": df["airport_iata"],
+        "airline_iata": df["flight_number"].astype("string").str.upper().str.extract(AIRLINE_DESIGNATOR)[0],
+        "delay_minutes": delay,
+    })
+    return out[FLIGHT_ARRIVAL_COLUMNS]
+
+
+def arrow_schema():
+    """Esquema Parquet de las llegadas (airport_iata va en la ruta de la partición).
+
+    La hora local se guarda como texto ISO porque cada aeropuerto tiene su
+    propio desfase; la hora UTC es la referencia tipada.
+    """
+    import pyarrow as pa
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("scheduled_arrival_utc", pa.timestamp("us", tz="UTC")),
+        ("scheduled_arrival_local", pa.string()),
+        ("flight_number", pa.string()),
+        ("from_airport_name", text),
+        ("airline", text),
+        ("aircraft_model", text),
+        ("codeshare_status", text),
+        ("codeshare_count", pa.int32()),
+        ("revised_arrival_utc", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def arrivals_store(root=STORE_ROOT, fmt: str = "parquet") -> PartitionedStore:
+    """Histórico de llegadas: una partición por día UTC y aeropuerto."""
+    return PartitionedStore(root, key_cols=DEDUP_SUBSET, time_col="scheduled_arrival_utc",
+                            partition_cols=["airport_iata"], fmt=fmt,
+                            schema=arrow_schema() if fmt == "parquet" else None)
+
+
+def read_arrivals(start=None, end=None, airports: list = None, root=STORE_ROOT) -> pd.DataFrame:
+    """Llegadas entre los días UTC `start` y `end`; solo se leen los ficheros que coinciden."""
+    filters = {"airport_iata": airports} if airports else {}
+    return arrivals_store(root).read(start, end, **filters)
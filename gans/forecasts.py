@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from gans.store import PartitionedStore
+from gans.weather import COLUMNS
+
+# ----------------------------------------------------------------------
+# HISTÓRICO DE EMISIONES DEL PRONÓSTICO (versionado, codificado por deltas)
+# ----------------------------------------------------------------------
+
+ARCHIVE_ROOT = "data/weather/forecast_versions"
+ISSUES_FILE = "_issues.csv"
+VALUE_COLUMNS = [c for c in COLUMNS if c != "time_utc"]
+KEY_COLUMNS = ["city", "time_utc", "issued_at"]
+
+
+def arrow_schema():
+    """Esquema Parquet de las versiones (city va en la ruta de la partición)."""
+    import pyarrow as pa
+    from gans.weather import arrow_schema as forecast_schema
+    base = forecast_schema()
+    return pa.schema([base.field("time_utc"), ("issued_at", pa.timestamp("us", tz="UTC")),
+                      *[base.field(c) for c in VALUE_COLUMNS]])
+
+
+def _same(a: pd.Series, b: pd.Series) -> pd.Series:
+    return (a == b).fillna(False) | (a.isna() & b.isna())
+
+
+class ForecastArchive:
+    """Todas las emisiones del pronóstico, con clave (city, time_utc, issued_at).
+
+    Cada emisión solo guarda las franjas que cambian respecto a la última
+    versión archivada (o que son nuevas): una descarga idéntica a la anterior
+    cuesta una línea en `_issues.csv`. El valor vigente de una franja en el
+    instante T es la última versión con `issued_at <= T`.
+
+    Los datos se particionan por día UTC de la franja y ciudad (Parquet), así
+    que "todas las versiones de la franja S" lee una sola partición y "lo
+    último a fecha T" solo los días pedidos, nunca todas las emisiones.
+    """
+
+    def __init__(self, root=ARCHIVE_ROOT, fmt: str = "parquet"):
+        self.root = Path(root)
+        self.store = PartitionedStore(root, key_cols=KEY_COLUMNS, time_col="time_utc",
+                                      partition_cols=["city"], utc_cols=["time_utc", "issued_at"], fmt=fmt,
+                                      schema=arrow_schema() if fmt == "parquet" else None)
+
+    # --- escritura ---
+
+    def append(self, df: pd.DataFrame, issued_at: datetime = None) -> dict:
+        """Archiva una emisión (`df` con `city` y columnas de `forecast_to_frame`).
+
+        `issued_at` es la hora de la descarga si no se indica (OpenWeather no
+        publica la hora de emisión). Devuelve cuántas franjas cambiaron.
+        """
+        issued_at = pd.Timestamp(issued_at or datetime.now(timezone.utc)).tz_convert("UTC").floor("s")
+        df = df.dropna(subset=["time_utc"])
+        summary = {"issued_at": issued_at, "slots": len(df), "changed": 0}
+        if df.empty:
+            return summary
+
+        previous = self.as_of(issued_at, df["time_utc"].min(), df["time_utc"].max(),
+                              cities=sorted(df["city"].unique()))
+        incoming = df[["city", "time_utc", *VALUE_COLUMNS]].copy()
+        incoming["city"] = incoming["city"].astype(str)
+        if previous.empty:
+            changed = incoming
+        else:
+            previous = previous.assign(city=previous["city"].astype(str))
+            merged = incoming.merge(previous[["city", "time_utc", *VALUE_COLUMNS]],
+                                    on=["city", "time_utc"], how="left", suffixes=("", "_prev"),
+                                    indicator=True)
+            unchanged = merged["_merge"].eq("both")
+            for col in VALUE_COLUMNS:
+                unchanged &= _same(merged[col].astype(object), merged[f"{col}_prev"].astype(object))
+            changed = incoming[~unchanged.to_numpy()]
+
+        if not changed.empty:
+            self.store.write(changed.assign(issued_at=issued_at))
+        self._log_issue(df["city"].unique(), issued_at)
+        summary["changed"] = len(changed)
+        return summary
+
+    def _log_issue(self, cities, issued_at) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / ISSUES_FILE
+        log = pd.DataFrame({"city": list(cities), "issued_at": issued_at.isoformat()})
+        log.to_csv(path, mode="a", header=not path.exists(), index=False, encoding="utf-8")
+
+    def issues(self, cities: list = None) -> pd.DataFrame:
+        """Todas las emisiones registradas (aunque no cambiaran ninguna franja)."""
+        path = self.root / ISSUES_FILE
+        if not path.exists():
+            return pd.DataFrame(columns=["city", "issued_at"])
+        log = pd.read_csv(path, encoding="utf-8")
+        log["issued_at"] = pd.to_datetime(log["issued_at"], utc=True)
+        return log[log["city"].isin(cities)] if cities else log
+
+    # --- consultas ---
+
+    def _read(self, start, end, cities: list = None) -> pd.DataFrame:
+        df = self.store.read(start, end, **({"city": cities} if cities else {}))
+        if not df.empty:
+            df["city"] = df["city"].astype(str)
+        return df
+
+    def as_of(self, when, start=None, end=None, cities: list = None) -> pd.DataFrame:
+        """Pronóstico vigente en el instante `when` para las franjas entre `start` y `end`.
+
+        Por defecto se consultan las franjas desde el día de `when` hasta 5
+        días después (el horizonte de /forecast).
+        """
+        when = pd.Timestamp(when)
+        when = when.tz_localize("UTC") if when.tzinfo is None else when.tz_convert("UTC")
+        start = start if start is not None else when.floor("D")
+        end = end if end is not None else when + pd.Timedelta(days=5)
+        df = self._read(start, end, cities)
+        if df.empty:
+            return df
+        df = df[df["issued_at"] <= when]
+        df = df.sort_values("issued_at", kind="stable").drop_duplicates(["city", "time_utc"], keep="last")
+        lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+        lo = lo.tz_localize("UTC") if lo.tzinfo is None else lo
+        hi = hi.tz_localize("UTC") if hi.tzinfo is None else hi
+        df = df[(df["time_utc"] >= lo) & (df["time_utc"] <= hi)]
+        return df.sort_values(["city", "time_utc"], kind="stable").reset_index(drop=True)
+
+    def versions(self, city: str, slot, expand: bool = False) -> pd.DataFrame:
+        """Versiones de la franja `slot` de `city`, con `lead_hours` (antelación de cada una).
+
+        Por defecto solo las emisiones que cambiaron algo; con `expand=True`
+        una fila por emisión registrada, repitiendo el último valor conocido.
+        """
+        slot = pd.Timestamp(slot)
+        slot = slot.tz_localize("UTC") if slot.tzinfo is None else slot.tz_convert("UTC")
+        df = self._read(slot.floor("D"), slot.floor("D"), [city])
+        if df.empty:
+            return df
+        df = df[df["time_utc"] == slot].sort_values("issued_at", kind="stable")
+        if expand:
+            issued = self.issues([city])["issued_at"]
+            issued = pd.DataFrame({"issued_at": issued[issued <= slot].sort_values().unique()})
+            df = pd.merge_asof(issued.astype({"issued_at": df["issued_at"].dtype}), df, on="issued_at")
+            df = df.dropna(subset=["time_utc"])
+        df = df.assign(lead_hours=(df["time_utc"] - df["issued_at"]).dt.total_seconds() / 3600)
+        return df.reset_index(drop=True)
@@ -0,0 +1,76 @@
+import numpy as np
+
+# ----------------------------------------------------------------------
+# ÍNDICE ESPACIAL SOBRE LA ESFERA (lat/lng en grados)
+# ----------------------------------------------------------------------
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distancia de gran círculo en km (vectorizada, admite arrays con broadcasting)."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_unit_xyz(lat, lng) -> np.ndarray:
+    """Puntos de la esfera unidad, forma (n, 3)."""
+    lat, lng = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lng, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)])
+
+
+def _chord(km):
+    """Distancia de gran círculo → cuerda en la esfera unidad (monótona, sirve para el KD-tree)."""
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype=float) / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def _arc_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+
+class SphereIndex:
+    """Vecinos más cercanos y búsqueda por radio sobre puntos lat/lng.
+
+    Usa `scipy.spatial.cKDTree` sobre coordenadas 3D de la esfera unidad si
+    scipy está instalado; si no, recurre a un barrido vectorizado con numpy
+    (suficiente para decenas de miles de puntos).
+    """
+
+    def __init__(self, lat, lng):
+        self.xyz = to_unit_xyz(lat, lng)
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            self.tree = None
+        else:
+            self.tree = cKDTree(self.xyz)
+
+    def __len__(self) -> int:
+        return len(self.xyz)
+
+    def nearest(self, lat, lng, k: int = 1):
+        """`(distancias_km, índices)` de los `k` puntos más cercanos a cada consulta, forma (m, k)."""
+        query = to_unit_xyz(np.atleast_1d(lat), np.atleast_1d(lng))
+        k = min(k, len(self))
+        if self.tree is not None:
+            dist, idx = self.tree.query(query, k=k)
+            dist, idx = dist.reshape(len(query), k), idx.reshape(len(query), k)
+            return _arc_km(dist), idx
+        # Sin scipy: cuerda² = 2 - 2·cos(ángulo) con un producto matricial por consulta
+        chord2 = np.maximum(2.0 - 2.0 * (query @ self.xyz.T), 0.0)
+        idx = np.argpartition(chord2, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(chord2, idx, axis=1).argsort(axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        return _arc_km(np.sqrt(np.take_along_axis(chord2, idx, axis=1))), idx
+
+    def within(self, lat, lng, radius_km: float) -> list:
+        """Índices de los puntos a menos de `radius_km` de cada consulta (una lista por consulta)."""
+        query = to_unit_xyz(np.atleast_1d(lat), np.atleast_1d(lng))
+        radius = float(_chord(radius_km))
+        if self.tree is not None:
+            return [np.asarray(sorted(found), dtype=np.intp)
+                    for found in self.tree.query_ball_point(query, r=radius)]
+        chord2 = np.maximum(2.0 - 2.0 * (query @ self.xyz.T), 0.0)
+        return [np.flatnonzero(row <= radius * radius) for row in chord2]
@@ -0,0 +1,199 @@
+from datetime import date
+
+from gans.client import HttpClient, default_client
+from gans.codeshares import collapse_batches
+from gans.flights import call_and_process_range, day_windows, iter_arrival_batches, to_flight_arrival
+from gans.pipeline import Pipeline
+from gans.ratelimit import TokenBucket
+from gans.weather import fetch_forecasts, to_weather_data, unique_city_names
+
+# ----------------------------------------------------------------------
+# TRABAJOS ETL SOBRE EL PIPELINE (vuelos, clima y ciudades)
+# ----------------------------------------------------------------------
+
+LOAD_BATCH_SIZE = 1000
+
+
+def _writer(store):
+    """Etapa final que escribe cada lote en un `PartitionedStore`."""
+    def write(df):
+        store.write(df)
+    return write
+
+
+def _archiver(archive):
+    """Etapa final que guarda cada pronóstico como una emisión más de `ForecastArchive`."""
+    def append(df):
+        archive.append(df)
+    return append
+
+
+def _collapser(codeshare_store):
+    """Etapa que deja un registro por vuelo operador; los números comerciales van a `codeshare_store`.
+
+    Recibe ventanas completas o pares `(operating, codeshares)` ya agrupados
+    al extraer en streaming (ver `gans.codeshares.collapse_batches`).
+    """
+    from gans.codeshares import collapse_codeshares
+
+    def collapse(item):
+        operating, codeshares = item if isinstance(item, tuple) else collapse_codeshares(item)
+        if codeshare_store is not None and not codeshares.empty:
+            codeshare_store.write(codeshares)
+        return None if operating.empty else operating
+    return collapse
+
+
+def _validator(table_name: str):
+    """Etapa entre transformar y cargar: descarta (a cuarentena) las filas inválidas
+    y rechaza los lotes malos antes de la carga (ver `gans.validation`)."""
+    from gans.validation import validate
+
+    def check(df):
+        df = validate(df, table_name)
+        return None if df.empty else df
+    return check
+
+
+def _loader(engine, table_name: str):
+    """Etapa final que hace upsert de cada lote en `table_name` y actualiza sus agregados."""
+    from gans.loader import ensure_unique_key, upsert
+    from gans.rollups import ROLLUPS, refresh
+    ensure_unique_key(engine, table_name)
+
+    def load(df):
+        upsert(engine, table_name, df, batch_size=LOAD_BATCH_SIZE)
+        if table_name in ROLLUPS:
+            refresh(engine, table_name, df)
+    return load
+
+
+def flights_pipeline(airports: list, first_day: date, days: int, host: str, key: str,
+                     start_hour: int = 0, end_hour: int = 24, max_workers: int = 8,
+                     requests_per_second: float = None, store=None, engine=None,
+                     client: HttpClient = None, stream: bool = False,
+                     drop_codeshared: bool = False, collapse_codeshares: bool = False,
+                     codeshare_store=None) -> Pipeline:
+    """ventanas → extraer (N hilos) → [codeshares] → almacén Parquet y/o validar horas →
+    transformar → validar → cargar en flight_arrival.
+
+    Con `stream=True` cada ventana se emite en lotes a medida que se parsea
+    (ver `gans.flights.iter_arrival_batches`), así que la transformación y la
+    carga empiezan antes de que termine la descarga. Con `drop_codeshared=True`
+    los números comerciales se descartan ya al extraer.
+
+    Con `collapse_codeshares=True` cada vuelo físico queda en una sola fila
+    (la del operador, con `codeshare_count`) y los números comerciales van a
+    `codeshare_store` (ver `gans.codeshares`). La clave natural de
+    flight_arrival, `(flight_icao, arrival_time)`, pasa a tener solo vuelos
+    operadores. Con `stream` se agrupa lote a lote según se parsea (ver
+    `gans.codeshares.collapse_batches`).
+    """
+    client = client or default_client()
+    rate_limit = TokenBucket(requests_per_second) if requests_per_second else None
+    windows = day_windows(first_day, days, start_hour, end_hour)
+
+    def extract(job):
+        if rate_limit is not None:
+            rate_limit.acquire()
+        if stream:
+            batches = (df for df in iter_arrival_batches(*job, host, key, client, drop_codeshared=drop_codeshared)
+                       if not df.empty)
+            # Agrupados ya aquí: un vuelo no debe repartirse entre lotes de la etapa siguiente
+            return collapse_batches(batches) if collapse_codeshares else batches
+        df = call_and_process_range(*job, host, key, client, drop_codeshared=drop_codeshared)
+        return None if df.empty else df
+
+    p = Pipeline()
+    p.add("ventanas", lambda: ((a, start, end) for a in airports for start, end in windows))
+    p.add("extraer", extract, upstream="ventanas", workers=max_workers, many=stream)
+    rows = "extraer"
+    if collapse_codeshares:
+        # Un solo hilo: también es el único escritor del almacén de codeshares
+        p.add("codeshares", _collapser(codeshare_store), upstream="extraer")
+        rows = "codeshares"
+    if store is not None:
+        # Un único escritor por almacén: las particiones no admiten escrituras simultáneas
+        p.add("almacen", _writer(store), upstream=rows)
+    if engine is not None:
+        # Horas revisadas incoherentes: solo se ven en las columnas en bruto
+        p.add("validar_llegadas", _validator("arrivals"), upstream=rows)
+        p.add("transformar", to_flight_arrival, upstream="validar_llegadas", workers=2)
+        p.add("validar", _validator("flight_arrival"), upstream="transformar")
+        p.add("cargar", _loader(engine, "flight_arrival"), upstream="validar")
+    return p
+
+
+def weather_pipeline(cities, api_key: str, max_workers: int = 8, store=None, engine=None,
+                     archive=None, client: HttpClient = None, batch_size: int = 50,
+                     requests_per_second: float = None) -> Pipeline:
+    """lotes de ciudades → extraer pronósticos (N peticiones a la vez por lote) → almacén Parquet,
+    histórico de emisiones y/o transformar → validar → cargar en weather_data.
+
+    `cities` es un DataFrame de city_pop (ver `gans.cities.tracked_cities`) o
+    `[(city, iso2), ...]`. Cada lote de `batch_size` ciudades sale como un
+    solo DataFrame (ver `gans.weather.fetch_forecasts`).
+    """
+    client = client or default_client()
+    rate_limit = TokenBucket(requests_per_second) if requests_per_second else None
+    cities = unique_city_names(cities)  # Entre lotes también: weather_data se indexa por nombre
+
+    def batches():
+        for i in range(0, len(cities), batch_size):
+            yield cities[i:i + batch_size]
+
+    def extract(batch):
+        df = fetch_forecasts(batch, api_key, max_workers=max_workers, client=client, rate_limit=rate_limit)
+        return None if df.empty else df
+
+    p = Pipeline()
+    p.add("ciudades", batches)
+    p.add("extraer", extract, upstream="ciudades")
+    if store is not None:
+        p.add("almacen", _writer(store), upstream="extraer")
+    if archive is not None:
+        p.add("versiones", _archiver(archive), upstream="extraer")
+    if engine is not None:
+        p.add("transformar", to_weather_data, upstream="extraer")
+        p.add("validar", _validator("weather_data"), upstream="transformar")
+        p.add("cargar", _loader(engine, "weather_data"), upstream="validar")
+    return p
+
+
+def load_cities(cities: list, engine, path=None) -> int:
+    """Busca `cities` = [(city_ascii, iso2), ...] en el índice de worldcities.csv y hace upsert en city_pop."""
+    from gans.cities import CityIndex
+    from gans.loader import ensure_unique_key, upsert
+    from gans.validation import validate
+
+    index = CityIndex.open(path)
+    pos = index.positions(cities)
+    for (city, country), p in zip(cities, pos):
+        if p < 0:
+            print(f"!! {city},{country} no está en worldcities.csv")
+    df = validate(index.rows(pos[pos >= 0]), "city_pop")
+    ensure_unique_key(engine, "city_pop")
+    return upsert(engine, "city_pop", df)
+
+
+def run(pipeline: Pipeline) -> dict:
+    """Ejecuta el pipeline e imprime estadísticas y fallos por etapa."""
+    stats = pipeline.run()
+    for name, s in stats.items():
+        print(f"{name}: {s.as_dict()}")
+    for name, item, e in pipeline.errors():
+        print(f"!! {name} {item}: {e}")
+    return stats
+
+
+# ----------------------------------------------------------------------
+# LÍNEA DE COMANDOS: ver gans/cli.py (`python -m gans.jobs` se mantiene como alias)
+# ----------------------------------------------------------------------
+
+def main(argv: list = None) -> int:
+    from gans.cli import main as cli_main
+    return cli_main(argv, prog="python -m gans.jobs")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
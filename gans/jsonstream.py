@@ -0,0 +1,62 @@
+import codecs
+import json
+import re
+
+# ----------------------------------------------------------------------
+# PARSEO INCREMENTAL DE UN ARRAY JSON (sin cargar toda la respuesta)
+# ----------------------------------------------------------------------
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = " \t\n\r,"
+
+
+def iter_array_items(chunks, key: str):
+    """Devuelve uno a uno los elementos del array `key` a medida que llegan los bytes.
+
+    `chunks` es cualquier iterable de bytes (p. ej. `resp.iter_content()`).
+    Solo se mantiene en memoria el trozo de texto aún no consumido, así que el
+    pico de memoria depende del tamaño de un elemento y no del de la respuesta.
+    Se asume que `key` aparece una sola vez como clave de un array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos = "", 0
+
+    def more() -> bool:
+        nonlocal buf, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buf = buf[pos:] + decoder.decode(chunk)
+        pos = 0
+        return True
+
+    # 1) Buscar `"key": [`
+    start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while True:
+        match = start.search(buf, pos)
+        if match:
+            pos = match.end()
+            break
+        pos = max(pos, len(buf) - len(key) - 64)  # Conserva una posible coincidencia partida
+        if not more():
+            return
+
+    # 2) Decodificar elemento a elemento
+    while True:
+        while pos < len(buf) and buf[pos] in _SEPARATORS:
+            pos += 1
+        if pos == len(buf):
+            if not more():
+                raise ValueError(f"JSON truncado dentro del array '{key}'")
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if not more():
+                raise
+            continue
+        pos = end
+        yield item
@@ -0,0 +1,229 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import column, table, text
+
+from gans.db import executemany
+from gans.metrics import span
+
+# ----------------------------------------------------------------------
+# CARGA MASIVA E IDEMPOTENTE AL ESQUEMA gans
+# ----------------------------------------------------------------------
+
+# Clave natural de cada tabla: un rerun actualiza en lugar de duplicar
+NATURAL_KEYS = {
+    "flight_arrival": ["flight_icao", "arrival_time"],
+    "weather_data": ["city", "timestamp"],
+    "city_pop": ["municipality_iso_country"],
+    "airport": ["airport_iata"],
+}
+
+# Id autoincremental: entre filas repetidas, la de mayor id es la última cargada
+SURROGATE_KEYS = {
+    "flight_arrival": "arrival_id",
+    "weather_data": "weather_id",
+    "city_pop": "city_id",
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def to_records(df: pd.DataFrame) -> list:
+    """Filas como dicts de tipos Python nativos: NaN/NaT → None y fechas UTC sin zona."""
+    columns = list(df.columns)
+    arrays = []
+    for col in columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            array = np.array(values.dt.to_pydatetime(), dtype=object)
+        else:
+            array = values.to_numpy(dtype=object, copy=True)
+        array[values.isna().to_numpy()] = None
+        arrays.append(array)
+    return [dict(zip(columns, row)) for row in zip(*arrays)]
+
+
+def _dedupe_natural_key(conn, dialect: str, table_name: str, key_cols: list) -> int:
+    """Borra las filas repetidas por clave natural y conserva la más reciente (mayor id).
+
+    Tablas creadas antes del upsert acumulan duplicados de cada rerun, y sin
+    esto el índice UNIQUE no se puede crear. Devuelve las filas borradas.
+    """
+    surrogate = SURROGATE_KEYS.get(table_name)
+    if surrogate is None:
+        return 0
+    q = (lambda c: f'"{c}"') if dialect == "sqlite" else (lambda c: f"`{c}`")
+    keys = ", ".join(q(c) for c in key_cols)
+    not_null = " AND ".join(f"{q(c)} IS NOT NULL" for c in key_cols)
+    repeated = conn.execute(text(
+        f"SELECT {keys}, COUNT(*) FROM {q(table_name)} WHERE {not_null} "
+        f"GROUP BY {keys} HAVING COUNT(*) > 1"
+    )).fetchall()
+    if not repeated:
+        return 0
+    same_key = " AND ".join(f"newer.{q(c)} = old.{q(c)}" for c in key_cols)
+    if dialect == "sqlite":
+        deleted = conn.execute(text(
+            f"DELETE FROM {q(table_name)} AS old WHERE EXISTS (SELECT 1 FROM {q(table_name)} AS newer "
+            f"WHERE {same_key} AND newer.{q(surrogate)} > old.{q(surrogate)})"
+        )).rowcount
+    else:
+        deleted = conn.execute(text(
+            f"DELETE old FROM {q(table_name)} AS old JOIN {q(table_name)} AS newer "
+            f"ON {same_key} AND newer.{q(surrogate)} > old.{q(surrogate)}"
+        )).rowcount
+    sample = ", ".join(str(tuple(r[:-1])) for r in repeated[:5])
+    more = f" y {len(repeated) - 5} más" if len(repeated) > 5 else ""
+    print(f"!! {table_name}: {deleted} filas duplicadas borradas antes de crear {keys} UNIQUE "
+          f"(se conserva la de mayor {surrogate}): {sample}{more}")
+    return deleted
+
+
+def ensure_unique_key(engine, table_name: str, key_cols: list = None) -> None:
+    """Crea (si falta) el índice UNIQUE sobre la clave natural que necesita el upsert.
+
+    Antes de crearlo se eliminan los duplicados que dejaron las cargas con
+    `to_sql(if_exists="append")` (ver `_dedupe_natural_key`).
+    """
+    key_cols = key_cols or NATURAL_KEYS[table_name]
+    index_name = f"uq_{table_name}_natural"
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            exists = conn.execute(text(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = :i"
+            ), {"i": index_name}).scalar()
+        else:
+            exists = conn.execute(text(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = :t AND index_name = :i"
+            ), {"t": table_name, "i": index_name}).scalar()
+        if exists:
+            return
+        _dedupe_natural_key(conn, dialect, table_name, key_cols)
+        if dialect == "sqlite":
+            cols = ", ".join(f'"{c}"' for c in key_cols)
+            conn.execute(text(f'CREATE UNIQUE INDEX "{index_name}" ON "{table_name}" ({cols})'))
+        else:
+            cols = ", ".join(f"`{c}`" for c in key_cols)
+            conn.execute(text(f"ALTER TABLE `{table_name}` ADD UNIQUE KEY `{index_name}` ({cols})"))
+
+
+def _batches(rows: list, batch_size: int):
+    for i in range(0, len(rows), batch_size):
+        yield rows[i:i + batch_size]
+
+
+def _upsert_statement(engine, target, batch: list, key_cols: list, update_cols: list):
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(target).values(batch)
+        return stmt.on_conflict_do_update(index_elements=key_cols,
+                                          set_={c: stmt.excluded[c] for c in update_cols})
+    from sqlalchemy.dialects.mysql import insert
+    stmt = insert(target).values(batch)
+    return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+
+
+def _upsert_insert(engine, table_name: str, df: pd.DataFrame, key_cols: list, batch_size: int) -> int:
+    target = table(table_name, *[column(c) for c in df.columns])
+    update_cols = [c for c in df.columns if c not in key_cols] or key_cols[:1]
+    loaded = 0
+    for batch in _batches(to_records(df), batch_size):
+        # Un INSERT multi-fila por lote y una transacción por lote
+        with span("db_batch", table=table_name, method="insert") as s, engine.begin() as conn:
+            s.rows_in = len(batch)
+            conn.execute(_upsert_statement(engine, target, batch, key_cols, update_cols))
+        loaded += len(batch)
+    return loaded
+
+
+def _upsert_executemany(engine, table_name: str, df: pd.DataFrame, key_cols: list,
+                        batch_size: int, prepared: bool = False) -> int:
+    """Upsert con `cursor.executemany` directo sobre el driver (ver `gans.db.executemany`)."""
+    cols = list(df.columns)
+    update_cols = [c for c in cols if c not in key_cols] or key_cols[:1]
+    marks = ", ".join(["%s"] * len(cols))
+    if engine.dialect.name == "sqlite":
+        names = ", ".join(f'"{c}"' for c in cols)
+        updates = ", ".join(f'"{c}" = excluded."{c}"' for c in update_cols)
+        keys = ", ".join(f'"{c}"' for c in key_cols)
+        sql = (f'INSERT INTO "{table_name}" ({names}) VALUES ({marks}) '
+               f"ON CONFLICT ({keys}) DO UPDATE SET {updates}")
+    else:
+        names = ", ".join(f"`{c}`" for c in cols)
+        updates = ", ".join(f"`{c}` = VALUES(`{c}`)" for c in update_cols)
+        sql = f"INSERT INTO `{table_name}` ({names}) VALUES ({marks}) ON DUPLICATE KEY UPDATE {updates}"
+
+    rows = [tuple(r[c] for c in cols) for r in to_records(df)]
+    loaded = 0
+    for batch in _batches(rows, batch_size):
+        with span("db_batch", table=table_name, method="executemany") as s:
+            s.rows_in = len(batch)
+            loaded += executemany(engine, sql, batch, prepared=prepared)
+    return loaded
+
+
+def _upsert_infile(engine, table_name: str, df: pd.DataFrame, batch_size: int) -> int:
+    """`LOAD DATA LOCAL INFILE ... REPLACE` desde un CSV temporal por lote.
+
+    Requiere `allow_local_infile=True` en el conector y `local_infile=1` en el servidor.
+    """
+    cols = ", ".join(f"`{c}`" for c in df.columns)
+    records = df.copy()
+    for col in records.columns:
+        if isinstance(records[col].dtype, pd.DatetimeTZDtype):
+            records[col] = records[col].dt.tz_convert("UTC").dt.tz_localize(None)
+
+    loaded = 0
+    for start in range(0, len(records), batch_size):
+        batch = records.iloc[start:start + batch_size]
+        fd, staging = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            batch.to_csv(staging, index=False, header=False, na_rep="\\N", lineterminator="\n")
+            path = staging.replace("\\", "/")
+            with span("db_batch", table=table_name, method="infile") as s, engine.begin() as conn:
+                s.rows_in = len(batch)
+                conn.execute(text(
+                    f"LOAD DATA LOCAL INFILE '{path}' REPLACE INTO TABLE `{table_name}` "
+                    "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                    f"LINES TERMINATED BY '\\n' ({cols})"
+                ))
+        finally:
+            os.remove(staging)
+        loaded += len(batch)
+    return loaded
+
+
+def upsert(engine, table_name: str, df: pd.DataFrame, key_cols: list = None,
+           batch_size: int = DEFAULT_BATCH_SIZE, method: str = "insert", prepared: bool = False) -> int:
+    """Carga `df` en `table_name` por lotes, actualizando las filas cuya clave natural ya existe.
+
+    `method="insert"` usa `INSERT ... ON DUPLICATE KEY UPDATE` multi-fila
+    (`ON CONFLICT DO UPDATE` en SQLite); `method="executemany"` envía el mismo
+    upsert con `cursor.executemany` del driver (con `prepared=True`, como
+    sentencia preparada en el servidor); `method="infile"` (solo MySQL)
+    usa `LOAD DATA LOCAL INFILE ... REPLACE` desde un fichero de staging. En
+    todos los casos la tabla necesita un índice UNIQUE sobre la clave natural
+    (ver `ensure_unique_key`). Devuelve el número de filas enviadas.
+    """
+    if df.empty:
+        return 0
+    key_cols = key_cols or NATURAL_KEYS[table_name]
+    # Dentro del lote también gana la última fila de cada clave
+    with span("dedup", source="loader", table=table_name) as s:
+        s.rows_in = len(df)
+        df = df.drop_duplicates(subset=key_cols, keep="last")
+        s.rows_out = len(df)
+    if method == "insert":
+        return _upsert_insert(engine, table_name, df, key_cols, batch_size)
+    if method == "executemany":
+        return _upsert_executemany(engine, table_name, df, key_cols, batch_size, prepared=prepared)
+    if method == "infile":
+        return _upsert_infile(engine, table_name, df, batch_size)
+    raise ValueError(f"Método de carga no soportado: {method}")
@@ -0,0 +1,250 @@
+import cProfile
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ----------------------------------------------------------------------
+# INSTRUMENTACIÓN: TRAMOS CRONOMETRADOS, CONTADORES Y EXPORTACIÓN
+# ----------------------------------------------------------------------
+# Variables de entorno:
+#   GANS_METRICS_JSONL  fichero al que se añade una línea JSON por tramo
+#   GANS_METRICS_PROM   fichero de texto Prometheus (textfile collector) que escribe `flush()`
+#   GANS_PROFILE        tramos a perfilar con cProfile, separados por comas (`all` = todos)
+#   GANS_PROFILE_DIR    destino de los .prof (por defecto data/.profile)
+
+PROFILE_DIR = "data/.profile"
+PREFIX = "gans"
+
+
+@dataclass
+class SpanStats:
+    """Acumulado de un tramo (nombre + etiquetas)."""
+    count: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    seconds_max: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "errors": self.errors, "seconds": round(self.seconds, 4),
+                "seconds_max": round(self.seconds_max, 4), "rows_in": self.rows_in, "rows_out": self.rows_out}
+
+
+class Span:
+    """Tramo en curso: se le pueden anotar filas de entrada/salida y campos extra."""
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.rows_in = None
+        self.rows_out = None
+        self.extra = {}
+
+    def set(self, **fields) -> None:
+        """Campos que solo van a la línea JSON (no son etiquetas de Prometheus)."""
+        self.extra.update(fields)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in key)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(key, escaped)) + "}"
+
+
+class Metrics:
+    """Registro de tramos y contadores de un proceso, seguro entre hilos.
+
+    - `span(nombre, **etiquetas)` cronometra un bloque (red, parseo, dedup,
+      lote de base de datos...) y acumula tiempo, nº de llamadas, errores y
+      filas de entrada/salida por (nombre, etiquetas).
+    - `count(nombre, valor, **etiquetas)` suma a un contador (reintentos,
+      aciertos de caché, bytes, ventanas perdidas...).
+
+    Con `jsonl` cada tramo terminado se añade como una línea JSON; `flush()`
+    escribe el acumulado en formato de texto de Prometheus si hay `prom`.
+    Los tramos cuyo nombre o alguna etiqueta está en `profile` se ejecutan
+    bajo cProfile y se vuelcan a `profile_dir/<tramo>-<pid>-<n>.prof`.
+    Las etiquetas deben tener pocos valores distintos (host, tabla, etapa);
+    lo demás va en `Span.set()`.
+    """
+
+    def __init__(self, jsonl=None, prom=None, profile=(), profile_dir=PROFILE_DIR):
+        self.jsonl = Path(jsonl) if jsonl else None
+        self.prom = Path(prom) if prom else None
+        self.profile = {p.strip() for p in profile if p.strip()}
+        self.profile_dir = Path(profile_dir)
+        self._spans = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._profiles = itertools.count()
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        return cls(jsonl=os.getenv("GANS_METRICS_JSONL"), prom=os.getenv("GANS_METRICS_PROM"),
+                   profile=os.getenv("GANS_PROFILE", "").split(","),
+                   profile_dir=os.getenv("GANS_PROFILE_DIR", PROFILE_DIR))
+
+    # --- registro ---
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _profiled(self, name: str, labels: dict) -> bool:
+        if not self.profile:
+            return False
+        return "all" in self.profile or name in self.profile or any(str(v) in self.profile for v in labels.values())
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        span = Span(name, labels)
+        profiler = cProfile.Profile() if self._profiled(name, labels) else None
+        error = None
+        started = time.perf_counter()
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:  # Ya hay otro perfilador activo (tramos anidados en Python ≥ 3.12)
+                profiler = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+                self._dump_profile(profiler, name, labels)
+            self._finish(span, elapsed, error)
+
+    def _finish(self, span: Span, elapsed: float, error) -> None:
+        with self._lock:
+            stats = self._spans.setdefault((span.name, _label_key(span.labels)), SpanStats())
+            stats.count += 1
+            stats.errors += error is not None
+            stats.seconds += elapsed
+            stats.seconds_max = max(stats.seconds_max, elapsed)
+            stats.rows_in += span.rows_in or 0
+            stats.rows_out += span.rows_out or 0
+        if self.jsonl is None:
+            return
+        event = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "span": span.name,
+                 **span.labels, "seconds": round(elapsed, 6), "rows_in": span.rows_in,
+                 "rows_out": span.rows_out, **span.extra, "thread": threading.current_thread().name}
+        if error is not None:
+            event["error"] = f"{type(error).__name__}: {error}"
+        line = json.dumps(event, default=str, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.jsonl.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.jsonl, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _dump_profile(self, profiler: cProfile.Profile, name: str, labels: dict) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        tag = "-".join([name, *(str(v) for v in labels.values())]).replace("/", "_")
+        profiler.dump_stats(self.profile_dir / f"{tag}-{os.getpid()}-{next(self._profiles)}.prof")
+
+    # --- consulta y exportación ---
+
+    def snapshot(self) -> dict:
+        """`{"spans": [...], "counters": [...]}` con las etiquetas de cada serie."""
+        with self._lock:
+            spans = [{"name": n, **dict(k), **s.as_dict()} for (n, k), s in sorted(self._spans.items())]
+            counters = [{"name": n, **dict(k), "value": v} for (n, k), v in sorted(self._counters.items())]
+        return {"spans": spans, "counters": counters}
+
+    def prometheus(self) -> str:
+        """Acumulado en formato de exposición de texto de Prometheus."""
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+        lines = []
+        series = [
+            ("span_seconds_total", "counter", "Tiempo acumulado por tramo", lambda s: s.seconds),
+            ("span_seconds_max", "gauge", "Tramo más lento", lambda s: s.seconds_max),
+            ("span_calls_total", "counter", "Tramos ejecutados", lambda s: s.count),
+            ("span_errors_total", "counter", "Tramos terminados con excepción", lambda s: s.errors),
+            ("span_rows_in_total", "counter", "Filas de entrada por tramo", lambda s: s.rows_in),
+            ("span_rows_out_total", "counter", "Filas de salida por tramo", lambda s: s.rows_out),
+        ]
+        for metric, kind, help_text, value in series:
+            lines += [f"# HELP {PREFIX}_{metric} {help_text}", f"# TYPE {PREFIX}_{metric} {kind}"]
+            for (name, key), stats in spans:
+                lines.append(f"{PREFIX}_{metric}{_prom_labels((('span', name),) + key)} {value(stats)}")
+        for name in sorted({n for (n, _), _ in counters}):
+            lines += [f"# TYPE {PREFIX}_{name}_total counter"]
+            lines += [f"{PREFIX}_{name}_total{_prom_labels(key)} {v}" for (n, key), v in counters if n == name]
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        """Escribe el fichero Prometheus (de forma atómica, como espera el textfile collector)."""
+        if self.prom is None:
+            return
+        self.prom.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.prom.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, self.prom)
+
+    def report(self) -> str:
+        """Tabla legible de tramos y contadores, para imprimir al final de una ejecución."""
+        snap = self.snapshot()
+        lines = []
+        for s in snap["spans"]:
+            labels = " ".join(f"{k}={v}" for k, v in s.items()
+                              if k not in ("name", *SpanStats().as_dict()))
+            lines.append(f"{s['name']:<20} {labels:<32} n={s['count']:<6} {s['seconds']:9.3f} s"
+                         f"  max {s['seconds_max']:7.3f} s"
+                         + (f"  filas {s['rows_in']}→{s['rows_out']}" if s["rows_in"] or s["rows_out"] else "")
+                         + (f"  errores {s['errors']}" if s["errors"] else ""))
+        for c in snap["counters"]:
+            labels = " ".join(f"{k}={v}" for k, v in c.items() if k not in ("name", "value"))
+            lines.append(f"{c['name']:<20} {labels:<32} {c['value']:g}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def drain(self) -> dict:
+        """Acumulado desde la última llamada (y lo vacía), para enviarlo a otro proceso con `merge()`."""
+        with self._lock:
+            drained = {"spans": self._spans, "counters": self._counters}
+            self._spans, self._counters = {}, {}
+        return drained
+
+    def merge(self, drained: dict) -> None:
+        """Suma el acumulado de otro proceso (ver `drain()`), p. ej. de los workers del backfill."""
+        with self._lock:
+            for key, other in drained["spans"].items():
+                stats = self._spans.setdefault(key, SpanStats())
+                stats.count += other.count
+                stats.errors += other.errors
+                stats.seconds += other.seconds
+                stats.seconds_max = max(stats.seconds_max, other.seconds_max)
+                stats.rows_in += other.rows_in
+                stats.rows_out += other.rows_out
+            for key, value in drained["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+
+# Registro del proceso (configurado con las variables GANS_METRICS_* y GANS_PROFILE)
+metrics = Metrics.from_env()
+span = metrics.span
+count = metrics.count
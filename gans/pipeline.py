@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+from gans.metrics import span
+
+# ----------------------------------------------------------------------
+# PIPELINE EXTRACCIÓN → TRANSFORMACIÓN → CARGA CON COLAS ACOTADAS
+# ----------------------------------------------------------------------
+
+_DONE = object()  # Un upstream terminó
+_STOP = object()  # Orden de salida para cada worker de la etapa
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    emitted: int = 0
+    errors: list = field(default_factory=list)
+    busy_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {"processed": self.processed, "emitted": self.emitted,
+                "errors": len(self.errors), "busy_seconds": round(self.busy_seconds, 3)}
+
+
+class Stage:
+    """Nodo del DAG: aplica `fn` a cada elemento que le llega con `workers` hilos.
+
+    - Una etapa sin `upstream` es una fuente: `fn()` devuelve un iterable.
+    - El resto recibe cada elemento de sus etapas previas; si `fn` devuelve
+      None el elemento se descarta, y con `many=True` el resultado es un
+      iterable cuyos elementos se emiten uno a uno.
+    - Cada etapa lee de una cola de como mucho `queue_size` elementos: si la
+      carga va lenta, la transformación y la extracción se bloquean al
+      llenarse la cola (backpressure) en lugar de acumular memoria.
+
+    Un error en `fn` se registra en las estadísticas y solo se pierde ese elemento.
+    """
+
+    def __init__(self, name: str, fn, upstream: list = (), workers: int = 1,
+                 queue_size: int = 8, many: bool = False):
+        self.name = name
+        self.fn = fn
+        self.upstream = [upstream] if isinstance(upstream, str) else list(upstream)
+        self.workers = max(1, workers) if self.upstream else 1  # Una fuente se itera una sola vez
+        self.many = many
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.downstream = []
+        self.stats = StageStats()
+        self._lock = threading.Lock()
+        self._upstream_done = 0
+        self._workers_done = 0
+
+    @property
+    def is_source(self) -> bool:
+        return not self.upstream
+
+    def _emit(self, result, many: bool) -> None:
+        if result is None:
+            return
+        for item in (result if many else [result]):
+            for stage in self.downstream:
+                stage.inbox.put(item)  # Bloquea si la etapa siguiente va atrasada
+            with self._lock:
+                self.stats.emitted += 1
+
+    def _call(self, *args) -> None:
+        started = time.perf_counter()
+        # Una fuente o una etapa `many` suele devolver un generador: el trabajo
+        # ocurre al iterarlo, así que la iteración va dentro del tramo
+        streaming = self.is_source or self.many
+        try:
+            with span("stage", stage=self.name):
+                result = self.fn(*args)
+                if streaming:
+                    self._emit(result, many=True)
+            if not streaming:
+                self._emit(result, many=False)
+        except Exception as e:
+            with self._lock:
+                self.stats.errors.append((args[0] if args else None, e))
+        finally:
+            with self._lock:
+                self.stats.processed += 0 if self.is_source else 1
+                self.stats.busy_seconds += time.perf_counter() - started
+
+    def _worker(self) -> None:
+        if self.is_source:
+            self._call()
+        else:
+            while True:
+                item = self.inbox.get()
+                if item is _STOP:
+                    break
+                if item is _DONE:
+                    with self._lock:
+                        self._upstream_done += 1
+                        finished = self._upstream_done == len(self.upstream)
+                    if finished:
+                        for _ in range(self.workers):
+                            self.inbox.put(_STOP)
+                    continue
+                self._call(item)
+
+        # El último worker avisa a las etapas siguientes
+        with self._lock:
+            self._workers_done += 1
+            last = self._workers_done == self.workers
+        if last:
+            for stage in self.downstream:
+                stage.inbox.put(_DONE)
+
+
+class PipelineError(RuntimeError):
+    """El DAG está mal definido (etapa duplicada o upstream inexistente)."""
+
+
+class Pipeline:
+    """DAG de etapas que se ejecutan a la vez, conectadas por colas acotadas.
+
+    Ejemplo::
+
+        p = Pipeline()
+        p.add("ventanas", lambda: jobs)
+        p.add("extraer", fetch, upstream="ventanas", workers=8)
+        p.add("transformar", to_rows, upstream="extraer", workers=2)
+        p.add("cargar", load, upstream="transformar")
+        stats = p.run()
+
+    Así la descarga de red, el parseo y la carga en base de datos se solapan.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name: str, fn, upstream=(), workers: int = 1, queue_size: int = 8,
+            many: bool = False) -> Stage:
+        if name in self.stages:
+            raise PipelineError(f"Etapa duplicada: {name}")
+        stage = Stage(name, fn, upstream, workers, queue_size, many)
+        for up in stage.upstream:
+            if up not in self.stages:
+                raise PipelineError(f"La etapa {name} depende de {up}, que no existe")
+            self.stages[up].downstream.append(stage)
+        self.stages[name] = stage
+        return stage
+
+    def run(self) -> dict:
+        """Ejecuta el DAG (una sola vez) hasta agotar las fuentes. Devuelve estadísticas por etapa."""
+        if not any(s.is_source for s in self.stages.values()):
+            raise PipelineError("El pipeline no tiene ninguna fuente")
+        threads = [
+            threading.Thread(target=stage._worker, name=f"{name}-{i}", daemon=True)
+            for name, stage in self.stages.items() for i in range(stage.workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return {name: stage.stats for name, stage in self.stages.items()}
+
+    def errors(self) -> list:
+        """`(etapa, elemento, excepción)` de todos los fallos de la última ejecución."""
+        return [(name, item, e) for name, stage in self.stages.items() for item, e in stage.stats.errors]
@@ -0,0 +1,71 @@
+import multiprocessing
+import threading
+import time
+
+
+class TokenBucket:
+    """Limitador de tasa tipo token bucket, seguro entre hilos.
+
+    `rate` es el número de peticiones por segundo que se reponen y `capacity`
+    el máximo de peticiones que se pueden hacer de golpe (ráfaga). Por defecto
+    `capacity = rate`: como mucho un segundo de cuota de golpe, aunque haya
+    más hilos esperando (con una cuota de 1/s, 8 peticiones a la vez dan 429).
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate debe ser mayor que 0")
+        self.rate = float(rate)
+        self.capacity = max(float(rate if capacity is None else capacity), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Bloquea hasta que haya `tokens` disponibles. Devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class SharedTokenBucket(TokenBucket):
+    """`TokenBucket` cuyo estado vive en memoria compartida (`multiprocessing.Value` + `Lock`).
+
+    Sirve para repartir una misma cuota entre los procesos de un pool: se crea
+    en el proceso padre y se pasa a cada worker (p. ej. en `initargs`).
+    `time.monotonic` es un reloj del sistema, común a todos los procesos.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, context=None):
+        context = context or multiprocessing.get_context()
+        self._shared = context.Array("d", 2, lock=False)  # [tokens, updated]
+        super().__init__(rate, capacity)
+        self._lock = context.Lock()
+
+    @property
+    def _tokens(self) -> float:
+        return self._shared[0]
+
+    @_tokens.setter
+    def _tokens(self, value: float) -> None:
+        self._shared[0] = value
+
+    @property
+    def _updated(self) -> float:
+        return self._shared[1]
+
+    @_updated.setter
+    def _updated(self, value: float) -> None:
+        self._shared[1] = value
@@ -0,0 +1,267 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from gans.schema import ROLLUP_TABLES, metadata
+
+# ----------------------------------------------------------------------
+# AGREGADOS HORARIOS Y DIARIOS MANTENIDOS DE FORMA INCREMENTAL
+# ----------------------------------------------------------------------
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+SQL_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """Agregado de una tabla cruda: dimensiones, medidas por hora y cómo se suman por día."""
+    source: str
+    time_col: str
+    dims: tuple
+    hourly: str
+    daily: str
+    hourly_measures: dict  # columna → expresión SQL sobre las filas crudas
+    daily_measures: dict   # columna → expresión SQL sobre las filas del agregado horario
+
+
+ROLLUPS = {
+    "flight_arrival": RollupSpec(
+        source="flight_arrival", time_col="arrival_time", dims=("airport_iata", "airline_iata"),
+        hourly="arrival_rollup_hourly", daily="arrival_rollup_daily",
+        hourly_measures={"arrivals": "COUNT(*)"},
+        daily_measures={"arrivals": "SUM(arrivals)"},
+    ),
+    "weather_data": RollupSpec(
+        source="weather_data", time_col="timestamp", dims=("city",),
+        hourly="weather_rollup_hourly", daily="weather_rollup_daily",
+        hourly_measures={
+            "temperature_avg": "AVG(temperature)", "temperature_min": "MIN(temperature)",
+            "temperature_max": "MAX(temperature)", "humidity_avg": "AVG(humidity)",
+            "wind_speed_avg": "AVG(wind_speed)", "samples": "COUNT(*)",
+        },
+        # Medias diarias ponderadas por el número de muestras de cada hora
+        daily_measures={
+            "temperature_avg": "SUM(temperature_avg * samples) / SUM(samples)",
+            "temperature_min": "MIN(temperature_min)", "temperature_max": "MAX(temperature_max)",
+            "humidity_avg": "SUM(humidity_avg * samples) / SUM(samples)",
+            "wind_speed_avg": "SUM(wind_speed_avg * samples) / SUM(samples)",
+            "samples": "SUM(samples)",
+        },
+    ),
+}
+
+
+def ensure_rollup_tables(engine) -> None:
+    """Crea las tablas de agregados y de marcas de agua si faltan (también en MySQL)."""
+    metadata.create_all(engine, tables=ROLLUP_TABLES)
+
+
+def _q(engine, name: str) -> str:
+    return f'"{name}"' if engine.dialect.name == "sqlite" else f"`{name}`"
+
+
+def _truncate(engine, expr: str, grain: timedelta) -> str:
+    """Expresión SQL que redondea `expr` al inicio de su hora o de su día."""
+    fmt = "%Y-%m-%d %H:00:00" if grain == HOUR else "%Y-%m-%d 00:00:00"
+    if engine.dialect.name == "sqlite":
+        return f"strftime('{fmt}', {expr})"
+    return f"DATE_FORMAT({expr}, '{fmt}')"
+
+
+def _floor(ts: datetime, grain: timedelta) -> datetime:
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if grain == DAY else ts
+
+
+def _ranges(buckets, step: timedelta) -> list:
+    """Agrupa inicios de bucket en rangos contiguos [desde, hasta)."""
+    ranges = []
+    for b in sorted(set(buckets)):
+        if ranges and ranges[-1][1] == b:
+            ranges[-1][1] = b + step
+        else:
+            ranges.append([b, b + step])
+    return [tuple(r) for r in ranges]
+
+
+def _naive_utc_ts(value) -> datetime:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.to_pydatetime()
+
+
+def _naive_utc(values: pd.Series) -> pd.Series:
+    values = pd.to_datetime(values, errors="coerce", utc=True)
+    return values.dt.tz_localize(None).dropna()
+
+
+# ----------------------------------------------------------------------
+# MANTENIMIENTO
+# ----------------------------------------------------------------------
+
+def _aggregate_sql(engine, spec: RollupSpec, grain: timedelta, target: str = None) -> str:
+    """SELECT agregado sobre [:lo, :hi), desde las filas crudas (horario) o el agregado horario (diario)."""
+    if grain == HOUR or target is None:
+        source, time_col, measures = spec.source, spec.time_col, spec.hourly_measures
+    else:
+        source, time_col, measures = spec.hourly, "bucket_start", spec.daily_measures
+    bucket = _truncate(engine, _q(engine, time_col), grain)
+    dims = ", ".join(_q(engine, d) for d in spec.dims)
+    cols = ", ".join(f"{expr} AS {_q(engine, name)}" for name, expr in measures.items())
+    return (f"SELECT {bucket} AS bucket_start, {dims}, {cols} FROM {_q(engine, source)} "
+            f"WHERE {_q(engine, time_col)} >= :lo AND {_q(engine, time_col)} < :hi "
+            f"GROUP BY {bucket}, {dims}")
+
+
+def _recompute(conn, engine, spec: RollupSpec, grain: timedelta, lo: datetime, hi: datetime) -> None:
+    target = spec.hourly if grain == HOUR else spec.daily
+    measures = spec.hourly_measures if grain == HOUR else spec.daily_measures
+    cols = ", ".join(_q(engine, c) for c in ("bucket_start", *spec.dims, *measures))
+    params = {"lo": lo.strftime(SQL_TIME_FORMAT), "hi": hi.strftime(SQL_TIME_FORMAT)}
+    conn.execute(text(f"DELETE FROM {_q(engine, target)} WHERE bucket_start >= :lo AND bucket_start < :hi"),
+                 params)
+    conn.execute(text(f"INSERT INTO {_q(engine, target)} ({cols}) "
+                      f"{_aggregate_sql(engine, spec, grain, target)}"), params)
+
+
+def get_watermark(conn, source: str):
+    value = conn.execute(text("SELECT aggregated_until FROM rollup_watermark WHERE source = :s"),
+                         {"s": source}).scalar()
+    return pd.Timestamp(value).to_pydatetime() if value is not None else None
+
+
+def _set_watermark(conn, source: str, until: datetime) -> None:
+    params = {"s": source, "u": until.strftime(SQL_TIME_FORMAT)}
+    if conn.execute(text("UPDATE rollup_watermark SET aggregated_until = :u WHERE source = :s"),
+                    params).rowcount == 0:
+        conn.execute(text("INSERT INTO rollup_watermark (source, aggregated_until) VALUES (:s, :u)"), params)
+
+
+def rebuild(engine, source: str) -> None:
+    """Recalcula desde cero los agregados de `source` (flight_arrival o weather_data)."""
+    spec = ROLLUPS[source]
+    ensure_rollup_tables(engine)
+    with engine.begin() as conn:
+        lo, hi = conn.execute(text(f"SELECT MIN({_q(engine, spec.time_col)}), MAX({_q(engine, spec.time_col)}) "
+                                   f"FROM {_q(engine, spec.source)}")).one()
+        if lo is None:
+            return
+        lo, hi = pd.Timestamp(lo).to_pydatetime(), pd.Timestamp(hi).to_pydatetime()
+        _recompute(conn, engine, spec, HOUR, _floor(lo, HOUR), _floor(hi, HOUR) + HOUR)
+        _recompute(conn, engine, spec, DAY, _floor(lo, DAY), _floor(hi, DAY) + DAY)
+        _set_watermark(conn, source, _floor(hi, HOUR) + HOUR)
+
+
+def refresh(engine, source: str, df: pd.DataFrame) -> int:
+    """Aplica al agregado el delta de una carga: recalcula solo las horas y días que toca `df`.
+
+    Se llama justo después del upsert de `df` en `source`. Recalcular el
+    bucket completo desde las filas crudas (en lugar de sumar el lote) hace
+    que repetir una carga no cuente dos veces. La primera vez, sin marca de
+    agua, se hace un `rebuild` completo. Devuelve cuántas horas se recalcularon.
+    """
+    spec = ROLLUPS[source]
+    times = _naive_utc(df[spec.time_col]) if spec.time_col in df.columns else pd.Series(dtype="datetime64[ns]")
+    if times.empty:
+        return 0
+    ensure_rollup_tables(engine)
+    with engine.connect() as conn:
+        watermark = get_watermark(conn, source)
+    if watermark is None:
+        rebuild(engine, source)
+        return 0
+
+    hours = {_floor(t, HOUR) for t in times.dt.to_pydatetime()}
+    with engine.begin() as conn:
+        for lo, hi in _ranges(hours, HOUR):
+            _recompute(conn, engine, spec, HOUR, lo, hi)
+        for lo, hi in _ranges({_floor(h, DAY) for h in hours}, DAY):
+            _recompute(conn, engine, spec, DAY, lo, hi)
+        _set_watermark(conn, source, max(watermark, max(hours) + HOUR))
+    return len(hours)
+
+
+# ----------------------------------------------------------------------
+# CONSULTA (agregado + filas crudas aún sin agregar)
+# ----------------------------------------------------------------------
+
+def read_rollup(engine, source: str, grain: str, start, end, **filters) -> pd.DataFrame:
+    """Buckets `grain` ("hour" o "day") de `source` en [start, end) UTC.
+
+    Los buckets anteriores a la marca de agua salen de la tabla de agregados
+    (coste proporcional al rango pedido, no al histórico); solo el tramo
+    posterior se agrega al vuelo desde las filas crudas. `filters` restringe
+    las dimensiones, p. ej. `airport_iata=["FRA", "BER"]`.
+    """
+    spec = ROLLUPS[source]
+    step = HOUR if grain == "hour" else DAY
+    start = _floor(_naive_utc_ts(start), step)
+    end = _naive_utc_ts(end)
+    ensure_rollup_tables(engine)
+    with engine.connect() as conn:
+        watermark = get_watermark(conn, source)
+    # Un día solo está completo en el agregado si termina antes de la marca de agua
+    cut = _floor(watermark, step) if watermark is not None else start
+    cut = min(max(cut, start), end)
+
+    where, params, binds = "", {}, []
+    for i, (col, values) in enumerate(filters.items()):
+        values = list(values) if isinstance(values, (list, tuple, set)) else [values]
+        where += f" AND {_q(engine, col)} IN :f{i}"
+        params[f"f{i}"] = values
+        binds.append(bindparam(f"f{i}", expanding=True))
+
+    frames = []
+    target = spec.hourly if step == HOUR else spec.daily
+    if cut > start:
+        sql = (f"SELECT * FROM {_q(engine, target)} WHERE bucket_start >= :lo AND bucket_start < :hi{where}")
+        frames.append(pd.read_sql(text(sql).bindparams(*binds), engine, params={
+            **params, "lo": start.strftime(SQL_TIME_FORMAT), "hi": cut.strftime(SQL_TIME_FORMAT)}))
+    if end > cut:
+        sql = _aggregate_sql(engine, spec, step).replace(" GROUP BY", f"{where} GROUP BY")
+        frames.append(pd.read_sql(text(sql).bindparams(*binds), engine, params={
+            **params, "lo": cut.strftime(SQL_TIME_FORMAT), "hi": end.strftime(SQL_TIME_FORMAT)}))
+
+    frames = [f for f in frames if not f.empty]
+    columns = ["bucket_start", *spec.dims, *spec.hourly_measures]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)[columns]
+    df["bucket_start"] = pd.to_datetime(df["bucket_start"], utc=True)
+    return df.sort_values(["bucket_start", *spec.dims], kind="stable").reset_index(drop=True)
+
+
+def arrivals_per_hour(engine, start, end, airports: list = None, by_airline: bool = False) -> pd.DataFrame:
+    """Llegadas por hora y aeropuerto (y aerolínea si `by_airline`)."""
+    df = read_rollup(engine, "flight_arrival", "hour", start, end,
+                     **({"airport_iata": airports} if airports else {}))
+    if by_airline:
+        return df
+    return df.groupby(["bucket_start", "airport_iata"], as_index=False)["arrivals"].sum()
+
+
+def weather_per_hour(engine, start, end, cities: list = None) -> pd.DataFrame:
+    """Temperatura, humedad y viento por hora y ciudad."""
+    return read_rollup(engine, "weather_data", "hour", start, end, **({"city": cities} if cities else {}))
+
+
+def arrivals_with_weather(engine, start, end, airports: list = None) -> pd.DataFrame:
+    """Llegadas por hora y aeropuerto con el pronóstico de su ciudad para esa hora.
+
+    La ciudad de cada aeropuerto sale de la tabla airport; el pronóstico es
+    de 3 h, así que cada hora toma la franja de 3 h que la contiene.
+    """
+    arrivals = arrivals_per_hour(engine, start, end, airports)
+    cities = pd.read_sql(text("SELECT airport_iata, municipality_iso_country FROM airport"), engine)
+    cities["city"] = cities["municipality_iso_country"].str.split(",").str[0]
+    arrivals = arrivals.merge(cities[["airport_iata", "city"]], on="airport_iata", how="left")
+
+    weather = weather_per_hour(engine, _floor(_naive_utc_ts(start), DAY), end,
+                               cities=sorted(arrivals["city"].dropna().unique()) or None)
+    arrivals["slot"] = arrivals["bucket_start"].dt.floor("3h")
+    weather = weather.rename(columns={"bucket_start": "slot"})
+    return arrivals.merge(weather, on=["city", "slot"], how="left").drop(columns="slot")
@@ -0,0 +1,108 @@
+from sqlalchemy import (Column, DateTime, Float, Integer, MetaData, String, Table,
+                        UniqueConstraint)
+
+# ----------------------------------------------------------------------
+# ESQUEMA gans (las cuatro tablas de la Actividad 9)
+# ----------------------------------------------------------------------
+# En MySQL las tablas ya existen; estas definiciones sirven para crear el
+# sustituto SQLite local y documentan las claves naturales del loader.
+
+metadata = MetaData()
+
+city_pop = Table(
+    "city_pop", metadata,
+    Column("city_id", Integer, primary_key=True, autoincrement=True),
+    Column("city", String(100)),
+    Column("lat", Float),
+    Column("lng", Float),
+    Column("population", Integer),
+    Column("municipality_iso_country", String(120)),
+    UniqueConstraint("municipality_iso_country", name="uq_city_pop_natural"),
+)
+
+airport = Table(
+    "airport", metadata,
+    Column("airport_iata", String(3), primary_key=True),
+    Column("airport_icao", String(4)),
+    Column("airport_name", String(200)),
+    Column("municipality_iso_country", String(120)),
+    Column("lat", Float),
+    Column("lng", Float),
+)
+
+weather_data = Table(
+    "weather_data", metadata,
+    Column("weather_id", Integer, primary_key=True, autoincrement=True),
+    Column("city", String(100)),
+    Column("timestamp", DateTime),
+    Column("temperature", Float),
+    Column("humidity", Float),
+    Column("wind_speed", Float),
+    Column("weather_description", String(100)),
+    UniqueConstraint("city", "timestamp", name="uq_weather_data_natural"),
+)
+
+flight_arrival = Table(
+    "flight_arrival", metadata,
+    Column("arrival_id", Integer, primary_key=True, autoincrement=True),
+    Column("flight_icao", String(20)),
+    Column("arrival_time", DateTime),
+    Column("airport_iata", String(3)),
+    Column("airline_iata", String(3)),
+    Column("delay_minutes", Integer),
+    UniqueConstraint("flight_icao", "arrival_time", name="uq_flight_arrival_natural"),
+)
+
+
+# --- Agregados (ver gans/rollups.py); se crean también en MySQL si faltan ---
+
+arrival_rollup_hourly = Table(
+    "arrival_rollup_hourly", metadata,
+    Column("bucket_start", DateTime, nullable=False),
+    Column("airport_iata", String(3)),
+    Column("airline_iata", String(3)),
+    Column("arrivals", Integer),
+    UniqueConstraint("bucket_start", "airport_iata", "airline_iata", name="uq_arrival_rollup_hourly"),
+)
+
+arrival_rollup_daily = Table(
+    "arrival_rollup_daily", metadata,
+    Column("bucket_start", DateTime, nullable=False),
+    Column("airport_iata", String(3)),
+    Column("airline_iata", String(3)),
+    Column("arrivals", Integer),
+    UniqueConstraint("bucket_start", "airport_iata", "airline_iata", name="uq_arrival_rollup_daily"),
+)
+
+
+def _weather_rollup(name: str) -> Table:
+    return Table(
+        name, metadata,
+        Column("bucket_start", DateTime, nullable=False),
+        Column("city", String(100)),
+        Column("temperature_avg", Float),
+        Column("temperature_min", Float),
+        Column("temperature_max", Float),
+        Column("humidity_avg", Float),
+        Column("wind_speed_avg", Float),
+        Column("samples", Integer),
+        UniqueConstraint("bucket_start", "city", name=f"uq_{name}"),
+    )
+
+
+weather_rollup_hourly = _weather_rollup("weather_rollup_hourly")
+weather_rollup_daily = _weather_rollup("weather_rollup_daily")
+
+rollup_watermark = Table(
+    "rollup_watermark", metadata,
+    Column("source", String(50), primary_key=True),
+    Column("aggregated_until", DateTime),  # Fin de la última hora agregada (UTC)
+)
+
+ROLLUP_TABLES = [arrival_rollup_hourly, arrival_rollup_daily, weather_rollup_hourly,
+                 weather_rollup_daily, rollup_watermark]
+
+
+def create_schema(engine) -> None:
+    """Crea las tablas que falten (no modifica las existentes)."""
+    metadata.create_all(engine)
@@ -0,0 +1,259 @@
+import os
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+
+import pandas as pd
+
+from gans.metrics import span
+
+# ----------------------------------------------------------------------
+# ALMACÉN INCREMENTAL PARTICIONADO (append + dedup por clave)
+# ----------------------------------------------------------------------
+
+KEY_SEP = "\x1f"
+KEYS_FILE = "_keys.txt"
+
+
+class PartitionedStore:
+    """Histórico en disco particionado por día UTC (y columnas opcionales).
+
+    Estructura: `root/date=YYYY-MM-DD/<col>=<valor>/part-00000.<fmt>` más un
+    índice `_keys.txt` con las claves de cada partición. Cada escritura solo
+    lee y escribe las particiones que toca:
+
+    - si todas las claves son nuevas, se añade un fichero `part-*` nuevo
+      (append puro, sin leer los datos existentes);
+    - si alguna clave ya existía, se reescribe esa partición aplicando
+      "gana la última escritura", igual que el antiguo `drop_duplicates(keep="last")`.
+
+    Las particiones con más de `compact_after` ficheros se compactan en uno.
+
+    `fmt` es `"csv"` o `"parquet"`. En Parquet los ficheros siguen el `schema`
+    de pyarrow indicado, las columnas de partición solo viven en la ruta
+    (estilo Hive) y `read()` empuja los filtros de fecha y partición a pyarrow.
+    """
+
+    def __init__(self, root, key_cols: list, time_col: str, partition_cols: list = (),
+                 utc_cols: list = None, compact_after: int = 8, fmt: str = "csv", schema=None):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Formato no soportado: {fmt}")
+        self.root = Path(root)
+        self.fmt = fmt
+        self.schema = schema
+        self.key_cols = list(key_cols)
+        self.time_col = time_col
+        self.partition_cols = list(partition_cols)
+        self.utc_cols = list(utc_cols) if utc_cols is not None else [time_col]
+        self.compact_after = compact_after
+
+    # --- claves y particiones ---
+
+    def _key_strings(self, df: pd.DataFrame) -> pd.Series:
+        parts = []
+        for col in self.key_cols:
+            values = df[col]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = values.dt.strftime("%Y-%m-%dT%H:%M:%S%z")
+            parts.append(values.astype(str))
+        keys = parts[0]
+        for values in parts[1:]:
+            keys = keys.str.cat(values, sep=KEY_SEP)
+        return keys
+
+    def _partition_paths(self, df: pd.DataFrame) -> pd.Series:
+        paths = "date=" + df[self.time_col].dt.strftime("%Y-%m-%d")
+        for col in self.partition_cols:
+            paths = paths + f"/{col}=" + df[col].astype(str)
+        return paths
+
+    def partitions(self) -> list:
+        """Rutas relativas de todas las particiones existentes."""
+        if not self.root.exists():
+            return []
+        depth = 1 + len(self.partition_cols)
+        pattern = "/".join(["*"] * depth)
+        return sorted(str(p.relative_to(self.root)).replace(os.sep, "/")
+                      for p in self.root.glob(pattern) if p.is_dir())
+
+    def _load_keys(self, folder: Path) -> set:
+        path = folder / KEYS_FILE
+        if not path.exists():
+            return set()
+        return set(path.read_text(encoding="utf-8").splitlines())
+
+    # --- lectura ---
+
+    def _parts(self, folder: Path) -> list:
+        return sorted(folder.glob(f"part-*.{self.fmt}"))
+
+    def _read_folder(self, folder: Path) -> pd.DataFrame:
+        parts = self._parts(folder)
+        if not parts:
+            return pd.DataFrame()
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            df = pd.concat([pq.read_table(p).to_pandas() for p in parts], ignore_index=True)
+            values = dict(part.split("=", 1) for part in folder.relative_to(self.root).parts)
+            for col in self.partition_cols:
+                df[col] = values[col]
+            return df
+        df = pd.concat([pd.read_csv(p, encoding="utf-8") for p in parts], ignore_index=True)
+        for col in self.utc_cols:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+        return df
+
+    def read(self, start=None, end=None, **filters) -> pd.DataFrame:
+        """Lee el histórico, opcionalmente acotado por día UTC [start, end] y columnas de partición.
+
+        Ejemplo: `store.read("2025-10-06", "2025-10-07", airport_iata=["FRA"])`.
+        """
+        start = str(pd.Timestamp(start).date()) if start is not None else None
+        end = str(pd.Timestamp(end).date()) if end is not None else None
+        wanted = {col: {str(v) for v in (vals if isinstance(vals, (list, tuple, set)) else [vals])}
+                  for col, vals in filters.items()}
+        if self.fmt == "parquet":
+            return self._read_dataset(start, end, wanted)
+
+        frames = []
+        for rel in self.partitions():
+            values = dict(part.split("=", 1) for part in rel.split("/"))
+            if start and values["date"] < start or end and values["date"] > end:
+                continue
+            if any(values.get(col) not in vals for col, vals in wanted.items()):
+                continue
+            df = self._read_folder(self.root / rel)
+            if not df.empty:
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df = df[~self._key_strings(df).duplicated(keep="last")]
+        return df.sort_values(self.time_col, kind="stable").reset_index(drop=True)
+
+    def _read_dataset(self, start, end, wanted: dict) -> pd.DataFrame:
+        """Lectura Parquet con los filtros de fecha y partición empujados a pyarrow."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not self.partitions():
+            return pd.DataFrame()
+        partitioning = ds.partitioning(
+            pa.schema([("date", pa.string())] + [(c, pa.string()) for c in self.partition_cols]),
+            flavor="hive",
+        )
+        dataset = ds.dataset(self.root, format="parquet", partitioning=partitioning,
+                             schema=self._dataset_schema(partitioning.schema))
+        expr = None
+        conditions = []
+        if start:
+            conditions.append(ds.field("date") >= start)
+        if end:
+            conditions.append(ds.field("date") <= end)
+        conditions += [ds.field(col).isin(sorted(vals)) for col, vals in wanted.items()]
+        for cond in conditions:
+            expr = cond if expr is None else expr & cond
+
+        table = dataset.to_table(filter=expr)
+        df = table.drop_columns(["date"]).to_pandas()
+        for col in self.partition_cols:
+            df[col] = df[col].astype("category")
+        return df.sort_values(self.time_col, kind="stable").reset_index(drop=True)
+
+    def _dataset_schema(self, partition_schema):
+        if self.schema is None:
+            return None
+        import pyarrow as pa
+        return pa.unify_schemas([self.schema, partition_schema])
+
+    # --- escritura ---
+
+    def _write_part(self, df: pd.DataFrame, path: Path) -> None:
+        # Escritura atómica: nunca queda un part-* a medias
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            data = df.drop(columns=[c for c in self.partition_cols if c in df.columns])
+            if self.schema is not None:
+                for field in self.schema:
+                    if field.name not in data.columns:
+                        data[field.name] = None
+                    elif pa.types.is_string(field.type):
+                        # p. ej. horas locales con desfase que llegan como Timestamp
+                        values = data[field.name]
+                        data[field.name] = values.astype(str).where(values.notna(), None)
+                    elif (pa.types.is_dictionary(field.type) and pa.types.is_string(field.type.value_type)
+                          and not isinstance(data[field.name].dtype, pd.CategoricalDtype)):
+                        # Una columna de texto toda nula llega como float64
+                        values = data[field.name]
+                        data[field.name] = values.astype(str).where(values.notna(), None)
+                data = data[self.schema.names]
+                table = pa.Table.from_pandas(data, schema=self.schema, preserve_index=False)
+            else:
+                table = pa.Table.from_pandas(data, preserve_index=False)
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            df.to_csv(tmp, index=False, encoding="utf-8")
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _write_keys(folder: Path, keys, mode: str) -> None:
+        with open(folder / KEYS_FILE, mode, encoding="utf-8") as f:
+            f.writelines(k + "\n" for k in keys)
+
+    def write(self, df: pd.DataFrame, partition_lock=None) -> dict:
+        """Añade `df` al histórico. Devuelve cuántas particiones se anexaron o reescribieron.
+
+        Con varios escritores sobre el mismo almacén (p. ej. procesos de
+        `gans.backfill`), `partition_lock(ruta_relativa)` debe devolver un
+        lock que se mantiene mientras se escribe esa partición.
+        """
+        summary = {"rows": len(df), "appended": 0, "rewritten": 0}
+        if df.empty:
+            return summary
+
+        with span("store_write", store=self.root.name, fmt=self.fmt) as s:
+            s.rows_in = len(df)
+            with span("dedup", source="store", store=self.root.name) as d:
+                d.rows_in = len(df)
+                df = df.dropna(subset=[self.time_col])
+                keys = self._key_strings(df)
+                df, keys = df[~keys.duplicated(keep="last")], keys[~keys.duplicated(keep="last")]
+                d.rows_out = s.rows_out = len(df)
+            self._write_partitions(df, keys, summary, partition_lock)
+            s.set(**{k: v for k, v in summary.items() if k != "rows"})
+        return summary
+
+    def _write_partitions(self, df: pd.DataFrame, keys: pd.Series, summary: dict, partition_lock=None) -> None:
+        for rel, group in df.groupby(self._partition_paths(df), sort=True):
+            with partition_lock(rel) if partition_lock is not None else nullcontext():
+                self._write_partition(rel, group, keys.loc[group.index], summary)
+
+    def _write_partition(self, rel: str, group: pd.DataFrame, group_keys: pd.Series, summary: dict) -> None:
+        folder = self.root / rel
+        folder.mkdir(parents=True, exist_ok=True)
+        known = self._load_keys(folder)
+        parts = self._parts(folder)
+
+        if known.isdisjoint(group_keys) and len(parts) < self.compact_after:
+            # Todas las claves son nuevas: append puro
+            self._write_part(group, folder / f"part-{len(parts):05d}.{self.fmt}")
+            self._write_keys(folder, group_keys, "a")
+            summary["appended"] += 1
+            return
+
+        # Hay claves repetidas (o demasiados ficheros): se reescribe solo esta partición
+        merged = pd.concat([self._read_folder(folder), group], ignore_index=True)
+        merged_keys = self._key_strings(merged)
+        keep = ~merged_keys.duplicated(keep="last")
+        merged = merged[keep].sort_values(self.time_col, kind="stable")
+        staged = folder / f"part-00000.{self.fmt}.new"
+        self._write_part(merged, staged)
+        for p in parts:
+            p.unlink()
+        os.replace(staged, folder / f"part-00000.{self.fmt}")
+        self._write_keys(folder, merged_keys[keep], "w")
+        summary["rewritten"] += 1
@@ -0,0 +1,243 @@
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gans.metrics import count, span
+
+# ----------------------------------------------------------------------
+# VALIDACIÓN DE CALIDAD ANTES DE LA CARGA (comprobaciones por columna)
+# ----------------------------------------------------------------------
+
+QUARANTINE_DIR = "data/quarantine"
+MAX_BAD_FRACTION = 0.05  # Por encima, el lote entero se rechaza
+
+IATA_AIRPORT = r"[A-Z]{3}"
+IATA_AIRLINE = r"[A-Z0-9]{2}"
+FLIGHT_NUMBER = r"[A-Z0-9]{2,3} ?\d{1,5}[A-Z]?"
+CITY_KEY = r".+,[A-Z]{2}"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Restricciones de una columna; `None` = sin comprobar.
+
+    `min`/`max` valen para números y fechas (UTC). Para fechas relativas al
+    momento de la validación se usa `max_ahead` (p. ej. `pd.Timedelta(days=30)`).
+    """
+    column: str
+    nullable: bool = True
+    pattern: str = None
+    max_length: int = None
+    min: object = None
+    max: object = None
+    max_ahead: pd.Timedelta = None
+
+
+@dataclass(frozen=True)
+class Order:
+    """`column >= after - tolerance` entre dos fechas de la misma fila; solo se
+    comprueba cuando ambas están presentes."""
+    column: str
+    after: str
+    tolerance: pd.Timedelta = pd.Timedelta(0)
+
+
+@dataclass(frozen=True)
+class TableRules:
+    table: str
+    rules: tuple
+    key: tuple = ()
+    max_bad_fraction: float = MAX_BAD_FRACTION
+    orders: tuple = ()
+
+
+SCHEMAS = {
+    "flight_arrival": TableRules("flight_arrival", (
+        Rule("flight_icao", nullable=False, pattern=FLIGHT_NUMBER, max_length=20),
+        Rule("arrival_time", nullable=False, min=pd.Timestamp("2000-01-01", tz="UTC"),
+             max_ahead=pd.Timedelta(days=30)),
+        Rule("airport_iata", nullable=False, pattern=IATA_AIRPORT),
+        Rule("airline_iata", pattern=IATA_AIRLINE),
+        Rule("delay_minutes", min=-180, max=24 * 60),
+    ), key=("flight_icao", "arrival_time")),
+    # Filas de AeroDataBox antes de transformarlas: el orden de las horas solo se
+    # puede comprobar aquí, delay_minutes queda nulo si falta alguna de las dos
+    "arrivals": TableRules("arrivals", (
+        Rule("scheduled_arrival_utc", nullable=False, min=pd.Timestamp("2000-01-01", tz="UTC")),
+        Rule("revised_arrival_utc", min=pd.Timestamp("2000-01-01", tz="UTC")),
+    ), key=("airport_iata", "scheduled_arrival_utc", "flight_number"),
+        # Una llegada revisada más de 3 h antes de la programada es un error de datos
+        orders=(Order("revised_arrival_utc", after="scheduled_arrival_utc", tolerance=pd.Timedelta(hours=3)),)),
+    "weather_data": TableRules("weather_data", (
+        Rule("timestamp", nullable=False, min=pd.Timestamp("2000-01-01", tz="UTC"),
+             max_ahead=pd.Timedelta(days=6)),
+        Rule("temperature", nullable=False, min=-90, max=60),
+        Rule("humidity", min=0, max=100),
+        Rule("wind_speed", min=0, max=120),
+        Rule("weather_description", max_length=100),
+        Rule("city", nullable=False, max_length=100),
+    ), key=("city", "timestamp")),
+    "city_pop": TableRules("city_pop", (
+        Rule("city", nullable=False, max_length=100),
+        Rule("lat", nullable=False, min=-90, max=90),
+        Rule("lng", nullable=False, min=-180, max=180),
+        Rule("population", min=0),
+        Rule("municipality_iso_country", nullable=False, pattern=CITY_KEY, max_length=120),
+    ), key=("municipality_iso_country",)),
+}
+
+
+class ValidationError(ValueError):
+    """El lote tiene demasiadas filas inválidas y no se carga (ver `report`)."""
+
+    def __init__(self, message: str, report: "ValidationReport"):
+        super().__init__(message)
+        self.report = report
+
+
+@dataclass
+class ValidationReport:
+    table: str
+    rows: int
+    bad_rows: int = 0
+    duplicate_rate: float = 0.0
+    null_rates: dict = field(default_factory=dict)
+    failures: dict = field(default_factory=dict)  # "columna:regla" → filas
+
+    @property
+    def bad_fraction(self) -> float:
+        return self.bad_rows / self.rows if self.rows else 0.0
+
+    def as_dict(self) -> dict:
+        return {"table": self.table, "rows": self.rows, "bad_rows": self.bad_rows,
+                "duplicate_rate": round(self.duplicate_rate, 4),
+                "null_rates": {c: round(r, 4) for c, r in self.null_rates.items() if r},
+                "failures": self.failures}
+
+
+def _as_utc(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values.dt.tz_convert("UTC")
+    return pd.to_datetime(values, errors="coerce", utc=True)
+
+
+def _rule_masks(values: pd.Series, rule: Rule, now: pd.Timestamp):
+    """`(nombre, máscara de filas que fallan)` de cada restricción de la regla."""
+    missing = values.isna()
+    if not rule.nullable:
+        yield "null", missing
+    present = ~missing
+    if not present.any():
+        return
+    if rule.pattern is not None or rule.max_length is not None:
+        text = values.astype("string")
+        if rule.pattern is not None:
+            yield "pattern", present & ~text.str.fullmatch(rule.pattern).fillna(False).astype(bool)
+        if rule.max_length is not None:
+            yield "length", present & (text.str.len() > rule.max_length).fillna(False).astype(bool)
+    if rule.min is not None or rule.max is not None or rule.max_ahead is not None:
+        if isinstance(rule.min, pd.Timestamp) or rule.max_ahead is not None:
+            values = _as_utc(values)
+        else:
+            values = pd.to_numeric(values, errors="coerce")
+        # Un valor presente que no se puede interpretar también es inválido
+        yield "type", present & values.isna()
+        if rule.min is not None:
+            yield "min", (values < rule.min).fillna(False).astype(bool)
+        if rule.max is not None:
+            yield "max", (values > rule.max).fillna(False).astype(bool)
+        if rule.max_ahead is not None:
+            yield "max", (values > now + rule.max_ahead).fillna(False).astype(bool)
+
+
+def _order_mask(df: pd.DataFrame, order: Order) -> pd.Series:
+    """Filas en las que `order.column` es anterior a `order.after` − tolerancia."""
+    return (_as_utc(df[order.column]) < _as_utc(df[order.after]) - order.tolerance).fillna(False).astype(bool)
+
+
+def check(df: pd.DataFrame, rules: TableRules) -> tuple:
+    """Evalúa todas las reglas columna a columna (y las de orden entre columnas). Devuelve `(máscara_inválidas, motivos, informe)`.
+
+    Cada regla es una operación vectorizada sobre la columna entera; los
+    motivos (texto `columna:regla;...`) solo se construyen para las filas
+    que fallan.
+    """
+    now = pd.Timestamp(datetime.now(timezone.utc))
+    report = ValidationReport(rules.table, len(df))
+    bad = np.zeros(len(df), dtype=bool)
+    reasons = np.full(len(df), "", dtype=object)
+
+    for rule in rules.rules:
+        if rule.column not in df.columns:
+            if not rule.nullable:
+                report.failures[f"{rule.column}:missing"] = len(df)
+                bad[:] = True
+                reasons += f"{rule.column}:missing;"
+            continue
+        values = df[rule.column]
+        report.null_rates[rule.column] = float(values.isna().mean()) if len(df) else 0.0
+        for name, mask in _rule_masks(values, rule, now):
+            mask = mask.to_numpy(dtype=bool)
+            failed = int(mask.sum())
+            if failed:
+                report.failures[f"{rule.column}:{name}"] = report.failures.get(f"{rule.column}:{name}", 0) + failed
+                bad |= mask
+                reasons[mask] += f"{rule.column}:{name};"
+
+    for order in rules.orders:
+        if order.column not in df.columns or order.after not in df.columns:
+            continue
+        mask = _order_mask(df, order).to_numpy(dtype=bool)
+        failed = int(mask.sum())
+        if failed:
+            report.failures[f"{order.column}:order"] = failed
+            bad |= mask
+            reasons[mask] += f"{order.column}:order;"
+
+    if rules.key and len(df) and all(c in df.columns for c in rules.key):
+        report.duplicate_rate = float(df.duplicated(subset=list(rules.key)).mean())
+    report.bad_rows = int(bad.sum())
+    return bad, reasons, report
+
+
+def quarantine(rows: pd.DataFrame, table: str, directory=QUARANTINE_DIR) -> Path:
+    """Añade `rows` (con su columna `_reasons`) a `directory/<table>/<día UTC>.csv`."""
+    now = datetime.now(timezone.utc)
+    path = Path(directory) / table / f"{now:%Y-%m-%d}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = rows.assign(_quarantined_at=now.isoformat(timespec="seconds"), _pid=os.getpid())
+    rows.to_csv(path, mode="a", header=not path.exists(), index=False, encoding="utf-8")
+    return path
+
+
+def validate(df: pd.DataFrame, table: str, quarantine_dir=QUARANTINE_DIR,
+             max_bad_fraction: float = None) -> pd.DataFrame:
+    """Filas válidas de `df` según `SCHEMAS[table]`; las inválidas van a cuarentena.
+
+    Si la fracción de filas inválidas supera `max_bad_fraction`, todo el lote
+    va a cuarentena y se lanza `ValidationError` antes de tocar la base de
+    datos (un lote así suele indicar un cambio en la API, no filas sueltas).
+    """
+    rules = SCHEMAS[table]
+    limit = rules.max_bad_fraction if max_bad_fraction is None else max_bad_fraction
+    with span("validate", table=table) as s:
+        s.rows_in = len(df)
+        bad, reasons, report = check(df, rules)
+        s.set(**report.as_dict())
+        if report.bad_rows:
+            count("rows_quarantined", report.bad_rows if report.bad_fraction <= limit else len(df), table=table)
+        if report.bad_fraction > limit:
+            quarantine(df.assign(_reasons=np.where(bad, reasons, "batch_rejected;")), table, quarantine_dir)
+            s.rows_out = 0
+            raise ValidationError(
+                f"Lote de {table} rechazado: {report.bad_rows} de {report.rows} filas inválidas "
+                f"({report.failures})", report)
+        if report.bad_rows:
+            quarantine(df[bad].assign(_reasons=reasons[bad]), table, quarantine_dir)
+            df = df[~bad]
+        s.rows_out = len(df)
+    return df
@@ -0,0 +1,202 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from gans.client import HttpClient, default_client
+from gans.metrics import count, span
+from gans.ratelimit import TokenBucket
+from gans.store import PartitionedStore
+
+# ----------------------------------------------------------------------
+# PRONÓSTICO OPENWEATHER (5 días / 3 horas)
+# ----------------------------------------------------------------------
+
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+COLUMNS = ["time_utc", "temperature", "humidity", "weather_status", "wind_speed", "rain_3h", "snow_3h"]
+
+DEDUP_SUBSET = ["city", "time_utc"]
+STORE_ROOT = "data/weather/forecast"
+
+
+def forecast_to_frame(entries: list) -> pd.DataFrame:
+    """Convierte `list` del JSON de /forecast en un DataFrame tipado.
+
+    Cada columna se extrae de una vez como array (floats con NaN para los
+    huecos) y `time_utc` sale del epoch `dt` en una sola conversión
+    vectorizada, sin dicts intermedios por entrada ni `to_numeric` posterior.
+    """
+    mains = [e.get("main") or {} for e in entries]
+    winds = [e.get("wind") or {} for e in entries]
+    return pd.DataFrame({
+        "time_utc": pd.to_datetime(np.array([e.get("dt") for e in entries], dtype=float), unit="s", utc=True),
+        "temperature": np.array([m.get("temp") for m in mains], dtype=float),
+        "humidity": np.array([m.get("humidity") for m in mains], dtype=float),
+        "weather_status": [((e.get("weather") or [{}])[0]).get("main") for e in entries],
+        "wind_speed": np.array([w.get("speed") for w in winds], dtype=float),
+        "rain_3h": np.array([(e.get("rain") or {}).get("3h") for e in entries], dtype=float),
+        "snow_3h": np.array([(e.get("snow") or {}).get("3h") for e in entries], dtype=float),
+    }, columns=COLUMNS)
+
+
+def _request_forecast(params: dict, api_key: str, client: HttpClient, url: str) -> dict:
+    resp = client.get(url, params={**params, "appid": api_key, "units": "metric", "lang": "es"})
+    try:
+        data = resp.json()
+    except Exception:
+        raise RuntimeError(f"No se pudo decodificar JSON. HTTP {resp.status_code}: {resp.text[:200]}")
+    if resp.status_code != 200:
+        raise RuntimeError(f"Error {resp.status_code}: {data}")
+    return data
+
+
+def fetch_forecast(city: str, country: str, api_key: str, client: HttpClient = None,
+                   url: str = FORECAST_URL) -> pd.DataFrame:
+    """Pronóstico 5 días / 3 h de una ciudad (`units=metric`, `lang=es`) con columna `city`."""
+    client = client or default_client()
+    data = _request_forecast({"q": f"{city},{country}"}, api_key, client, url)
+    with span("parse", source="weather") as s:
+        s.set(city=city)
+        entries = data.get("list", [])
+        df = forecast_to_frame(entries)
+        df.insert(0, "city", city)
+        s.rows_in, s.rows_out = len(entries), len(df)
+    return df
+
+
+# ----------------------------------------------------------------------
+# VARIAS CIUDADES A LA VEZ (p. ej. todas las de city_pop)
+# ----------------------------------------------------------------------
+
+def forecasts_to_frame(responses: list) -> pd.DataFrame:
+    """Une las respuestas `[(city, json), ...]` en un único DataFrame (city, time_utc, métricas).
+
+    Las entradas de todas las ciudades se concatenan en una sola lista y se
+    transforman con una única pasada de `forecast_to_frame`; `city` se
+    construye repitiendo cada nombre tantas veces como franjas trae.
+    """
+    entries, names, sizes = [], [], []
+    for city, data in responses:
+        items = data.get("list", [])
+        entries.extend(items)
+        names.append(city)
+        sizes.append(len(items))
+    df = forecast_to_frame(entries)
+    df.insert(0, "city", np.repeat(np.array(names, dtype=object), sizes))
+    return df
+
+
+def unique_city_names(cities):
+    """Quita las ciudades cuyo nombre ya usa otra anterior (p. ej. Paris,US tras Paris,FR).
+
+    weather_data y el almacén Parquet identifican el pronóstico por el nombre
+    de la ciudad, así que dos ciudades homónimas se sobrescribirían. Se
+    conserva la primera (en city_pop, la de menor city_id) y se avisa del resto.
+    """
+    if isinstance(cities, pd.DataFrame):
+        repeated = cities["city"].duplicated()
+        dropped = list(cities.loc[repeated, "municipality_iso_country"])
+        cities = cities[~repeated]
+    else:
+        seen, kept, dropped = set(), [], []
+        for city, country in cities:
+            if city in seen:
+                dropped.append(f"{city},{country}")
+            else:
+                seen.add(city)
+                kept.append((city, country))
+        cities = kept
+    if dropped:
+        count("cities_ambiguous", len(dropped), source="weather")
+        print(f"!! Se omiten {', '.join(dropped)}: ya hay otra ciudad con ese nombre "
+              "(weather_data se indexa por nombre de ciudad)")
+    return cities
+
+
+def _city_rows(cities) -> list:
+    """`(city, params)` de cada ciudad: por coordenadas si las hay, si no por "ciudad,PAÍS"."""
+    if isinstance(cities, pd.DataFrame):
+        rows = []
+        for city, lat, lng, key in cities[["city", "lat", "lng", "municipality_iso_country"]].itertuples(index=False):
+            if pd.notna(lat) and pd.notna(lng):
+                rows.append((city, {"lat": round(float(lat), 4), "lon": round(float(lng), 4)}))
+            else:
+                rows.append((city, {"q": key}))
+        return rows
+    return [(city, {"q": f"{city},{country}"}) for city, country in cities]
+
+
+def fetch_forecasts(cities, api_key: str, max_workers: int = 8, rate_limit: TokenBucket = None,
+                    client: HttpClient = None, url: str = FORECAST_URL) -> pd.DataFrame:
+    """Pronóstico de muchas ciudades con peticiones concurrentes y una sola transformación.
+
+    `cities` es un DataFrame con las columnas de city_pop (se consulta por
+    `lat`/`lon`, sin ambigüedad de nombres) o una lista `[(city, iso2), ...]`.
+    OpenWeather no tiene un endpoint de pronóstico para varias ciudades
+    (`/group` solo da el tiempo actual), así que se hace una petición por
+    ciudad sobre el pool keep-alive del cliente, repartidas con `rate_limit`
+    (60/min en el plan gratuito). Las ciudades que fallan se avisan y se
+    omiten, igual que las homónimas de otra ya pedida (ver `unique_city_names`).
+    """
+    client = client or default_client()
+    rows = _city_rows(unique_city_names(cities))
+    if not rows:
+        return pd.DataFrame(columns=["city", *COLUMNS])
+
+    def get(row):
+        city, params = row
+        if rate_limit is not None:
+            rate_limit.acquire()
+        try:
+            return city, _request_forecast(params, api_key, client, url), None
+        except Exception as e:  # Una ciudad caída no tumba el lote
+            return city, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rows)))) as pool:
+        results = list(pool.map(get, rows))
+
+    for city, _, error in results:
+        if error is not None:
+            count("forecasts_failed", source="weather")
+            print(f"!! Pronóstico de {city} no disponible: {error}")
+    with span("parse", source="weather_batch") as s:
+        responses = [(city, data) for city, data, error in results if error is None]
+        df = forecasts_to_frame(responses)
+        s.rows_in, s.rows_out = len(responses), len(df)
+    return df
+
+
+WEATHER_DATA_COLUMNS = ["timestamp", "temperature", "humidity", "wind_speed", "weather_description", "city"]
+
+
+def to_weather_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Adapta el pronóstico (con columna `city`) al esquema de la tabla weather_data."""
+    out = df.rename(columns={"time_utc": "timestamp", "weather_status": "weather_description"})
+    return out[WEATHER_DATA_COLUMNS]
+
+
+def arrow_schema():
+    """Esquema Parquet del pronóstico (city va en la ruta de la partición)."""
+    import pyarrow as pa
+    return pa.schema([
+        ("time_utc", pa.timestamp("us", tz="UTC")),
+        ("temperature", pa.float64()),
+        ("humidity", pa.float64()),
+        ("weather_status", pa.dictionary(pa.int32(), pa.string())),
+        ("wind_speed", pa.float64()),
+        ("rain_3h", pa.float64()),
+        ("snow_3h", pa.float64()),
+    ])
+
+
+def forecast_store(root=STORE_ROOT, fmt: str = "parquet") -> PartitionedStore:
+    """Histórico del pronóstico: una partición por día UTC y ciudad."""
+    return PartitionedStore(root, key_cols=DEDUP_SUBSET, time_col="time_utc",
+                            partition_cols=["city"], fmt=fmt,
+                            schema=arrow_schema() if fmt == "parquet" else None)
+
+
+def read_forecast(start=None, end=None, cities: list = None, root=STORE_ROOT):
+    """Pronóstico entre los días UTC `start` y `end`; solo se leen los ficheros que coinciden."""
+    filters = {"city": cities} if cities else {}
+    return forecast_store(root).read(start, end, **filters)
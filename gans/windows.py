@@ -0,0 +1,34 @@
+from datetime import date, datetime, timedelta
+
+# ----------------------------------------------------------------------
+# VENTANAS DE TIEMPO DEL FIDS (solo biblioteca estándar: las usa `--dry-run`)
+# ----------------------------------------------------------------------
+
+MAX_WINDOW_HOURS = 12  # Límite de la API para el rango de un FIDS
+TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+def split_windows(start: datetime, end: datetime, max_hours: int = MAX_WINDOW_HOURS) -> list:
+    """Divide [start, end] en ventanas contiguas de como mucho `max_hours` horas."""
+    if max_hours > MAX_WINDOW_HOURS:
+        raise ValueError(f"La API no admite ventanas de más de {MAX_WINDOW_HOURS} h")
+    step = timedelta(hours=max_hours)
+    windows = []
+    current = start
+    while current < end:
+        window_end = min(current + step, end)
+        windows.append((current.strftime(TIME_FORMAT), window_end.strftime(TIME_FORMAT)))
+        current = window_end
+    return windows
+
+
+def day_windows(first_day: date, days: int = 1, start_hour: int = 0, end_hour: int = 24,
+                max_hours: int = MAX_WINDOW_HOURS) -> list:
+    """Ventanas (hora local del aeropuerto) para `days` días a partir de `first_day`."""
+    windows = []
+    for offset in range(days):
+        day = datetime.combine(first_day + timedelta(days=offset), datetime.min.time())
+        windows.extend(split_windows(
+            day + timedelta(hours=start_hour), day + timedelta(hours=end_hour), max_hours
+        ))
+    return windows
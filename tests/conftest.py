@@ -0,0 +1,127 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeApi:
+    """Servidor HTTP local con respuestas programadas por ruta.
+
+    `script(path, (status, headers, body), ...)` encola respuestas; se sirven
+    en orden y la última se repite. `requests` guarda `(ruta, cabeceras)` de
+    cada petición recibida.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                api.requests.append((path, dict(self.headers)))
+                queue = api.responses.get(path) or [(404, {}, b"")]
+                status, headers, body = queue.pop(0) if len(queue) > 1 else queue[0]
+                body = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def script(self, path: str, *responses) -> None:
+        self.responses[path] = list(responses)
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeApi()
+    api._thread.start()
+    yield api
+    api.httpd.shutdown()
+    api.httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    """Cada prueba empieza con el registro de `gans.metrics` vacío."""
+    from gans.metrics import metrics
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def arrivals():
+    """Llegadas con el esquema de `gans.flights.fetch_arrivals` (dos días UTC, dos aeropuertos)."""
+    import pandas as pd
+    return pd.DataFrame({
+        "scheduled_arrival_utc": pd.to_datetime(
+            ["2025-10-06 08:05", "2025-10-06 09:40", "2025-10-07 10:15", "2025-10-07 10:15"], utc=True),
+        "scheduled_arrival_local": ["2025-10-06 10:05+02:00", "2025-10-06 11:40+02:00",
+                                    "2025-10-07 12:15+02:00", "2025-10-07 12:15+02:00"],
+        "flight_number": ["LH 401", "UA 960", "LH 1003", "EW 7744"],
+        "from_airport_name": ["New York", "Chicago", "Hamburg", "London"],
+        "airline": ["Lufthansa", "United", "Lufthansa", "Eurowings"],
+        "aircraft_model": ["Boeing 747-8", "Boeing 787-9", "Airbus A320", "Airbus A319"],
+        "airport_iata": ["FRA", "FRA", "FRA", "BER"],
+    })
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Base SQLite en un fichero temporal con el esquema gans.
+
+    Un fichero y no `sqlite://`: en memoria cada hilo del pipeline vería una base distinta.
+    """
+    from gans.config import Settings
+    from gans.db import dispose_engines, get_engine
+    yield get_engine(Settings(db_backend="sqlite", sqlite_path=str(tmp_path / "gans.sqlite")))
+    dispose_engines()
+
+
+@pytest.fixture
+def flight_rows():
+    """Filas de flight_arrival (ver `gans.flights.to_flight_arrival`)."""
+    import pandas as pd
+    return pd.DataFrame({
+        "flight_icao": ["LH 401", "UA 960", "LH 1003"],
+        "arrival_time": pd.to_datetime(["2025-10-06 08:05", "2025-10-06 08:40", "2025-10-06 10:15"], utc=True),
+        "airport_iata": ["FRA", "FRA", "FRA"],
+        "airline_iata": ["LH", "UA", "LH"],
+        "delay_minutes": pd.array([5, None, -3], dtype="Int64"),
+    })
+
+
+FIDS_WINDOW = ("2025-10-06T08:00", "2025-10-06T20:00")
+
+
+@pytest.fixture
+def fids(fake_api):
+    """FIDS de FRA para `FIDS_WINDOW` en `fake_api`, con codeshares (ver `benchmarks.fixtures`).
+
+    Devuelve `(host, items)`; `host` se pasa como host de AeroDataBox.
+    """
+    import json
+    from datetime import datetime
+
+    from benchmarks.fixtures import FALLBACK_VOCABULARY, arrival_items
+    items = arrival_items(400, datetime(2025, 10, 6, 6), 12, seed=3, vocabulary=FALLBACK_VOCABULARY)
+    fake_api.script("/flights/airports/iata/FRA/{}/{}".format(*FIDS_WINDOW),
+                    (200, {"Content-Type": "application/json"}, json.dumps({"arrivals": items})))
+    return fake_api.url(""), items
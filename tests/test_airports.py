@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from gans.airports import load_airports, nearest_airports, resolve_airports, to_airport_rows, tracked_airports
+from gans.geo import SphereIndex, haversine_km
+from gans.loader import upsert
+
+OURAIRPORTS = """type,name,latitude_deg,longitude_deg,scheduled_service,iata_code,icao_code,gps_code
+large_airport,Frankfurt am Main Airport,50.0333,8.5706,yes,FRA,EDDF,EDDF
+medium_airport,Frankfurt-Hahn Airport,49.9487,7.2639,yes,HHN,,EDFH
+large_airport,Berlin Brandenburg Airport,52.3514,13.4939,yes,BER,EDDB,EDDB
+small_airport,Egelsbach Airport,49.9608,8.6436,no,QEF,EDFE,EDFE
+medium_airport,Mainz-Finthen,49.9683,8.1472,no,,EDFZ,EDFZ
+"""
+
+
+def test_sphere_index_matches_haversine_brute_force():
+    rng = np.random.default_rng(7)
+    lat, lng = rng.uniform(-80, 80, 500), rng.uniform(-180, 180, 500)
+    index = SphereIndex(lat, lng)
+    qlat, qlng = rng.uniform(-80, 80, 20), rng.uniform(-180, 180, 20)
+
+    dist, idx = index.nearest(qlat, qlng, k=3)
+    brute = haversine_km(qlat[:, None], qlng[:, None], lat[None, :], lng[None, :])
+    np.testing.assert_array_equal(idx, np.argsort(brute, axis=1)[:, :3])
+    np.testing.assert_allclose(dist, np.sort(brute, axis=1)[:, :3], rtol=1e-6)
+
+    for i, found in enumerate(index.within(qlat, qlng, 1500)):
+        np.testing.assert_array_equal(found, np.flatnonzero(brute[i] <= 1500))
+
+
+def test_nearest_airports_within_radius(tmp_path):
+    path = tmp_path / "airports.csv"
+    path.write_text(OURAIRPORTS, encoding="utf-8")
+    airports = load_airports(path)
+    # Solo aeropuertos grandes/medianos con servicio regular y código IATA; el ICAO sale de gps_code si falta
+    assert airports["airport_iata"].tolist() == ["FRA", "HHN", "BER"]
+    assert airports.loc[1, "airport_icao"] == "EDFH"
+
+    cities = pd.DataFrame({"municipality_iso_country": ["Frankfurt am Main,DE", "Mainz,DE", "Hamburg,DE"],
+                           "lat": [50.1136, 49.9994, 53.55], "lng": [8.6797, 8.2736, 10.0]})
+    pairs = nearest_airports(cities, airports, radius_km=100)
+
+    assert list(zip(pairs["municipality_iso_country"], pairs["airport_iata"])) == [
+        ("Frankfurt am Main,DE", "FRA"), ("Mainz,DE", "FRA"), ("Mainz,DE", "HHN")]  # Hahn: 102 km de Fráncfort
+    assert pairs["distance_km"].between(0, 100).all()
+    # Cada aeropuerto queda asignado a su ciudad más cercana
+    rows = to_airport_rows(pairs)
+    assert dict(zip(rows["airport_iata"], rows["municipality_iso_country"])) == {
+        "FRA": "Frankfurt am Main,DE", "HHN": "Mainz,DE"}
+
+
+def test_resolve_airports_fills_the_airport_table(tmp_path, engine):
+    path = tmp_path / "airports.csv"
+    path.write_text(OURAIRPORTS, encoding="utf-8")
+    upsert(engine, "city_pop", pd.DataFrame({
+        "city": ["Berlin", "Frankfurt am Main"], "lat": [52.52, 50.1136], "lng": [13.405, 8.6797],
+        "population": [3644826, 773068], "municipality_iso_country": ["Berlin,DE", "Frankfurt am Main,DE"],
+    }))
+
+    resolve_airports(engine, radius_km=75, path=path)
+    resolve_airports(engine, radius_km=75, path=path)  # Idempotente
+
+    assert tracked_airports(engine) == ["BER", "FRA"]
@@ -0,0 +1,85 @@
+import pandas as pd
+
+import gans.flights
+import gans.weather
+from gans.analytics import asof_join, asof_join_chunked, join_arrivals_weather
+
+SLOTS = pd.date_range("2025-10-06 00:00", periods=8, freq="3h", tz="UTC")
+
+
+def _forecast(cities=("Frankfurt", "Berlin")):
+    return pd.concat([pd.DataFrame({"city": city, "time_utc": SLOTS, "temperature": range(i * 10, i * 10 + 8)})
+                      for i, city in enumerate(cities)], ignore_index=True)
+
+
+def _arrivals(times, airports):
+    return pd.DataFrame({"airport_iata": airports, "flight_number": [f"LH {i}" for i in range(len(times))],
+                         "scheduled_arrival_utc": pd.to_datetime(times, utc=True)})
+
+
+def test_asof_join_takes_the_slot_of_each_arrival_city():
+    arrivals = _arrivals(["2025-10-06 13:59", "2025-10-06 02:00", "2025-10-06 05:10", None],
+                         ["FRA", "BER", "FRA", "FRA"])
+
+    joined = asof_join(arrivals, _forecast(), airport_city={"FRA": "Frankfurt", "BER": "Berlin"})
+
+    # Ordenadas por hora y sin la llegada sin hora
+    assert joined["flight_number"].tolist() == ["LH 1", "LH 2", "LH 0"]
+    assert joined["temperature"].tolist() == [10, 1, 4]  # Berlin 00:00, Frankfurt 03:00, Frankfurt 12:00
+
+    nearest = asof_join(arrivals, _forecast(), airport_city={"FRA": "Frankfurt", "BER": "Berlin"},
+                        direction="nearest")
+    assert nearest["temperature"].tolist() == [11, 2, 5]
+
+
+def test_asof_join_tolerance_leaves_far_arrivals_unmatched():
+    arrivals = _arrivals(["2025-10-07 04:00", "2025-10-06 22:00"], ["FRA", "FRA"])
+    joined = asof_join(arrivals, _forecast(), airport_city={"FRA": "Frankfurt"})
+    assert joined["temperature"].isna().tolist() == [False, True]  # La última franja es 21:00
+    # Sin pronóstico las columnas siguen ahí, vacías
+    assert asof_join(arrivals, _forecast().iloc[:0], airport_city={"FRA": "Frankfurt"})["temperature"].isna().all()
+    assert "city" in asof_join(arrivals, pd.DataFrame(), airport_city={"FRA": "Frankfurt"}).columns
+
+
+def test_chunked_join_loads_only_the_forecast_it_can_match():
+    requested = []
+
+    def load_forecast(lo, hi):
+        requested.append((lo, hi))
+        return _forecast()
+
+    chunks = [_arrivals(["2025-10-06 06:30", "2025-10-06 09:00"], ["FRA", "FRA"]),
+              _arrivals([], []),
+              _arrivals(["2025-10-06 20:00"], ["FRA"])]
+    joined = list(asof_join_chunked(chunks, load_forecast, airport_city={"FRA": "Frankfurt"}))
+
+    assert [len(df) for df in joined] == [2, 1]
+    assert requested == [(pd.Timestamp("2025-10-06 03:30", tz="UTC"), pd.Timestamp("2025-10-06 12:00", tz="UTC")),
+                         (pd.Timestamp("2025-10-06 17:00", tz="UTC"), pd.Timestamp("2025-10-06 23:00", tz="UTC"))]
+
+
+def test_join_arrivals_weather_clips_the_last_chunk(monkeypatch):
+    arrival_days, forecast_days = [], []
+
+    def read_arrivals(start, end, airports):
+        arrival_days.append((start.date().isoformat(), end.date().isoformat()))
+        return _arrivals([start + pd.Timedelta(hours=1)], airports)
+
+    def read_forecast(start, end, cities):
+        forecast_days.append((start.isoformat(), end.isoformat()))
+        slots = pd.date_range(start, end + pd.Timedelta(days=1), freq="3h", tz="UTC", inclusive="left")
+        return pd.DataFrame({"city": "Frankfurt", "time_utc": slots, "temperature": range(len(slots))})
+
+    monkeypatch.setattr(gans.flights, "read_arrivals", read_arrivals)
+    monkeypatch.setattr(gans.weather, "read_forecast", read_forecast)
+
+    joined = list(join_arrivals_weather("2025-10-01", "2025-10-05", {"FRA": "Frankfurt"}, chunk_days=2))
+
+    assert arrival_days == [("2025-10-01", "2025-10-02"), ("2025-10-03", "2025-10-04"), ("2025-10-05", "2025-10-05")]
+    # Cada trozo pide el pronóstico de [mín − 3 h, máx + 3 h] y se recorta a ese intervalo
+    assert forecast_days[0] == ("2025-09-30", "2025-10-01")
+    assert [len(df) for df in joined] == [1, 1, 1]
+    assert joined[0]["scheduled_arrival_utc"].iloc[0] == pd.Timestamp("2025-10-01 01:00", tz="UTC")
+    assert joined[0]["time_utc"].iloc[0] == pd.Timestamp("2025-10-01 00:00", tz="UTC")
+    # La franja de las 00:00 del día 1 (la novena de lo leído desde el 30)
+    assert joined[0]["temperature"].iloc[0] == 8
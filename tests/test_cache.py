@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+from gans.cache import CacheMiss, ResponseCache
+from gans.client import HttpClient
+
+
+def _client(tmp_path, **kwargs):
+    cache = ResponseCache(tmp_path / "http", **kwargs)
+    return HttpClient(cache=cache, backoff_base=0.01), cache
+
+
+def test_fresh_entry_is_served_from_disk(tmp_path, fake_api):
+    fake_api.script("/forecast", (200, {"Content-Type": "application/json"}, '{"list": []}'))
+    client, _ = _client(tmp_path)
+
+    first = client.get(fake_api.url("/forecast"), params={"q": "Berlin,DE", "appid": "secreto"})
+    second = client.get(fake_api.url("/forecast"), params={"q": "Berlin,DE", "appid": "otro"})
+
+    assert first.json() == second.json() == {"list": []}
+    assert getattr(second, "from_cache", False)
+    assert len(fake_api.requests) == 1  # La clave no incluye la API key
+    assert client.stats()["127.0.0.1"]["cache_hits"] == 1
+    assert "secreto" not in "".join(p.read_text() for p in (tmp_path / "http").glob("*/*.json"))
+
+
+def test_expired_entry_is_revalidated_with_etag(tmp_path, fake_api):
+    fake_api.script("/forecast", (200, {"ETag": '"v1"'}, "cuerpo"), (304, {"ETag": '"v1"'}, ""))
+    client, cache = _client(tmp_path, default_ttl=0)
+
+    client.get(fake_api.url("/forecast"))
+    resp = client.get(fake_api.url("/forecast"))
+
+    assert resp.status_code == 200 and resp.text == "cuerpo"
+    assert fake_api.requests[1][1].get("If-None-Match") == '"v1"'
+    assert client.stats()["127.0.0.1"]["revalidated"] == 1
+    assert cache.lookup(fake_api.url("/forecast"))["stored_at"] > time.time() - 5
+
+
+def test_expired_entry_is_replaced_when_changed(tmp_path, fake_api):
+    fake_api.script("/forecast", (200, {"ETag": '"v1"'}, "viejo"), (200, {"ETag": '"v2"'}, "nuevo"))
+    client, _ = _client(tmp_path, default_ttl=0)
+    client.get(fake_api.url("/forecast"))
+    assert client.get(fake_api.url("/forecast")).text == "nuevo"
+    fake_api.script("/forecast", (304, {}, ""))
+    assert client.get(fake_api.url("/forecast")).text == "nuevo"
+
+
+def test_offline_replays_stale_entries_and_misses_raise(tmp_path, fake_api):
+    fake_api.script("/forecast", (200, {}, "grabado"))
+    online, _ = _client(tmp_path, default_ttl=0)
+    online.get(fake_api.url("/forecast"))
+
+    offline, _ = _client(tmp_path, default_ttl=0, offline=True)
+    assert offline.get(fake_api.url("/forecast")).text == "grabado"
+    with pytest.raises(CacheMiss):
+        offline.get(fake_api.url("/otra"))
+    assert len(fake_api.requests) == 1
+
+
+def test_lru_evicts_least_recently_used(tmp_path, fake_api):
+    for name in ("a", "b", "c"):
+        fake_api.script(f"/{name}", (200, {}, os.urandom(2000)))  # Incompresible
+    client, cache = _client(tmp_path, max_bytes=5000)
+
+    client.get(fake_api.url("/a"))
+    client.get(fake_api.url("/b"))
+    # Se usa "a" después de "b": la menos reciente pasa a ser "b"
+    entry = cache.lookup(fake_api.url("/a"))
+    past = time.time() - 60
+    os.utime(cache._paths(cache.key(fake_api.url("/b")))[0], (past, past))
+    cache.response(entry)
+    client.get(fake_api.url("/c"))
+
+    assert cache.lookup(fake_api.url("/a")) is not None
+    assert cache.lookup(fake_api.url("/b")) is None
+    assert cache.lookup(fake_api.url("/c")) is not None
+
+
+def test_streamed_requests_bypass_cache(tmp_path, fake_api):
+    fake_api.script("/fids", (200, {}, "datos"))
+    client, cache = _client(tmp_path)
+    client.get(fake_api.url("/fids"), stream=True).close()
+    client.get(fake_api.url("/fids"), stream=True).close()
+    assert len(fake_api.requests) == 2
+    assert cache.lookup(fake_api.url("/fids")) is None
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("GANS_HTTP_CACHE", "off")
+    assert ResponseCache.from_env() is None
+    monkeypatch.setenv("GANS_HTTP_CACHE", str(tmp_path / "c"))
+    monkeypatch.setenv("GANS_HTTP_OFFLINE", "1")
+    assert ResponseCache.from_env().offline
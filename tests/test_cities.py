@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from gans.cities import CityIndex
+
+WORLDCITIES = """city_ascii,iso2,lat,lng,population
+Berlin,DE,52.52,13.405,3644826
+Hamburg,DE,53.55,10.0,1841179
+Springfield,US,39.80,-89.65,114394
+Springfield,US,37.21,-93.29,169176
+Paris,FR,48.8567,2.3522,2139907
+Potsdam,DE,52.40,13.07,183154
+"""
+
+
+@pytest.fixture
+def worldcities(tmp_path):
+    path = tmp_path / "worldcities.csv"
+    path.write_text(WORLDCITIES, encoding="utf-8")
+    return path
+
+
+def test_lookup_by_name_in_one_batch(tmp_path, worldcities):
+    index = CityIndex.open(worldcities, directory=tmp_path / "index")
+
+    pos = index.positions([("Paris", "FR"), ("Atlantis", "GR"), ("Berlin", "DE")])
+    assert pos[1] == -1 and (pos[[0, 2]] >= 0).all()
+    rows = index.lookup([("Berlin", "DE"), ("Springfield", "US"), ("Atlantis", "GR")])
+    assert rows["municipality_iso_country"].tolist() == ["Berlin,DE", "Springfield,US"]
+    # Clave repetida: gana la ciudad más poblada
+    assert rows["population"].tolist() == [3644826, 169176]
+    assert index.lookup([]).empty
+
+
+def test_open_reuses_the_index_until_the_csv_changes(tmp_path, worldcities):
+    directory = tmp_path / "index"
+    with pytest.raises(FileNotFoundError):
+        CityIndex.open(worldcities, directory=directory, build=False)
+    first = CityIndex.open(worldcities, directory=directory)
+    assert isinstance(first.keys, np.memmap) and len(first) == 6
+
+    assert len(CityIndex.open(worldcities, directory=directory, build=False)) == 6
+    worldcities.write_text(WORLDCITIES + "Munich,DE,48.1372,11.5755,1510378\n", encoding="utf-8")
+    os.utime(worldcities, (0, os.stat(worldcities).st_mtime + 10))
+    with pytest.raises(FileNotFoundError):
+        CityIndex.open(worldcities, directory=directory, build=False)
+    assert len(CityIndex.open(worldcities, directory=directory)) == 7
+
+
+def test_nearest_cities(tmp_path, worldcities):
+    index = CityIndex.build(worldcities, tmp_path / "index")
+
+    near = index.nearest([52.45, 48.85], [13.2, 2.35], k=2)
+
+    assert near["query"].tolist() == [0, 0, 1, 1]
+    assert near["city"].tolist()[:2] == ["Potsdam", "Berlin"]
+    assert near["city"].tolist()[2] == "Paris"
+    assert near["distance_km"].iloc[2] < 1
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+from gans.cli import main
+
+HEAVY = ("pandas", "requests", "sqlalchemy", "gans.flights", "gans.jobs")
+
+
+def test_fetch_flights_dry_run_lists_windows(capsys):
+    main(["--dry-run", "fetch-flights", "--airports", "fra, BER", "--date", "2025-10-06", "--days", "2",
+          "--start-hour", "0", "--end-hour", "24"])
+    out = capsys.readouterr().out
+    assert out.startswith("8 ventanas: FRA, BER × ")
+    assert "('2025-10-07T12:00', '2025-10-08T00:00')" in out
+
+
+def test_fetch_flights_dry_run_skips_heavy_imports():
+    code = ("import sys; from gans.cli import main; "
+            "main(['--dry-run', 'fetch-flights', '--airports', 'FRA']); "
+            f"print(sorted(m for m in {HEAVY!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.splitlines()[-1] == "[]"
+
+
+def test_load_cities_dry_run_does_not_write_the_index(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    csv = tmp_path / "worldcities.csv"
+    csv.write_text("city_ascii,iso2,lat,lng,population\nBerlin,DE,52.52,13.405,3644826\n"
+                   "Paris,FR,48.8567,2.3522,2139907\n", encoding="utf-8")
+
+    main(["--dry-run", "load-cities", "--cities", "Berlin:DE", "--csv", str(csv)])
+
+    out = capsys.readouterr().out
+    assert "Berlin,DE" in out and "Paris" not in out
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["worldcities.csv"]
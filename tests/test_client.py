@@ -0,0 +1,88 @@
+import json
+import time
+
+import pytest
+
+from gans.client import HttpClient, parse_retry_after
+from gans.ratelimit import TokenBucket
+
+
+def _client(**kwargs):
+    return HttpClient(backoff_base=0.01, backoff_max=2.0, **kwargs)
+
+
+def test_retries_5xx_then_succeeds(fake_api):
+    fake_api.script("/fids", (503, {}, "down"), (502, {}, "down"), (200, {}, "ok"))
+    client = _client()
+    resp = client.get(fake_api.url("/fids"))
+
+    assert resp.status_code == 200
+    assert len(fake_api.requests) == 3
+    stats = client.stats()["127.0.0.1"]
+    assert (stats["requests"], stats["retries"], stats["errors"]) == (3, 2, 0)
+
+
+def test_retry_after_is_respected(fake_api):
+    fake_api.script("/fids", (429, {"Retry-After": "1"}, "quota"), (200, {}, "ok"))
+    started = time.perf_counter()
+    resp = _client().get(fake_api.url("/fids"))
+
+    assert resp.status_code == 200
+    assert time.perf_counter() - started >= 1.0
+
+
+def test_gives_up_and_returns_last_response(fake_api):
+    fake_api.script("/fids", (500, {}, "boom"))
+    client = _client(max_retries=2)
+    resp = client.get(fake_api.url("/fids"))
+
+    assert resp.status_code == 500
+    assert len(fake_api.requests) == 3
+    assert client.stats()["127.0.0.1"]["errors"] == 1
+
+
+def test_client_errors_are_not_retried(fake_api):
+    fake_api.script("/fids", (404, {}, "no"))
+    assert _client().get(fake_api.url("/fids")).status_code == 404
+    assert len(fake_api.requests) == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("") is None
+    assert parse_retry_after("pronto") is None
+    assert 0 <= parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") <= 0.0  # Fecha pasada → 0
+
+
+def test_streamed_body_bytes_are_counted(fake_api):
+    body = json.dumps({"arrivals": [{"number": f"LH {i}"} for i in range(2000)]})
+    fake_api.script("/fids", (200, {"Content-Type": "application/json"}, body))
+    client = _client()
+
+    resp = client.get(fake_api.url("/fids"), stream=True)
+    assert client.stats()["127.0.0.1"]["bytes"] == 0  # Aún no se ha leído el cuerpo
+    received = b"".join(resp.iter_content(chunk_size=1024))
+
+    assert len(received) == len(body)
+    assert client.stats()["127.0.0.1"]["bytes"] == len(body)
+
+
+def test_buffered_body_bytes_are_counted(fake_api):
+    fake_api.script("/fids", (200, {}, "x" * 5000))
+    client = _client()
+    client.get(fake_api.url("/fids"))
+    assert client.stats()["127.0.0.1"]["bytes"] == 5000
+
+
+@pytest.mark.parametrize("rate", [1, 5])
+def test_token_bucket_burst_is_one_second_of_quota(rate):
+    bucket = TokenBucket(rate)
+    assert bucket.capacity == rate
+    waits = [bucket.acquire() for _ in range(rate + 1)]
+    assert waits[:rate] == [0.0] * rate
+    assert waits[rate] > 0  # La siguiente espera a que se reponga un token
+
+
+def test_token_bucket_sub_one_rate_still_allows_one_request():
+    assert TokenBucket(0.5).capacity == 1.0
+    assert TokenBucket(2, capacity=8).capacity == 8.0
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from gans.codeshares import codeshares_store, collapse_batches, collapse_codeshares
+from gans.flights import extract_arrivals
+
+
+def _arrivals(n=300, seed=5):
+    from datetime import datetime
+
+    from benchmarks.fixtures import FALLBACK_VOCABULARY, arrival_items
+    items = arrival_items(n, datetime(2025, 10, 6, 6), 12, seed=seed, vocabulary=FALLBACK_VOCABULARY)
+    return extract_arrivals(items, "FRA")
+
+
+def _flight(time, numbers, status=None, airline=None):
+    n = len(numbers)
+    return pd.DataFrame({
+        "airport_iata": ["FRA"] * n,
+        "scheduled_arrival_utc": pd.to_datetime([time] * n, utc=True),
+        "flight_number": numbers,
+        "from_airport_name": ["Madrid"] * n,
+        "airline": airline or ["Lufthansa"] * n,
+        "aircraft_model": ["Airbus A321"] * n,
+        "codeshare_status": status or ["IsCodeshared"] * (n - 1) + ["IsOperator"],
+    })
+
+
+def test_collapse_keeps_operator_and_counts_codeshares():
+    df = pd.concat([_flight("2025-10-06 08:05", ["UA 9044", "SN 7066", "LH 1115"]),
+                    _flight("2025-10-06 09:00", ["LH 401"])], ignore_index=True)
+    operating, codeshares = collapse_codeshares(df)
+
+    assert operating["flight_number"].tolist() == ["LH 1115", "LH 401"]
+    assert operating["codeshare_count"].tolist() == [3, 1]
+    assert codeshares["marketing_flight_number"].tolist() == ["UA 9044", "SN 7066"]
+    assert set(codeshares["operating_flight_number"]) == {"LH 1115"}
+
+
+def test_collapse_batches_matches_whole_window():
+    df = _arrivals()
+    operating, codeshares = collapse_codeshares(df)
+    chunks = [df.iloc[i:i + 7] for i in range(0, len(df), 7)]  # Vuelos partidos entre lotes
+    parts = list(collapse_batches(chunks))
+    streamed = pd.concat([o for o, _ in parts], ignore_index=True)
+    streamed_codeshares = pd.concat([c for _, c in parts], ignore_index=True)
+
+    assert sorted(streamed["flight_number"]) == sorted(operating["flight_number"])
+    assert len(streamed) + len(streamed_codeshares) == len(df)
+    pairs = ["operating_flight_number", "marketing_flight_number"]
+    assert (sorted(map(tuple, streamed_codeshares[pairs].to_numpy()))
+            == sorted(map(tuple, codeshares[pairs].to_numpy())))
+
+
+def test_collapse_batches_holds_back_flight_split_between_batches():
+    df = pd.concat([_flight("2025-10-06 08:00", ["LH 401"]),
+                    _flight("2025-10-06 08:05", ["UA 9044", "SN 7066", "LH 1115"])], ignore_index=True)
+    parts = list(collapse_batches([df.iloc[:2], df.iloc[2:]]))
+
+    operating = pd.concat([o for o, _ in parts], ignore_index=True)
+    assert operating["flight_number"].tolist() == ["LH 401", "LH 1115"]
+    assert operating["codeshare_count"].tolist() == [1, 3]
+
+
+def test_collapse_batches_flight_reappearing_later_is_not_emitted_twice():
+    first = _flight("2025-10-06 08:05", ["UA 9044", "LH 1115"])
+    other = _flight("2025-10-06 08:30", ["LH 401"])
+    late = _flight("2025-10-06 08:05", ["NH 5407"], status=["IsCodeshared"])
+    parts = list(collapse_batches([pd.concat([first, other], ignore_index=True), late, other.iloc[:0]]))
+
+    operating = pd.concat([o for o, _ in parts], ignore_index=True)
+    codeshares = pd.concat([c for _, c in parts], ignore_index=True)
+    assert sorted(operating["flight_number"]) == ["LH 1115", "LH 401"]
+    assert dict(zip(codeshares["marketing_flight_number"], codeshares["operating_flight_number"])) == {
+        "UA 9044": "LH 1115", "NH 5407": "LH 1115"}
+
+
+def test_store_accepts_batch_without_airlines(tmp_path):
+    store = codeshares_store(tmp_path)
+    _, named = collapse_codeshares(_flight("2025-10-06 08:05", ["UA 9044", "LH 1115"]))
+    _, unnamed = collapse_codeshares(_flight("2025-10-07 08:05", ["UA 9044", "LH 1115"], airline=[None, None]))
+    unnamed = unnamed.assign(marketing_airline=np.nan)  # Toda nula llega como float64
+
+    # Sin esquema, el fragmento nulo se escribía como double y read() fallaba al unificar
+    store.write(unnamed)
+    store.write(named)
+    store.write(unnamed.assign(marketing_flight_number="SN 7066"))  # Append a una partición existente
+    store.write(unnamed)  # Reescritura
+
+    df = store.read()
+    assert len(df) == 3
+    assert df["marketing_airline"].tolist()[0] == "Lufthansa"
+    assert df["marketing_airline"].isna().tolist() == [False, True, True]
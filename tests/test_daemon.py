@@ -0,0 +1,87 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from gans.airports import airport_timezones
+from gans.client import HttpClient
+from gans.daemon import Checkpoints, Collector
+
+NOW = datetime(2025, 10, 6, 10, 30, tzinfo=timezone.utc)  # 12:30 en Fráncfort, 06:30 en Nueva York
+
+
+def _collector(tmp_path, airports=("FRA",), **kwargs):
+    return Collector(airports, host="h", key="k", state_path=tmp_path / "state.json",
+                     client=HttpClient(backoff_base=0.01), window_hours=6, horizon_hours=24, **kwargs)
+
+
+def test_windows_are_aligned_in_airport_local_time(tmp_path):
+    collector = _collector(tmp_path, airports=("FRA", "JFK"), timezones={"JFK": "America/New_York"})
+    jobs = collector.due_flight_windows(NOW)
+
+    fra = [start for airport, start, _ in jobs if airport == "FRA"]
+    jfk = [start for airport, start, _ in jobs if airport == "JFK"]
+    assert fra == ["2025-10-06T12:00", "2025-10-06T18:00", "2025-10-07T00:00", "2025-10-07T06:00",
+                   "2025-10-07T12:00"]
+    assert jfk[0] == "2025-10-06T06:00"
+    assert all(end > start for _, start, end in jobs)
+
+
+def test_default_airports_do_not_need_airports_csv(tmp_path, monkeypatch):
+    monkeypatch.setenv("GANS_AIRPORTS_PATH", str(tmp_path / "no-existe.csv"))
+    assert airport_timezones(["fra", "BER"]) == {"FRA": "Europe/Berlin", "BER": "Europe/Berlin"}
+    assert _collector(tmp_path).timezones == {"FRA": "Europe/Berlin"}
+    with pytest.raises(FileNotFoundError):
+        airport_timezones(["JFK"])
+
+
+def test_unknown_timezone_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _collector(tmp_path, airports=("JFK",))
+
+
+def test_timezone_from_ourairports_warns_in_multi_zone_countries(tmp_path, capsys):
+    csv = tmp_path / "airports.csv"
+    csv.write_text("iata_code,iso_country,latitude_deg,longitude_deg\n"
+                   "JFK,US,40.6398,-73.7789\nLAX,US,33.9425,-118.4081\nLHR,GB,51.4706,-0.4619\n",
+                   encoding="utf-8")
+    zones = airport_timezones(["JFK", "LAX", "LHR", "FRA"], path=csv)
+
+    assert zones == {"JFK": "America/New_York", "LAX": "America/Los_Angeles", "LHR": "Europe/London",
+                     "FRA": "Europe/Berlin"}
+    warnings = [line for line in capsys.readouterr().out.splitlines() if line.startswith("!!")]
+    assert [w.split(":")[0] for w in warnings] == ["!! JFK", "!! LAX"]
+    with pytest.raises(ValueError):
+        airport_timezones(["XXX"], path=csv)
+
+
+def test_checkpoints_skip_fetched_windows_until_stale(tmp_path):
+    collector = _collector(tmp_path)
+    jobs = collector.due_flight_windows(NOW)
+    done = collector.checkpoints.section("flights")["FRA"]
+    for _, start, _ in jobs:
+        done[start] = NOW.isoformat()
+    collector.checkpoints.save()
+
+    reloaded = _collector(tmp_path)
+    assert reloaded.due_flight_windows(NOW + timedelta(hours=1)) == []
+    # Pasado refresh_after (3 h) se vuelven a pedir; la ventana de 12:00 ya quedó atrás y se olvida
+    later = reloaded.due_flight_windows(NOW + timedelta(hours=6))
+    assert [start for _, start, _ in later][0] == "2025-10-06T18:00"
+    assert "2025-10-06T12:00" not in reloaded.checkpoints.section("flights")["FRA"]
+
+
+def test_tick_fetches_due_windows_once(tmp_path, fake_api, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Los almacenes usan rutas relativas a data/
+    collector = Collector(["FRA"], host=fake_api.url(""), key="k", state_path=tmp_path / "state.json",
+                          client=HttpClient(backoff_base=0.01), window_hours=6, horizon_hours=6)
+    body = {"arrivals": [{"number": "LH 401", "arrival": {"scheduledTime": {"utc": "2025-10-06 13:05Z"}}}]}
+    for _, start, end in collector.due_flight_windows(NOW):
+        fake_api.script(f"/flights/airports/iata/FRA/{start}/{end}", (200, {}, json.dumps(body)))
+
+    assert collector.tick(NOW)["flight_windows"] == 2
+    assert collector.tick(NOW + timedelta(minutes=5))["flight_windows"] == 0
+    assert len(fake_api.requests) == 2
+    assert set(Checkpoints(tmp_path / "state.json").section("flights")["FRA"]) == {
+        "2025-10-06T12:00", "2025-10-06T18:00"}
+    assert (tmp_path / "data/flights/arrivals/date=2025-10-06/airport_iata=FRA").is_dir()
@@ -0,0 +1,78 @@
+import json
+from datetime import date
+
+import pandas as pd
+
+from gans.client import HttpClient
+from gans.flights import call_and_process_range, iter_arrival_batches
+from gans.jobs import flights_pipeline
+from gans.jsonstream import iter_array_items
+from gans.store import PartitionedStore
+from tests.conftest import FIDS_WINDOW
+
+
+def _client():
+    return HttpClient(backoff_base=0.01)
+
+
+def _sorted(df):
+    return df.sort_values(["scheduled_arrival_utc", "flight_number"]).reset_index(drop=True)
+
+
+def test_iter_array_items_across_chunk_boundaries():
+    body = json.dumps({"meta": {"arrivals": 1}, "arrivals": [{"n": "é" * i, "x": [i, {"y": "]"}]} for i in range(50)]})
+    raw = body.encode("utf-8")
+    chunks = [raw[i:i + 7] for i in range(0, len(raw), 7)]  # Corta también caracteres UTF-8
+    assert list(iter_array_items(chunks, "arrivals")) == json.loads(body)["arrivals"]
+
+
+def test_streamed_parse_matches_buffered(fids):
+    host, items = fids
+    buffered = call_and_process_range("FRA", *FIDS_WINDOW, host, "k", _client())
+    batches = list(iter_arrival_batches("FRA", *FIDS_WINDOW, host, "k", _client(), batch_size=64))
+
+    assert [len(b) for b in batches[:-1]] == [64] * (len(batches) - 1)
+    pd.testing.assert_frame_equal(_sorted(pd.concat(batches, ignore_index=True)), _sorted(buffered))
+    assert len(buffered) == len(items)
+
+
+def test_drop_codeshared_in_both_paths(fids):
+    host, items = fids
+    operators = sum(item["codeshareStatus"] != "IsCodeshared" for item in items)
+    for stream in (False, True):
+        df = call_and_process_range("FRA", *FIDS_WINDOW, host, "k", _client(), stream=stream,
+                                    drop_codeshared=True)
+        assert len(df) == operators
+        assert set(df["codeshare_status"]) == {"IsOperator"}
+
+
+def _run(host, tmp_path, **kwargs):
+    store = PartitionedStore(tmp_path / "arrivals", key_cols=["airport_iata", "scheduled_arrival_utc", "flight_number"],
+                             time_col="scheduled_arrival_utc", partition_cols=["airport_iata"])
+    codeshares = PartitionedStore(tmp_path / "codeshares", key_cols=["airport_iata", "scheduled_arrival_utc",
+                                                                     "marketing_flight_number"],
+                                  time_col="scheduled_arrival_utc", partition_cols=["airport_iata"])
+    p = flights_pipeline(["FRA"], date(2025, 10, 6), 1, host, "k", start_hour=8, end_hour=20, store=store,
+                         client=_client(), codeshare_store=codeshares, **kwargs)
+    p.run()
+    assert p.errors() == []
+    return store.read(), codeshares.read()
+
+
+def test_pipeline_stream_matches_buffered(fids, tmp_path):
+    host, items = fids
+    buffered, _ = _run(host, tmp_path / "a")
+    streamed, _ = _run(host, tmp_path / "b", stream=True)
+    assert len(streamed) == len(buffered) == len(items)
+
+
+def test_pipeline_collapses_codeshares_while_streaming(fids, tmp_path):
+    host, items = fids
+    buffered, buffered_codeshares = _run(host, tmp_path / "a", collapse_codeshares=True)
+    streamed, streamed_codeshares = _run(host, tmp_path / "b", collapse_codeshares=True, stream=True)
+
+    assert sorted(streamed["flight_number"]) == sorted(buffered["flight_number"])
+    assert len(streamed) + len(streamed_codeshares) == len(items)
+    pairs = ["operating_flight_number", "marketing_flight_number"]
+    assert (sorted(map(tuple, streamed_codeshares[pairs].to_numpy()))
+            == sorted(map(tuple, buffered_codeshares[pairs].to_numpy())))
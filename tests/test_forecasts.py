@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gans.forecasts import ForecastArchive
+
+SLOTS = pd.date_range("2025-10-06 12:00", periods=4, freq="3h", tz="UTC")
+ISSUED = [pd.Timestamp("2025-10-06 06:00", tz="UTC") + pd.Timedelta(hours=h) for h in (0, 1, 2)]
+
+
+def _issue(temperatures, city="Berlin"):
+    n = len(temperatures)
+    return pd.DataFrame({
+        "city": city, "time_utc": SLOTS[:n], "temperature": temperatures, "humidity": [70.0] * n,
+        "weather_status": ["Clouds"] * n, "wind_speed": [3.0] * n, "rain_3h": [np.nan] * n, "snow_3h": [np.nan] * n,
+    })
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ForecastArchive(tmp_path / "versions")
+    assert archive.append(_issue([10.0, 11.0, 12.0, 13.0]), ISSUED[0])["changed"] == 4
+    # Idéntica: no se escribe ninguna franja, solo se registra la emisión
+    assert archive.append(_issue([10.0, 11.0, 12.0, 13.0]), ISSUED[1])["changed"] == 0
+    assert archive.append(_issue([10.0, 14.0, 12.0, 13.0]), ISSUED[2])["changed"] == 1
+    return archive
+
+
+def test_only_changed_slots_are_stored(archive):
+    stored = archive.store.read()
+    assert len(stored) == 5
+    assert archive.issues(["Berlin"])["issued_at"].tolist() == ISSUED
+
+
+def test_as_of_returns_the_forecast_valid_at_each_instant(archive):
+    early = archive.as_of(ISSUED[1], SLOTS[0], SLOTS[-1])
+    late = archive.as_of(ISSUED[2] + pd.Timedelta(minutes=5), SLOTS[0], SLOTS[-1])
+
+    assert early["temperature"].tolist() == [10.0, 11.0, 12.0, 13.0]
+    assert late["temperature"].tolist() == [10.0, 14.0, 12.0, 13.0]
+    assert archive.as_of(ISSUED[0] - pd.Timedelta(hours=1), SLOTS[0], SLOTS[-1]).empty
+
+
+def test_versions_of_a_slot(archive):
+    changed = archive.versions("Berlin", SLOTS[1])
+    assert changed["temperature"].tolist() == [11.0, 14.0]
+    assert changed["lead_hours"].tolist() == [9.0, 7.0]
+
+    # Una fila por emisión, con el último valor conocido en las que no cambiaron nada
+    expanded = archive.versions("Berlin", SLOTS[1], expand=True)
+    assert expanded["temperature"].tolist() == [11.0, 11.0, 14.0]
+    assert expanded["issued_at"].tolist() == ISSUED
+
+
+def test_cities_are_versioned_independently(archive):
+    summary = archive.append(pd.concat([_issue([10.0, 14.0, 12.0, 13.0]), _issue([5.0, 6.0], "Hamburg")]),
+                             ISSUED[2] + pd.Timedelta(hours=1))
+    assert summary["changed"] == 2
+    latest = archive.as_of(ISSUED[2] + pd.Timedelta(hours=1), SLOTS[0], SLOTS[-1], cities=["Hamburg"])
+    assert latest["temperature"].tolist() == [5.0, 6.0]
@@ -0,0 +1,56 @@
+import pandas as pd
+from sqlalchemy import text
+
+from gans.loader import ensure_unique_key, upsert
+
+
+def _rows(engine) -> pd.DataFrame:
+    return pd.read_sql(text("SELECT * FROM flight_arrival ORDER BY arrival_time"), engine)
+
+
+def test_upsert_rerun_does_not_duplicate(engine, flight_rows):
+    ensure_unique_key(engine, "flight_arrival")
+    for method in ("insert", "executemany"):
+        assert upsert(engine, "flight_arrival", flight_rows, method=method) == 3
+        assert upsert(engine, "flight_arrival", flight_rows, method=method) == 3
+        assert len(_rows(engine)) == 3
+
+
+def test_upsert_updates_existing_key(engine, flight_rows):
+    ensure_unique_key(engine, "flight_arrival")
+    upsert(engine, "flight_arrival", flight_rows)
+    upsert(engine, "flight_arrival", flight_rows.iloc[:1].assign(delay_minutes=42), batch_size=1)
+
+    df = _rows(engine)
+    assert len(df) == 3
+    assert df.loc[df["flight_icao"] == "LH 401", "delay_minutes"].tolist() == [42]
+    assert df["arrival_time"].tolist() == sorted(df["arrival_time"].tolist())
+
+
+def test_upsert_last_row_wins_within_batch(engine, flight_rows):
+    ensure_unique_key(engine, "flight_arrival")
+    batch = pd.concat([flight_rows, flight_rows.iloc[:1].assign(delay_minutes=7)], ignore_index=True)
+    assert upsert(engine, "flight_arrival", batch) == 3
+    assert _rows(engine).loc[lambda df: df["flight_icao"] == "LH 401", "delay_minutes"].tolist() == [7]
+
+
+def test_ensure_unique_key_removes_old_duplicates(engine, flight_rows):
+    # Tabla cargada antes con to_sql(if_exists="append"): sin índice UNIQUE y con reruns repetidos
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE flight_arrival"))
+        conn.execute(text("CREATE TABLE flight_arrival (arrival_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          "flight_icao VARCHAR(20), arrival_time DATETIME, airport_iata VARCHAR(3), "
+                          "airline_iata VARCHAR(3), delay_minutes INTEGER)"))
+    # Fechas con el mismo texto que deja el driver en SQLite (to_sql añadiría microsegundos)
+    rows = flight_rows.assign(arrival_time=flight_rows["arrival_time"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    rows.to_sql("flight_arrival", engine, if_exists="append", index=False)
+    rows.iloc[:1].assign(delay_minutes=9).to_sql("flight_arrival", engine, if_exists="append", index=False)
+
+    ensure_unique_key(engine, "flight_arrival")
+    ensure_unique_key(engine, "flight_arrival")  # Ya existe: no hace nada
+    df = _rows(engine)
+    assert len(df) == 3
+    assert df.loc[df["flight_icao"] == "LH 401", "delay_minutes"].tolist() == [9]
+
+    upsert(engine, "flight_arrival", flight_rows)
+    assert len(_rows(engine)) == 3
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from gans.flights import arrivals_store, read_arrivals
+from gans.weather import forecast_store, read_forecast
+
+
+def _forecast():
+    return pd.DataFrame({
+        "time_utc": pd.to_datetime(["2025-10-06 21:00", "2025-10-07 00:00"], utc=True),
+        "temperature": [11.2, 9.8],
+        "humidity": [81, 90],
+        "weather_status": ["nubes", "lluvia ligera"],
+        "wind_speed": [3.1, 4.4],
+        "rain_3h": [None, 0.4],
+        "snow_3h": [None, None],
+        "city": ["Berlin", "Berlin"],
+    })
+
+
+def test_arrivals_roundtrip_keeps_types_and_partitions(tmp_path, arrivals):
+    store = arrivals_store(tmp_path)
+    assert store.write(arrivals)["appended"] == 3
+    assert store.write(arrivals)["appended"] == 0  # Idempotente también en Parquet
+
+    df = read_arrivals(airports=["FRA"], root=tmp_path)
+    assert len(df) == 3
+    assert str(df["scheduled_arrival_utc"].dt.tz) == "UTC"
+    assert set(df["airport_iata"]) == {"FRA"}
+    assert "airport_iata" not in pd.read_parquet(next(tmp_path.rglob("part-*.parquet"))).columns
+    # Columnas del esquema que este lote no trae quedan nulas
+    assert df["codeshare_count"].isna().all()
+
+
+def test_arrivals_read_pushes_day_filter(tmp_path, arrivals):
+    arrivals_store(tmp_path).write(arrivals)
+    df = read_arrivals("2025-10-07", "2025-10-07", root=tmp_path)
+    assert sorted(df["flight_number"]) == ["EW 7744", "LH 1003"]
+    assert read_arrivals("2030-01-01", root=tmp_path).empty
+
+
+def test_forecast_store_is_utc_only_and_dedupes_by_slot(tmp_path):
+    store = forecast_store(tmp_path)
+    store.write(_forecast())
+    store.write(_forecast().iloc[1:].assign(temperature=7.5))  # Emisión más reciente de la misma franja
+
+    df = read_forecast(cities=["Berlin"], root=tmp_path)
+    assert df["temperature"].tolist() == [11.2, 7.5]
+    assert str(df["time_utc"].dt.tz) == "UTC"
+    assert "time_berlin" not in df.columns
+    assert df["rain_3h"].isna().tolist() == [True, False]
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from gans.pipeline import Pipeline, PipelineError
+
+
+def _fail_on(value):
+    def fn(x):
+        if x == value:
+            raise ValueError(f"fallo en {x}")
+        return x
+    return fn
+
+
+def test_run_records_stage_errors_and_keeps_going():
+    results = []
+    p = Pipeline()
+    p.add("fuente", lambda: range(10))
+    p.add("transformar", _fail_on(3), upstream="fuente", workers=3)
+    p.add("cargar", results.append, upstream="transformar")
+    stats = p.run()
+
+    assert sorted(results) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert stats["transformar"].as_dict()["errors"] == 1
+    assert stats["transformar"].processed == 10
+    assert stats["transformar"].emitted == 9
+    [(stage, item, error)] = p.errors()
+    assert (stage, item) == ("transformar", 3)
+    assert isinstance(error, ValueError)
+
+
+def test_run_records_error_in_source_generator():
+    def source():
+        yield 1
+        yield 2
+        raise OSError("API caída")
+
+    results = []
+    p = Pipeline()
+    p.add("fuente", source)
+    p.add("cargar", results.append, upstream="fuente")
+    stats = p.run()
+
+    # Lo emitido antes del fallo llega; las etapas siguientes terminan igualmente
+    assert results == [1, 2]
+    assert stats["fuente"].emitted == 2
+    [(stage, item, error)] = p.errors()
+    assert (stage, item) == ("fuente", None)
+    assert isinstance(error, OSError)
+
+
+def test_run_records_error_midway_through_many_stage():
+    def explode(x):
+        yield x
+        if x == 2:
+            raise ValueError("lote corrupto")
+        yield x * 10
+
+    results = []
+    p = Pipeline()
+    p.add("fuente", lambda: [1, 2, 3])
+    p.add("extraer", explode, upstream="fuente", many=True)
+    p.add("cargar", results.append, upstream="extraer")
+    stats = p.run()
+
+    assert sorted(results) == [1, 2, 3, 10, 30]
+    assert [(stage, item) for stage, item, _ in p.errors()] == [("extraer", 2)]
+    assert stats["extraer"].emitted == 5
+
+
+def test_invalid_dag_raises():
+    p = Pipeline()
+    with pytest.raises(PipelineError):
+        p.run()
+    p.add("fuente", lambda: [])
+    with pytest.raises(PipelineError):
+        p.add("fuente", lambda: [])
+    with pytest.raises(PipelineError):
+        p.add("cargar", print, upstream="transformar")
+
+
+def test_bounded_queue_holds_back_the_source():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    def slow(x):
+        release.wait(5)
+        return x
+
+    results = []
+    p = Pipeline()
+    p.add("fuente", source)
+    p.add("cargar", slow, upstream="fuente", queue_size=2)
+    p.add("fin", results.append, upstream="cargar")
+    runner = threading.Thread(target=p.run)
+    runner.start()
+    threading.Event().wait(0.2)
+    # Un elemento en proceso, dos en la cola y uno esperando a entrar
+    assert len(produced) <= 4
+    release.set()
+    runner.join(5)
+    assert sorted(results) == list(range(50))
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from gans.loader import ensure_unique_key, upsert
+from gans.rollups import arrivals_per_hour, read_rollup, refresh
+
+
+def _load(engine, df):
+    upsert(engine, "flight_arrival", df)
+    return refresh(engine, "flight_arrival", df)
+
+
+def test_refresh_after_reload_does_not_double_count(engine, flight_rows):
+    ensure_unique_key(engine, "flight_arrival")
+    assert _load(engine, flight_rows) == 0  # Primera carga: rebuild completo
+
+    hourly = read_rollup(engine, "flight_arrival", "hour", "2025-10-06", "2025-10-07")
+    daily = read_rollup(engine, "flight_arrival", "day", "2025-10-06", "2025-10-07")
+
+    # La misma carga otra vez: se recalculan sus horas, no se suman
+    assert _load(engine, flight_rows) == 2
+    pd.testing.assert_frame_equal(read_rollup(engine, "flight_arrival", "hour", "2025-10-06", "2025-10-07"), hourly)
+    pd.testing.assert_frame_equal(read_rollup(engine, "flight_arrival", "day", "2025-10-06", "2025-10-07"), daily)
+
+    per_hour = arrivals_per_hour(engine, "2025-10-06", "2025-10-07", airports=["FRA"])
+    assert per_hour["arrivals"].tolist() == [2, 1]
+    assert daily["arrivals"].sum() == 3
+
+
+def test_refresh_applies_changed_rows(engine, flight_rows):
+    ensure_unique_key(engine, "flight_arrival")
+    _load(engine, flight_rows)
+
+    # Recarga con un vuelo reasignado a otro aeropuerto y uno nuevo
+    reloaded = pd.concat([
+        flight_rows.iloc[:1].assign(airport_iata="BER"),
+        flight_rows.iloc[:1].assign(flight_icao="EW 7744", airline_iata="EW"),
+    ], ignore_index=True)
+    _load(engine, reloaded)
+
+    per_hour = arrivals_per_hour(engine, "2025-10-06", "2025-10-07")
+    counts = {(t.hour, a): n for t, a, n in per_hour.itertuples(index=False)}
+    assert counts == {(8, "BER"): 1, (8, "FRA"): 2, (10, "FRA"): 1}
+    daily = read_rollup(engine, "flight_arrival", "day", "2025-10-06", "2025-10-07")
+    assert daily["arrivals"].sum() == 4
+
+
+def test_weather_daily_rollup_weights_hours_by_samples(engine):
+    ensure_unique_key(engine, "weather_data")
+    weather = pd.DataFrame({
+        "city": ["Berlin", "Berlin", "Berlin", "Hamburg"],
+        "timestamp": ["2025-10-06 00:00:00", "2025-10-06 03:00:00", "2025-10-06 06:00:00", "2025-10-06 00:00:00"],
+        "temperature": [10.0, 16.0, 13.0, 9.0],
+        "humidity": [80, 60, 70, 90],
+        "wind_speed": [2.0, 4.0, 3.0, 5.0],
+        "weather_description": ["clear sky", "few clouds", "few clouds", "overcast clouds"],
+    })
+    upsert(engine, "weather_data", weather)
+    refresh(engine, "weather_data", weather)
+    # Corrección de una hora ya agregada
+    fixed = weather.iloc[[2]].assign(temperature=19.0)
+    upsert(engine, "weather_data", fixed)
+    refresh(engine, "weather_data", fixed)
+
+    daily = read_rollup(engine, "weather_data", "day", "2025-10-06", "2025-10-07", city="Berlin")
+    [row] = daily.itertuples(index=False)
+    assert (row.samples, row.temperature_min, row.temperature_max) == (3, 10.0, 19.0)
+    assert row.temperature_avg == pytest.approx(15.0)
+    assert row.humidity_avg == pytest.approx(70.0)
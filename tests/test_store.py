@@ -0,0 +1,74 @@
+import pandas as pd
+
+from gans.store import PartitionedStore
+
+
+def _store(root, fmt="csv"):
+    return PartitionedStore(root, key_cols=["scheduled_arrival_utc", "flight_number"],
+                            time_col="scheduled_arrival_utc", partition_cols=["airport_iata"], fmt=fmt)
+
+
+def test_write_twice_is_idempotent(tmp_path, arrivals):
+    for fmt in ("csv", "parquet"):
+        store = _store(tmp_path / fmt, fmt)
+        first = store.write(arrivals)
+        assert first == {"rows": 4, "appended": 3, "rewritten": 0}
+        files = sorted(p.name for p in store.root.rglob("part-*"))
+
+        # Repetir el mismo lote reescribe las particiones en lugar de añadir copias
+        again = store.write(arrivals)
+        assert again == {"rows": 4, "appended": 0, "rewritten": 3}
+        assert sorted(p.name for p in store.root.rglob("part-*")) == files
+        df = store.read()
+        assert len(df) == 4
+        assert not df.duplicated(subset=["scheduled_arrival_utc", "flight_number"]).any()
+
+
+def test_write_keeps_last_version_of_a_key(tmp_path, arrivals):
+    store = _store(tmp_path)
+    store.write(arrivals)
+    revised = arrivals.iloc[:1].assign(aircraft_model="Airbus A380")
+    summary = store.write(revised)
+
+    assert summary == {"rows": 1, "appended": 0, "rewritten": 1}
+    df = store.read("2025-10-06", "2025-10-06", airport_iata=["FRA"])
+    assert len(df) == 2
+    assert df.loc[df["flight_number"] == "LH 401", "aircraft_model"].tolist() == ["Airbus A380"]
+
+
+def test_write_appends_new_keys_without_rewriting(tmp_path, arrivals):
+    store = _store(tmp_path)
+    store.write(arrivals.iloc[:1])
+    summary = store.write(arrivals.iloc[1:2])
+
+    assert summary == {"rows": 1, "appended": 1, "rewritten": 0}
+    assert len(list((store.root / "date=2025-10-06" / "airport_iata=FRA").glob("part-*.csv"))) == 2
+    assert store.read()["flight_number"].tolist() == ["LH 401", "UA 960"]
+
+
+def test_write_drops_rows_without_time(tmp_path, arrivals):
+    store = _store(tmp_path, "csv")
+    rows = arrivals.copy()
+    rows.loc[0, "scheduled_arrival_utc"] = pd.NaT
+    assert store.write(rows)["appended"] == 3
+    assert len(store.read()) == 3
+
+
+def test_read_filters_by_day_and_partition(tmp_path, arrivals):
+    store = _store(tmp_path)
+    store.write(arrivals)
+    assert store.partitions() == ["date=2025-10-06/airport_iata=FRA", "date=2025-10-07/airport_iata=BER",
+                                  "date=2025-10-07/airport_iata=FRA"]
+    assert sorted(store.read("2025-10-07", "2025-10-07")["flight_number"]) == ["EW 7744", "LH 1003"]
+    assert store.read(airport_iata="BER")["flight_number"].tolist() == ["EW 7744"]
+    assert store.read("2025-10-08").empty
+
+
+def test_many_small_writes_are_compacted(tmp_path, arrivals):
+    store = PartitionedStore(tmp_path, key_cols=["scheduled_arrival_utc", "flight_number"],
+                             time_col="scheduled_arrival_utc", compact_after=3)
+    base = arrivals.iloc[:1]
+    for minute in range(5):
+        store.write(base.assign(scheduled_arrival_utc=base["scheduled_arrival_utc"] + pd.Timedelta(minutes=minute)))
+    assert len(list((tmp_path / "date=2025-10-06").glob("part-*.csv"))) <= 3
+    assert len(store.read()) == 5
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from gans.validation import ValidationError, validate
+
+
+def _quarantined(directory, table) -> pd.DataFrame:
+    [path] = (directory / table).glob("*.csv")
+    return pd.read_csv(path)
+
+
+def test_invalid_rows_go_to_quarantine(tmp_path, flight_rows):
+    rows = pd.concat([flight_rows] * 10, ignore_index=True)  # 30 filas
+    rows.loc[0, "flight_icao"] = "not a flight"
+    rows.loc[1, "delay_minutes"] = -600
+
+    valid = validate(rows, "flight_arrival", quarantine_dir=tmp_path, max_bad_fraction=0.1)
+
+    assert len(valid) == 28
+    assert 0 not in valid.index and 1 not in valid.index
+    bad = _quarantined(tmp_path, "flight_arrival")
+    assert bad["_reasons"].tolist() == ["flight_icao:pattern;", "delay_minutes:min;"]
+
+
+def test_batch_with_too_many_bad_rows_is_rejected(tmp_path, flight_rows):
+    rows = flight_rows.copy()
+    rows["airport_iata"] = ["FRA", "frankfurt", None]
+
+    with pytest.raises(ValidationError) as excinfo:
+        validate(rows, "flight_arrival", quarantine_dir=tmp_path)
+
+    report = excinfo.value.report
+    assert report.bad_rows == 2
+    assert report.failures == {"airport_iata:null": 1, "airport_iata:pattern": 1}
+    # Todo el lote va a cuarentena, también la fila válida
+    bad = _quarantined(tmp_path, "flight_arrival")
+    assert len(bad) == 3
+    assert bad["_reasons"].tolist() == ["batch_rejected;", "airport_iata:pattern;", "airport_iata:null;"]
+
+
+def test_missing_required_column_rejects_batch(tmp_path, flight_rows):
+    with pytest.raises(ValidationError) as excinfo:
+        validate(flight_rows.drop(columns=["arrival_time"]), "flight_arrival", quarantine_dir=tmp_path)
+    assert excinfo.value.report.failures == {"arrival_time:missing": 3}
+
+
+def test_valid_batch_passes_untouched(tmp_path):
+    weather = pd.DataFrame({
+        "city": ["Berlin", "Hamburg"],
+        "timestamp": pd.Timestamp.now(tz="UTC").floor("h") + pd.to_timedelta([3, 6], unit="h"),
+        "temperature": [12.5, 9.0],
+        "humidity": [70, 88],
+        "wind_speed": [3.2, 7.1],
+        "weather_description": ["light rain", "overcast clouds"],
+    })
+    valid = validate(weather, "weather_data", quarantine_dir=tmp_path)
+    pd.testing.assert_frame_equal(valid, weather)
+    assert not (tmp_path / "weather_data").exists()
+
+
+def test_revised_arrival_far_before_schedule_is_quarantined(tmp_path):
+    scheduled = pd.Timestamp("2025-10-06 12:00", tz="UTC") + pd.to_timedelta(range(40), unit="min")
+    raw = pd.DataFrame({
+        "airport_iata": "FRA",
+        "flight_number": [f"LH {400 + i}" for i in range(40)],
+        "scheduled_arrival_utc": scheduled,
+        "revised_arrival_utc": scheduled + pd.Timedelta(minutes=10),
+    })
+    raw.loc[0, "revised_arrival_utc"] = scheduled[0] - pd.Timedelta(hours=4)
+    raw.loc[1, "revised_arrival_utc"] = scheduled[1] - pd.Timedelta(hours=2)  # Dentro de la tolerancia
+    raw.loc[2, "revised_arrival_utc"] = pd.NaT  # Sin hora revisada: no se puede comprobar
+
+    valid = validate(raw, "arrivals", quarantine_dir=tmp_path)
+
+    assert len(valid) == 39 and 0 not in valid.index
+    bad = _quarantined(tmp_path, "arrivals")
+    assert bad["flight_number"].tolist() == ["LH 400"]
+    assert bad["_reasons"].tolist() == ["revised_arrival_utc:order;"]
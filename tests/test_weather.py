@@ -0,0 +1,111 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from gans.client import HttpClient
+from gans.loader import upsert
+from gans.metrics import metrics
+from gans.weather import _city_rows, fetch_forecasts, unique_city_names
+
+CITIES = pd.DataFrame({
+    "city": ["Paris", "Berlin", "Paris", "Hamburg"],
+    "lat": [48.8567, 52.52, 33.6609, None],
+    "lng": [2.3522, 13.405, -95.5555, None],
+    "population": [2139907, 3644826, 24476, 1841179],
+    "municipality_iso_country": ["Paris,FR", "Berlin,DE", "Paris,US", "Hamburg,DE"],
+})
+
+
+def _forecast_body(temperatures):
+    return json.dumps({"list": [{"dt": 1759752000 + 10800 * i, "main": {"temp": t, "humidity": 60},
+                                 "weather": [{"main": "Clouds"}], "wind": {"speed": 3.5}}
+                                for i, t in enumerate(temperatures)]})
+
+
+def test_same_name_cities_keep_the_first(capsys):
+    kept = unique_city_names(CITIES)
+    assert kept["municipality_iso_country"].tolist() == ["Paris,FR", "Berlin,DE", "Hamburg,DE"]
+    assert unique_city_names([("Paris", "FR"), ("Paris", "US")]) == [("Paris", "FR")]
+    assert capsys.readouterr().out.count("!! Se omiten Paris,US") == 2
+    assert metrics.snapshot()["counters"] == [{"name": "cities_ambiguous", "source": "weather", "value": 2}]
+
+
+def test_cities_are_queried_by_coordinates_when_known():
+    assert _city_rows(CITIES.iloc[[1, 3]]) == [("Berlin", {"lat": 52.52, "lon": 13.405}),
+                                               ("Hamburg", {"q": "Hamburg,DE"})]
+    assert _city_rows([("Berlin", "DE")]) == [("Berlin", {"q": "Berlin,DE"})]
+
+
+def test_fetch_forecasts_builds_one_frame_for_all_cities(fake_api):
+    fake_api.script("/forecast", (200, {}, _forecast_body([12.0, 11.5])))
+
+    df = fetch_forecasts(CITIES, "k", client=HttpClient(backoff_base=0.01), url=fake_api.url("/forecast"))
+
+    assert len(fake_api.requests) == 3  # Paris,US no se pide
+    assert sorted(df["city"].unique()) == ["Berlin", "Hamburg", "Paris"]
+    assert df.groupby("city")["temperature"].apply(list).to_dict() == {
+        "Berlin": [12.0, 11.5], "Hamburg": [12.0, 11.5], "Paris": [12.0, 11.5]}
+
+
+def test_failing_city_is_skipped(fake_api, capsys):
+    fake_api.script("/forecast", (404, {}, json.dumps({"cod": "404", "message": "city not found"})))
+    df = fetch_forecasts([("Atlantis", "GR")], "k", client=HttpClient(), url=fake_api.url("/forecast"))
+    assert df.empty
+    assert "!! Pronóstico de Atlantis no disponible" in capsys.readouterr().out
+
+
+# --- data/weather_berlin.py: ciudades de city_pop o Berlín si no hay ninguna ---
+
+class _Stop(Exception):
+    pass
+
+
+@pytest.fixture
+def weather_script(monkeypatch):
+    spec = importlib.util.spec_from_file_location(
+        "weather_berlin_script", Path(__file__).resolve().parents[1] / "data" / "weather_berlin.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "k")
+    requested = []
+
+    def fetch(cities, *args, **kwargs):
+        requested.append(cities)
+        raise _Stop
+
+    monkeypatch.setattr(module, "fetch_forecasts", fetch)
+    return module, requested
+
+
+def test_script_falls_back_to_berlin_without_tracked_cities(engine, weather_script, monkeypatch):
+    module, requested = weather_script
+    monkeypatch.setattr(module, "get_engine", lambda: engine)
+    with pytest.raises(_Stop):
+        module.main()
+    assert requested == [module.DEFAULT_CITIES]
+
+
+def test_script_falls_back_to_berlin_without_database(weather_script, monkeypatch, capsys):
+    module, requested = weather_script
+
+    def no_database():
+        raise OSError("sin servidor")
+
+    monkeypatch.setattr(module, "get_engine", no_database)
+    with pytest.raises(_Stop):
+        module.main()
+    assert requested == [module.DEFAULT_CITIES]
+    assert "No se pudo leer city_pop (sin servidor)" in capsys.readouterr().out
+
+
+def test_script_uses_tracked_cities(engine, weather_script, monkeypatch):
+    module, requested = weather_script
+    upsert(engine, "city_pop", CITIES.astype({"population": int}))
+    monkeypatch.setattr(module, "get_engine", lambda: engine)
+    with pytest.raises(_Stop):
+        module.main()
+    [cities] = requested
+    assert cities["municipality_iso_country"].tolist() == ["Paris,FR", "Berlin,DE", "Paris,US", "Hamburg,DE"]
@@ -1,83 +1,67 @@
 import os
-import requests
-import pandas as pd
 from pathlib import Path
+from gans.forecasts import ForecastArchive
+from gans.weather import fetch_forecast, forecast_store, read_forecast
 
-# 1) API key desde variable de entorno (limpia espacios/nuevas líneas)
-API_KEY = (os.getenv("OPENWEATHER_API_KEY") or "").strip()
-if not API_KEY:
-    raise RuntimeError("No se encontró la API key. Define OPENWEATHER_API_KEY en tu shell.")
-
-# 2) Ciudad y parámetros
+# Ciudad del pronóstico
 CITY = "Berlin"
 COUNTRY = "DE"
-URL = "https://api.openweathermap.org/data/2.5/forecast"
-params = {
-    "q": f"{CITY},{COUNTRY}",
-    "appid": API_KEY,
-    "units": "metric",
-    "lang": "es"
-}
+TIMEZONE = "Europe/Berlin"
+
+# Guarda además cada descarga como una emisión (issued_at) en data/weather/forecast_versions/
+# para comparar el pronóstico con su antelación; solo se escriben las franjas que cambian
+ARCHIVE_VERSIONS = False
 
-# 3) Petición
-resp = requests.get(URL, params=params, timeout=20)
-try:
-    data = resp.json()
-except Exception:
-    raise RuntimeError(f"No se pudo decodificar JSON. HTTP {resp.status_code}: {resp.text[:200]}")
+# Copia CSV para Excel: cada descarga añade solo sus franjas al final (si una franja se repite,
+# la última fila es el pronóstico más reciente). Con True se reescribe entera desde el almacén,
+# una fila por time_utc (lee todo el histórico de la ciudad)
+EXCEL_FULL_EXPORT = False
+EXCEL_COLUMNS = ["time_utc", "time_berlin", "temperature", "humidity", "weather_status",
+                 "wind_speed", "rain_3h", "snow_3h"]
 
-if resp.status_code != 200:
-    raise RuntimeError(f"Error {resp.status_code}: {data}")
 
-# 4) Parseo de datos → DataFrame
-rows = []
-for entry in data.get("list", []):
-    rows.append({
-        "time_utc": entry.get("dt_txt"),  # string UTC
-        "temperature": (entry.get("main") or {}).get("temp"),
-        "humidity": (entry.get("main") or {}).get("humidity"),
-        "weather_status": (entry.get("weather") or [{}])[0].get("main"),
-        "wind_speed": (entry.get("wind") or {}).get("speed"),
-        "rain_3h": (entry.get("rain") or {}).get("3h"),
-        "snow_3h": (entry.get("snow") or {}).get("3h")
-    })
+def main():
+    # 1) API key desde variable de entorno (limpia espacios/nuevas líneas)
+    api_key = (os.getenv("OPENWEATHER_API_KEY") or "").strip()
+    if not api_key:
+        raise RuntimeError("No se encontró la API key. Define OPENWEATHER_API_KEY en tu shell.")
 
-df = pd.DataFrame(rows)
+    # 2) y 3) Petición y parseo (cliente compartido: conexiones reutilizadas,
+    #    reintentos 429/5xx, timeout por host; time_utc en UTC y métricas numéricas)
+    df = fetch_forecast(CITY, COUNTRY, api_key)
 
-# 4.1) Limpieza de tipos (clave para deduplicar bien)
-df["time_utc"] = pd.to_datetime(df["time_utc"], errors="coerce", utc=True)
-for c in ["temperature", "humidity", "wind_speed", "rain_3h", "snow_3h"]:
-    if c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+    #  Hora local de Berlín
+    df["time_berlin"] = df["time_utc"].dt.tz_convert(TIMEZONE)
 
-#  Hora local de Berlín
-try:
-    df["time_berlin"] = df["time_utc"].dt.tz_convert("Europe/Berlin")
-except Exception:
-    df["time_berlin"] = df["time_utc"]
+    # 4) Guardar en el almacén Parquet particionado (data/weather/forecast/date=AAAA-MM-DD/city=Berlin/)
+    #    Solo se tocan los días del pronóstico; si un time_utc ya existía gana el registro más reciente
+    store = forecast_store()
+    summary = store.write(df)
 
-# 5) Guardar en CSV (en carpeta data/weather) con deduplicado por time_utc
-out_dir = Path("data/weather")
-out_dir.mkdir(parents=True, exist_ok=True)
-out_csv = out_dir / "berlin_forecast.csv"
+    if ARCHIVE_VERSIONS:
+        archived = ForecastArchive().append(df.drop(columns=["time_berlin"]))
+        print(f"Emisión {archived['issued_at']}: {archived['changed']} de {archived['slots']} franjas cambiaron")
 
-if out_csv.exists():
-    old = pd.read_csv(out_csv)
-    # Normaliza tipos por si versiones anteriores guardaron como texto
-    if "time_utc" in old.columns:
-        old["time_utc"] = pd.to_datetime(old["time_utc"], errors="coerce", utc=True)
-    for c in ["temperature", "humidity", "wind_speed", "rain_3h", "snow_3h"]:
-        if c in old.columns:
-            old[c] = pd.to_numeric(old[c], errors="coerce")
-    if "time_berlin" in old.columns:
-        # No es imprescindible para dedup, pero lo mantenemos si existe
-        old["time_berlin"] = pd.to_datetime(old["time_berlin"], errors="coerce", utc=True)
+    # Copia CSV (UTF-8 con BOM) para abrirla en Excel. El almacén solo guarda time_utc
+    # (la hora local se deriva), así que time_berlin se vuelve a calcular aquí
+    out_csv = Path("data/weather") / "berlin_forecast.csv"
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    excel = read_forecast(cities=[CITY]) if EXCEL_FULL_EXPORT else df
+    excel = excel.sort_values("time_utc", kind="stable")
+    excel["time_berlin"] = excel["time_utc"].dt.tz_convert(TIMEZONE)
+    excel = excel.reindex(columns=EXCEL_COLUMNS)
+    if EXCEL_FULL_EXPORT or not out_csv.exists():
+        excel.to_csv(out_csv, index=False, encoding="utf-8-sig")
+    else:
+        # El BOM solo va al principio del fichero
+        excel.to_csv(out_csv, mode="a", header=False, index=False, encoding="utf-8")
 
-    df = pd.concat([old, df], ignore_index=True)
+    print(f"Pronóstico guardado en: {store.root.resolve()}")
+    print(f"Copia para Excel: {out_csv.resolve()} "
+          f"({len(excel)} filas {'exportadas' if EXCEL_FULL_EXPORT else 'añadidas'})")
+    print(f"Registros: {len(df)} (particiones anexadas: {summary['appended']}, reescritas: {summary['rewritten']})")
+    print(df.tail(5).to_string(index=False))
 
-# Ordena por tiempo y quita duplicados (conserva el registro más reciente por instante)
-df = df.sort_values("time_utc").drop_duplicates(subset=["time_utc"], keep="last")
 
-# Reordena columnas de salida (incluye time_berlin si existiera)
-cols = ["time_utc", "time_berlin", "temperature", "humidity", "weather_status", "wind_speed", "rain_3h", "snow_3h"]
-df = df[[c for c in c]()]()
+if __name__ == "__main__":
+    main()